@@ -0,0 +1,124 @@
+# assets.py
+import os
+import pygame
+from atlas import load_atlas
+
+
+class AssetCache:
+    """全局图片缓存：每个文件只从磁盘解码一次，缩放/翻转后的版本也按参数缓存复用。
+
+    缓存键为 (path, size, scale, flip, alpha, smooth)。返回的 Surface 被所有精灵共享，
+    调用者不能在上面直接绘制或修改透明度，需要修改时先 copy()。
+    动画帧优先从精灵图集（atlas.py）里取 subsurface，不在图集里的才打开零散文件。
+    预加载线程解码好的图片放在 decoded 里，第一次用到时在主线程 convert。
+    没有打开窗口时（simulation.py）图片不做 convert，只用来取尺寸。
+    """
+
+    def __init__(self, use_atlas=True):
+        self.surfaces = {}
+        self.hits = 0
+        self.misses = 0
+        self.use_atlas = use_atlas
+        self.atlas = None
+        self.decoded = {}  # 路径 -> 还没 convert 的 Surface
+
+    def image(self, path, size=None, scale=None, flip=False, alpha=True, smooth=False):
+        """加载 path 并按需缩放（size 为目标尺寸，scale 为倍数）和水平翻转"""
+        key = (os.path.normpath(path), size and tuple(size), scale, flip, alpha, smooth)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        if size is None and scale is None and not flip:
+            surface = self.atlas_frame(path) if alpha else None
+            if surface is None:
+                image = self.decoded.pop(key[0], None)
+                if image is None:
+                    image = pygame.image.load(path)
+                surface = converted(image, alpha)
+        else:
+            # 派生版本总是从缓存里的原图生成
+            surface = self.image(path, alpha=alpha)
+            if scale is not None:
+                size = (int(surface.get_width() * scale), int(surface.get_height() * scale))
+            if size is not None:
+                transform = pygame.transform.smoothscale if smooth else pygame.transform.scale
+                surface = transform(surface, size)
+            if flip:
+                surface = pygame.transform.flip(surface, True, False)
+
+        self.misses += 1
+        self.surfaces[key] = surface
+        return surface
+
+    def add_decoded(self, path, image):
+        self.decoded[os.path.normpath(path)] = image
+
+    def set_atlas(self, atlas):
+        """使用已经加载好的图集；atlas 为 None 表示不可用，改用零散文件"""
+        self.atlas = atlas
+        self.use_atlas = atlas is not None
+
+    def atlas_frame(self, path):
+        if not self.use_atlas:
+            return None
+        if self.atlas is None:
+            # 第一次需要时加载（必要时重新打包）；失败后不再尝试
+            self.atlas = load_atlas()
+            if self.atlas is None:
+                self.use_atlas = False
+                return None
+        return self.atlas.frame(path)
+
+    def folder(self, path, **options):
+        """文件夹下所有 png，按文件名排序"""
+        return [
+            self.image(os.path.join(path, name), **options)
+            for name in sorted(os.listdir(path)) if name.endswith(".png")
+        ]
+
+    def resident_bytes(self):
+        # subsurface 和图集共用像素，只统计图集本身
+        sheets = [sheet for sheet in self.atlas.sheets if sheet is not None] if self.atlas else []
+        surfaces = [surface for surface in self.surfaces.values() if surface.get_parent() is None]
+        return sum(
+            surface.get_width() * surface.get_height() * surface.get_bytesize()
+            for surface in surfaces + sheets
+        )
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "surfaces": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "resident_bytes": self.resident_bytes(),
+        }
+
+    def clear(self):
+        self.surfaces.clear()
+        self.decoded.clear()
+        self.atlas = None
+        self.hits = 0
+        self.misses = 0
+
+
+def converted(image, alpha=True):
+    """转换成屏幕的像素格式以加快 blit；没有视频模式（无窗口模拟）时原样返回"""
+    if pygame.display.get_surface() is None:
+        return image
+    return image.convert_alpha() if alpha else image.convert()
+
+
+# 进程内共享的缓存
+cache = AssetCache()
+
+
+def load_image(path, **options):
+    return cache.image(path, **options)
+
+
+def load_folder(path, **options):
+    return cache.folder(path, **options)
@@ -0,0 +1,186 @@
+# atlas.py
+"""精灵动画图集。
+
+金币、宝藏、敌人和角色的动画帧原本是几百个零散的 PNG。打包后每组只有一张图集
+（放不下时分成多张）加一个帧索引，运行时只打开这几张图，帧以 subsurface 的形式取出。
+
+图集放在 assets/.atlas/ 下，第一次运行或源文件变化后自动重新打包；也可以提前打包：
+    python atlas.py
+
+index.json：
+    {"version": 1, "key": 源文件指纹, "sheets": [文件名, ...],
+     "frames": {"assets/coins/gold/1.png": [图集下标, x, y, w, h], ...}}
+"""
+import hashlib
+import json
+import os
+import pygame
+
+FORMAT_VERSION = 1
+ATLAS_DIR = os.path.join("assets", ".atlas")
+INDEX_NAME = "index.json"
+
+# 每组打成一张或几张图集
+ATLAS_GROUPS = {
+    "coins": "assets/coins",
+    "treasure": "assets/treasure",
+    "enemies": "assets/enemies",
+    "characters": "assets/characters",
+}
+
+SHEET_SIZE = 1024
+PADDING = 1
+
+
+def frame_key(path):
+    """帧在索引中的键：统一分隔符的相对路径"""
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def source_frames(groups=ATLAS_GROUPS):
+    """{组名: [png 路径, ...]}，按路径排序"""
+    frames = {}
+    for name, folder in groups.items():
+        paths = []
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            paths.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".png"))
+        frames[name] = paths
+    return frames
+
+
+def sources_key(frames):
+    """源文件指纹：只用路径、大小和修改时间，不需要打开文件"""
+    digest = hashlib.sha1(str(FORMAT_VERSION).encode())
+    for name in sorted(frames):
+        for path in frames[name]:
+            stat = os.stat(path)
+            digest.update(f"{name}:{frame_key(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def shelf_pack(sizes, sheet_size=SHEET_SIZE, padding=PADDING):
+    """货架式装箱：按高度从大到小排成一行行“货架”，一张放满就开下一张。
+
+    返回与 sizes 对应的 [(图集序号, x, y), ...] 和每张图集实际用到的尺寸。
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+    placements = [None] * len(sizes)
+    sheets = []
+    x = y = shelf_height = 0
+    for i in order:
+        width, height = sizes[i]
+        if width + padding > sheet_size or height + padding > sheet_size:
+            raise ValueError(f"Frame {width}x{height} does not fit in a {sheet_size} atlas")
+        if not sheets:
+            sheets.append([0, 0])
+        if x + width + padding > sheet_size:
+            # 当前货架放满，换到下一层
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        if y + height + padding > sheet_size:
+            sheets.append([0, 0])
+            x = y = shelf_height = 0
+        placements[i] = (len(sheets) - 1, x, y)
+        x += width + padding
+        shelf_height = max(shelf_height, height + padding)
+        used = sheets[-1]
+        used[0] = max(used[0], x)
+        used[1] = max(used[1], y + shelf_height)
+    return placements, [tuple(size) for size in sheets]
+
+
+def build_atlas(atlas_dir=ATLAS_DIR, groups=ATLAS_GROUPS):
+    """打包所有组，写出图集 PNG 和 index.json，返回索引"""
+    frames = source_frames(groups)
+    os.makedirs(atlas_dir, exist_ok=True)
+    index = {"version": FORMAT_VERSION, "key": sources_key(frames), "sheets": [], "frames": {}}
+
+    for name, paths in frames.items():
+        if not paths:
+            continue
+        # 打包时不需要窗口，不做 convert
+        images = [pygame.image.load(path) for path in paths]
+        placements, sheet_sizes = shelf_pack([image.get_size() for image in images])
+
+        sheets = [pygame.Surface(size, pygame.SRCALPHA) for size in sheet_sizes]
+        first_sheet = len(index["sheets"])
+        for path, image, (sheet, x, y) in zip(paths, images, placements):
+            sheets[sheet].blit(image, (x, y))
+            index["frames"][frame_key(path)] = [first_sheet + sheet, x, y, *image.get_size()]
+
+        for number, sheet in enumerate(sheets):
+            filename = f"{name}-{number}.png"
+            pygame.image.save(sheet, os.path.join(atlas_dir, filename))
+            index["sheets"].append(filename)
+
+    with open(os.path.join(atlas_dir, INDEX_NAME), "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+
+def read_index(atlas_dir=ATLAS_DIR):
+    try:
+        with open(os.path.join(atlas_dir, INDEX_NAME)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != FORMAT_VERSION:
+        return None
+    return index
+
+
+class Atlas:
+    """运行时的图集：图集图片第一次用到时才加载，帧以 subsurface 返回。"""
+
+    def __init__(self, index, atlas_dir=ATLAS_DIR):
+        self.atlas_dir = atlas_dir
+        self.sheet_names = index["sheets"]
+        self.frames = index["frames"]
+        self.sheets = [None] * len(self.sheet_names)
+
+    def __contains__(self, path):
+        return frame_key(path) in self.frames
+
+    def sheet_path(self, number):
+        return os.path.join(self.atlas_dir, self.sheet_names[number])
+
+    def set_sheet(self, number, image):
+        """使用在其他线程解码好的图集图片（在主线程调用）"""
+        if self.sheets[number] is None:
+            self.sheets[number] = self.converted(image)
+
+    @staticmethod
+    def converted(image):
+        # 没有视频模式时（无窗口模拟）不能 convert，原样使用
+        return image if pygame.display.get_surface() is None else image.convert_alpha()
+
+    def sheet(self, number):
+        if self.sheets[number] is None:
+            self.sheets[number] = self.converted(pygame.image.load(self.sheet_path(number)))
+        return self.sheets[number]
+
+    def frame(self, path):
+        """path 对应的帧，不在图集里时返回 None"""
+        entry = self.frames.get(frame_key(path))
+        if entry is None:
+            return None
+        sheet, x, y, width, height = entry
+        return self.sheet(sheet).subsurface((x, y, width, height))
+
+
+def load_atlas(atlas_dir=ATLAS_DIR, groups=ATLAS_GROUPS):
+    """加载图集；源文件变化或还没打包时先重新打包。失败时返回 None，调用者改用零散文件"""
+    try:
+        index = read_index(atlas_dir)
+        if index is None or index.get("key") != sources_key(source_frames(groups)):
+            index = build_atlas(atlas_dir, groups)
+        return Atlas(index, atlas_dir)
+    except (OSError, ValueError, pygame.error) as e:
+        print(f"[⚠️] Sprite atlas unavailable, loading loose frames: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    index = build_atlas()
+    print(f"Packed {len(index['frames'])} frames into {len(index['sheets'])} sheets in {ATLAS_DIR}")
@@ -1,46 +1,82 @@
 # baclkground.py
 import pygame
 import math
+from assets import load_image
+from config import BACKGROUND_MEMORY_CAP_MB
+
+# 从远到近的背景层。factor 为视差因子（0 表示静止），tile_height 为一块贴图相对屏幕高度的比例；
+# fill_screen 的层直接拉伸到屏幕大小，其余的层横向纵向重复铺满
+BACKGROUND_LAYERS = [
+    {"path": "assets/backgrounds/background.png", "factor": 0.0, "fill_screen": True},
+    {"path": "assets/backgrounds/midground.png", "factor": 0.2, "tile_height": 1.0,
+     "float_amplitude": 10, "float_speed": 0.005},
+]
+
+
+class ParallaxLayer:
+    """一层重复铺开的背景：只缓存一块缩放好的贴图，每帧只画屏幕上看得见的几块。"""
+
+    def __init__(self, screen_width, screen_height, path, factor=0.0, tile_height=1.0,
+                 fill_screen=False, float_amplitude=0, float_speed=0.0, max_bytes=None):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.factor = factor
+        self.float_amplitude = float_amplitude
+        self.float_speed = float_speed
+        self.fill_screen = fill_screen
+
+        if fill_screen:
+            self.tile = load_image(path, size=(screen_width, screen_height), alpha=False)
+            return
+
+        # 保持宽高比缩放；超过内存上限时缩小贴图（重复得更密），而不是随地图变大
+        width, height = load_image(path).get_size()
+        scale = screen_height * tile_height / height
+        if max_bytes and width * height * 4 * scale * scale > max_bytes:
+            scale = math.sqrt(max_bytes / (width * height * 4))
+        self.tile = load_image(path, size=(max(1, round(width * scale)), max(1, round(height * scale))))
+
+    @property
+    def bytes(self):
+        return self.tile.get_width() * self.tile.get_height() * self.tile.get_bytesize()
+
+    def draw(self, screen, camera_offset, time_ms):
+        if self.fill_screen:
+            screen.blit(self.tile, (0, 0))
+            return
+
+        tile_width, tile_height = self.tile.get_size()
+        offset_y = math.sin(time_ms * self.float_speed) * self.float_amplitude
+        # 第一块贴图的左上角，落在 (-tile, 0] 之间
+        start_x = -((camera_offset[0] * self.factor) % tile_width)
+        start_y = -((camera_offset[1] * self.factor - offset_y) % tile_height)
+
+        screen.blits(
+            [
+                (self.tile, (x, y))
+                for y in range(round(start_y), self.screen_height, tile_height)
+                for x in range(round(start_x), self.screen_width, tile_width)
+            ],
+            doreturn=False,
+        )
+
 
 class Background:
-    def __init__(self, screen_width, screen_height, world_width, world_height):
-        # 加载背景图像
-        self.bg_tile = pygame.image.load("assets/backgrounds/background.png").convert()
-        self.mid_tile = pygame.image.load("assets/backgrounds/midground.png").convert_alpha()
-
-        # 远景背景固定为屏幕大小（静止）
-        self.bg_tile = pygame.transform.scale(self.bg_tile, (screen_width, screen_height))
-
-        # 计算中景背景所需尺寸：视差因子决定所需覆盖范围
-        self.parallax_factor = 0.2
-        self.float_amplitude = 10
-        self.float_speed = 0.005
-
-        # 计算中景背景应该覆盖的最小宽高（视差区域 + 浮动余量）
-        mid_width = int(screen_width + (world_width - screen_width) * self.parallax_factor)
-        mid_height = int(screen_height + (world_height - screen_height) * self.parallax_factor + self.float_amplitude * 2)
-
-        self.mid_tile = pygame.transform.scale(self.mid_tile, (mid_width, mid_height))
-        self.mid_size = pygame.Vector2(mid_width, mid_height)
-
-        # ✅ 用于主菜单滚动
-        self.midground_x = 0
-        self.midground_width = mid_width
-        
+    def __init__(self, screen_width, screen_height, world_width, world_height, layers=BACKGROUND_LAYERS):
+        # 每层只保存一块贴图，内存只和屏幕大小有关，与地图大小无关
+        max_bytes = BACKGROUND_MEMORY_CAP_MB * 1024 * 1024 // max(1, len(layers))
+        self.layers = [ParallaxLayer(screen_width, screen_height, max_bytes=max_bytes, **layer) for layer in layers]
+
+    @property
+    def bytes(self):
+        return sum(layer.bytes for layer in self.layers)
+
     def update(self, player_x, player_y):
         # 此处保留接口以供扩展（如切换背景图层等）
         pass
 
-    def draw(self, screen, camera_offset):
-        # 背景浮动偏移
-        current_time = pygame.time.get_ticks()
-        offset_y = math.sin(current_time * self.float_speed) * self.float_amplitude
-
-        # 远景背景固定在原点
-        screen.blit(self.bg_tile, (0, 0))
-
-        # 中景背景：添加视差 + 浮动
-        mid_x = -camera_offset.x * self.parallax_factor
-        mid_y = -camera_offset.y * self.parallax_factor + offset_y
-
-        screen.blit(self.mid_tile, (mid_x, mid_y))
+    def draw(self, screen, camera_offset, time_ms=None):
+        """time_ms 驱动中景的上下浮动，默认取真实时间"""
+        current_time = pygame.time.get_ticks() if time_ms is None else time_ms
+        for layer in self.layers:
+            layer.draw(screen, camera_offset, current_time)
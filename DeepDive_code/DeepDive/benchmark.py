@@ -0,0 +1,332 @@
+# benchmark.py
+"""脚本化场景的性能基准：在 dummy 驱动下按固定 seed 和固定的机器人输入跑每个场景，
+统计各子系统每帧的耗时（mean / p50 / p99 / max，毫秒），结果写成 JSON。
+
+同一个 seed 下每次运行的世界和输入完全相同，不同提交的结果可以直接比较：
+
+    python benchmark.py --json before.json
+    python benchmark.py --json after.json --compare before.json   # 任一场景的整帧变慢超过阈值时返回 1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import defaultdict
+
+import numpy as np
+
+SUBSYSTEMS = (
+    "TileMap.draw",
+    "TileMap.check_collision",
+    "EnemySystem.update_all",
+    "CoinField.update",
+    "ParticleSystem.update",
+    "draw_darkness_overlay",
+    "UI",
+    "frame",
+)
+
+BIG_MAP_TILES = 1000
+BUBBLE_TARGET = 20000
+COIN_TARGET = 5000
+ENEMY_TARGET = 500
+ENEMY_MAP_TILES = 80  # 自带地图（34 x 60）按敌人间距只放得下四百多个，敌人场景用平铺放大的地图
+
+
+class Timers:
+    """把对象上的方法换成计时的包装，耗时按子系统累加到当前帧"""
+
+    def __init__(self):
+        self.frame = defaultdict(float)
+        self.samples = {"frame": []}
+        self.wrapped = []
+
+    def wrap(self, obj, attr, name):
+        method = getattr(obj, attr)
+        frame = self.frame
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                frame[name] += perf_counter() - start
+
+        setattr(obj, attr, timed)
+        self.wrapped.append((obj, attr))
+        self.samples.setdefault(name, [])
+
+    def unwrap_all(self):
+        for obj, attr in self.wrapped:
+            delattr(obj, attr)
+        self.wrapped.clear()
+
+    def end_frame(self, record=True):
+        """结束一帧；record 为 False 时（预热）丢弃这一帧"""
+        if record:
+            for name, times in self.samples.items():
+                times.append(self.frame.get(name, 0.0))
+        self.frame.clear()
+
+    def stats(self):
+        result = {}
+        for name in sorted(self.samples, key=SUBSYSTEMS.index):
+            ms = np.array(self.samples[name]) * 1000
+            result[name] = {
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+            }
+        return result
+
+
+def big_map_path(tiles=BIG_MAP_TILES):
+    """把自带地图平铺成 tiles x tiles 的 CSV，放在地图缓存目录里（只生成一次）"""
+    from mapfile import CACHE_DIR, read_csv
+    path = os.path.join(CACHE_DIR, f"bench_{tiles}x{tiles}.csv")
+    if not os.path.isfile(path):
+        source = read_csv("assets/tiles/map.csv")
+        reps = (-(-tiles // source.shape[0]), -(-tiles // source.shape[1]))
+        big = np.tile(source, reps)[:tiles, :tiles]
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savetxt(path, big, fmt="%d", delimiter=",")
+    return path
+
+
+def new_run(game, seed, purchased=(), tile_map=None):
+    """按 seed 给 game 换一局新的 Simulation，只有 purchased 里的技能是已购状态"""
+    from simulation import Simulation
+    for skill in game.skills:
+        skill.purchased = skill.name in purchased
+    game.attach_simulation(Simulation(game.skills, tile_map or game.tile_map, seed=seed))
+    game.sim.start()
+    game.state = "running"
+    return game.sim
+
+
+def setup_current(game, seed):
+    new_run(game, seed)
+
+
+def setup_coins(game, seed):
+    sim = new_run(game, seed, purchased=("coin magnet",))
+    from coin import COIN_TYPES
+    rng = sim.stream("benchmark")
+    extra = COIN_TARGET - len(sim.coins)
+    for x, y in sim.tile_map.spawn_index.sample((32, 32), count=extra, rng=rng):
+        sim.coins.add(rng.choice(COIN_TYPES), x, y)
+
+
+def setup_enemies(game, seed):
+    import pygame
+    from enemy import EnemySystem
+    from map import TileMap
+    tile_map = TileMap(big_map_path(ENEMY_MAP_TILES), "assets/tiles/tileset.png", 64)
+    sim = new_run(game, seed, tile_map=tile_map)
+    start = pygame.Vector2(sim.player.world_rect.center)
+    sim.enemy_system = EnemySystem(sim.tile_map, start, sim.player, count=ENEMY_TARGET, rng=sim.stream("enemies"))
+    game.enemy_system = sim.enemy_system
+    if len(sim.enemy_system) < ENEMY_TARGET:
+        raise RuntimeError(f"enemies_500: only {len(sim.enemy_system)} of {ENEMY_TARGET} enemies spawned")
+
+
+def setup_bubbles(game, seed):
+    new_run(game, seed)
+
+
+def top_up_bubbles(game):
+    """每帧在画面里补足气泡，保持 BUBBLE_TARGET 个存活粒子"""
+    import pygame
+    missing = BUBBLE_TARGET - len(game.particles)
+    if missing > 0:
+        view = pygame.Rect(game.camera_offset, (game.screen_width, game.screen_height))
+        game.particles.emit_area("bubble", view, missing)
+
+
+def setup_big_map(game, seed):
+    from map import TileMap
+    tile_map = TileMap(big_map_path(), "assets/tiles/tileset.png", 64)
+    new_run(game, seed, tile_map=tile_map)
+
+
+# 场景名 -> (准备函数, 每帧调用的钩子)；menu 和 shop 单独处理
+GAME_SCENARIOS = {
+    "current": (setup_current, None),
+    "coins_5000": (setup_coins, None),
+    "enemies_500": (setup_enemies, None),
+    "bubbles_20000": (setup_bubbles, top_up_bubbles),
+    "map_1000x1000": (setup_big_map, None),
+}
+SCENARIOS = tuple(GAME_SCENARIOS) + ("menu", "shop")
+
+
+def run_game_scenario(game, name, seed, frames, warmup):
+    """机器人随机游走，每帧推进 60 帧/秒对应的模拟步数再绘制；玩家不会死亡，保证每帧负载相同"""
+    from simulation import random_inputs
+    # 场景会改写全局技能的已购状态，结束后还原
+    purchased = [skill.purchased for skill in game.skills]
+    tile_map = game.tile_map
+    timers = Timers()
+    try:
+        setup, hook = GAME_SCENARIOS[name]
+        setup(game, seed)
+        sim = game.sim
+        timers.wrap(sim.tile_map, "draw", "TileMap.draw")
+        timers.wrap(sim.tile_map, "check_collision", "TileMap.check_collision")
+        timers.wrap(sim.enemy_system, "update_all", "EnemySystem.update_all")
+        timers.wrap(sim.coins, "update", "CoinField.update")
+        timers.wrap(game.particles, "update", "ParticleSystem.update")
+        timers.wrap(game, "draw_darkness_overlay", "draw_darkness_overlay")
+        timers.wrap(game.ui_manager, "draw", "UI")
+        timers.wrap(game.ui_manager, "draw_skill_hud", "UI")
+
+        bot = random_inputs(sim.stream("bot"))
+        steps_per_frame = max(1, round(1 / (60 * game.sim_dt)))
+        perf_counter = time.perf_counter
+        for index in range(warmup + frames):
+            player = sim.player
+            player.health = player.health_max
+            player.oxygen = player.oxygen_max
+            if sim.state != "running":
+                sim.start()
+                game.state = "running"
+            if hook:
+                hook(game)
+            start = perf_counter()
+            for _ in range(steps_per_frame):
+                game.update_game_logic(game.sim_dt, next(bot))
+            game.draw(1.0)
+            timers.frame["frame"] = perf_counter() - start
+            timers.end_frame(record=index >= warmup)
+    finally:
+        timers.unwrap_all()
+        if game.tile_map is not tile_map:
+            new_run(game, seed, tile_map=tile_map)  # 换回原来的地图，换下来的地图在这里关闭
+        for skill, was_purchased in zip(game.skills, purchased):
+            skill.purchased = was_purchased
+    return timers.stats()
+
+
+def run_menu_scenario(game, name, frames, warmup):
+    """主菜单或商店：每帧都整屏重画并提交（中景滚动一个像素时菜单要付的开销），
+    平时没有变化的帧在游戏里不重画，按它计时没有意义"""
+    ui = game.ui_manager
+    ui.show_shop_menu = name == "shop"
+    timers = Timers()
+    timers.wrap(ui, "draw_main_menu", "UI")
+    timers.wrap(game.shop_manager, "draw_shop_menu", "UI")
+    perf_counter = time.perf_counter
+    try:
+        for index in range(warmup + frames):
+            start = perf_counter()
+            ui.advance_scroll(1 / 60)
+            ui.redraw_all = True
+            if ui.show_shop_menu:
+                dirty = game.shop_manager.draw_shop_menu(game.screen)
+            else:
+                dirty = ui.draw_main_menu(game.screen)
+            if dirty:
+                game.display.update(dirty)
+            timers.frame["frame"] = perf_counter() - start
+            timers.end_frame(record=index >= warmup)
+    finally:
+        timers.unwrap_all()
+        ui.show_shop_menu = False
+    return timers.stats()
+
+
+def environment():
+    """写进结果里的运行环境，比较时用来确认两份结果可比"""
+    import pygame
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """打印每个场景、子系统和基线的 mean 比值；返回整帧变慢超过 threshold 的场景"""
+    regressed = []
+    for scenario, subsystems in results.items():
+        old_subsystems = baseline.get(scenario)
+        if not old_subsystems:
+            print(f"{scenario}: no baseline")
+            continue
+        for name, stats in subsystems.items():
+            old = old_subsystems.get(name)
+            if not old or old["mean_ms"] <= 0:
+                continue
+            ratio = stats["mean_ms"] / old["mean_ms"]
+            print(f"{scenario:14s} {name:24s} {old['mean_ms']:8.3f} -> {stats['mean_ms']:8.3f} ms  x{ratio:.2f}")
+            if name == "frame" and ratio > 1 + threshold:
+                regressed.append(scenario)
+    return regressed
+
+
+def main():
+    from headless import make_game
+
+    parser = argparse.ArgumentParser(description="Time each subsystem across scripted scenarios.")
+    parser.add_argument("--size", default="1280x720", help="offscreen resolution, WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=60, help="frames run before measuring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated: " + ", ".join(SCENARIOS))
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed full-frame slowdown when comparing")
+    args = parser.parse_args()
+
+    size = tuple(int(value) for value in args.size.lower().split("x"))
+    names = args.scenarios.split(",")
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    game = make_game(size, args.seed)
+
+    results = {}
+    for name in names:
+        if name in GAME_SCENARIOS:
+            results[name] = run_game_scenario(game, name, args.seed, args.frames, args.warmup)
+        else:
+            results[name] = run_menu_scenario(game, name, args.frames, args.warmup)
+        frame = results[name]["frame"]
+        print(f"{name:14s} frame mean {frame['mean_ms']:.2f}  p50 {frame['p50_ms']:.2f}  "
+              f"p99 {frame['p99_ms']:.2f}  max {frame['max_ms']:.2f} ms")
+
+    report = {
+        "environment": environment(),
+        "settings": {"size": list(size), "frames": args.frames, "warmup": args.warmup, "seed": args.seed},
+        "scenarios": results,
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("settings") != report["settings"]:
+            print(f"[⚠️] Baseline settings differ: {baseline.get('settings')}")
+        regressed = compare(results, baseline["scenarios"], args.threshold)
+        if regressed:
+            print(f"[⚠️] Frame time regressed by more than {args.threshold:.0%}: {', '.join(regressed)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
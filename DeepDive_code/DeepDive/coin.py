@@ -1,55 +1,149 @@
 # coin.py
 import pygame
 import os
+from collections import namedtuple
+import numpy as np
+from spatial import SpatialHash
+from assets import load_folder
 
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, folder_path, coin_type, x, y):
-        super().__init__()
-        self.coin_type = coin_type
-        self.images = self.load_images(os.path.join(folder_path, coin_type))
-        self.frame_index = 0
-        self.image = self.images[self.frame_index]
-        self.rect = self.image.get_rect(center=(x, y))
+COIN_TYPES = ("gold", "silver")
+COIN_VALUES = {"gold": 5, "silver": 1}
 
-        self.animation_timer = 0
-        self.animation_speed = 0.15
-        self.value = 5 if coin_type == "gold" else 1
+# 收集金币时交给 Game / Player.collect_coin 的记录
+CollectedCoin = namedtuple("CollectedCoin", ["coin_type", "value"])
 
-        self.magnet_active = False
-        self.magnet_target = None
-        self.magnet_speed = 8  # 每帧吸附速度
 
+class CoinField:
+    """所有金币放在 numpy 数组里（结构数组）：位置、类型、面值、动画相位、吸附状态。
+
+    动画帧由时间和相位直接算出，不需要逐个更新；吸附只处理磁铁范围内的金币；
+    绘制时只取摄像机范围内的金币，一次 blits 提交。
+    金币的下标在整个生命周期内不变，被收集后只是标记为不存在。
+    """
+
+    def __init__(self, folder_path, cell_size, capacity=128):
+        self.frames = [load_folder(os.path.join(folder_path, coin_type)) for coin_type in COIN_TYPES]
+        self.frame_counts = np.array([len(frames) for frames in self.frames])
+        self.sizes = np.array([frames[0].get_size() for frames in self.frames])
+        self.values = np.array([COIN_VALUES[coin_type] for coin_type in COIN_TYPES])
+
+        self.animation_speed = 9  # 每秒帧数
+        self.magnet_speed = 480   # 每秒吸附速度（像素）
+        self.time = 0.0
+
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2))  # 上一个模拟步的位置，用于渲染插值
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.phase = np.zeros(capacity)
+        self.magnet = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.grid = SpatialHash(cell_size)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    def grow(self):
+        capacity = len(self.pos) * 2
+        for name in ("pos", "prev_pos", "types", "phase", "magnet", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, coin_type, x, y):
+        """添加一枚金币，(x, y) 为中心点，返回它的下标"""
+        if self.count == len(self.pos):
+            self.grow()
+        index = self.count
+        self.count += 1
+        self.pos[index] = self.prev_pos[index] = (x, y)
+        self.types[index] = COIN_TYPES.index(coin_type)
+        # 相位错开，金币不会同步闪烁
+        self.phase[index] = index * 0.37
+        self.alive[index] = True
+        self.grid.insert(index, self.rect_of(index))
+        return index
+
+    def rect_of(self, index):
+        width, height = self.sizes[self.types[index]]
+        x, y = self.pos[index]
+        return pygame.Rect(round(x) - width // 2, round(y) - height // 2, width, height)
+
+    def remove(self, indices):
+        """标记金币为已收集，返回对应的 CollectedCoin 列表"""
+        collected = []
+        for index in indices:
+            index = int(index)
+            self.alive[index] = False
+            self.magnet[index] = False
+            self.grid.remove(index)
+            coin_type = int(self.types[index])
+            collected.append(CollectedCoin(COIN_TYPES[coin_type], int(self.values[coin_type])))
+        return collected
+
+    def update(self, dt, player=None):
+        """推进动画时间；player 有磁铁技能时吸附其范围内的金币。返回被吸走的金币"""
+        self.time += dt
+        self.prev_pos[:self.count] = self.pos[:self.count]
+        if player is None or not player.has_skill("coin magnet"):
+            return []
+
+        target = np.array(player.rect.center, dtype=float)
+        radius = player.coin_magnet_radius
+        nearby = self.grid.query_radius(player.rect.center, radius)
+        if nearby:
+            self.magnet[nearby] = True
+
+        active = np.flatnonzero(self.magnet[:self.count] & self.alive[:self.count])
+        if len(active) == 0:
+            return []
+
+        delta = target - self.pos[active]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        # 只有在玩家靠近范围内才吸附，非常接近玩家时金币被收集
+        pulled = distance <= radius
+        collected = pulled & (distance < 5)
+        moving = pulled & ~collected
+
+        moving_index = active[moving]
+        step = np.minimum(self.magnet_speed * dt, distance[moving])
+        self.pos[moving_index] += delta[moving] * (step / distance[moving])[:, None]
+        for index in moving_index.tolist():
+            self.grid.update(index, self.rect_of(index))
+
+        return self.remove(active[collected])
+
+    def collect(self, rect):
+        """收集与 rect 相交的金币，返回 CollectedCoin 列表"""
+        candidates = np.array(self.grid.query_rect(rect), dtype=np.intp)
+        if len(candidates) == 0:
+            return []
+        size = self.sizes[self.types[candidates]]
+        left = np.round(self.pos[candidates, 0]) - size[:, 0] // 2
+        top = np.round(self.pos[candidates, 1]) - size[:, 1] // 2
+        hit = ((left < rect.right) & (left + size[:, 0] > rect.left)
+               & (top < rect.bottom) & (top + size[:, 1] > rect.top))
+        return self.remove(candidates[hit])
+
+    def centers_in(self, rect):
+        """rect 附近（同一批格子里）的金币中心点，N x 2 数组"""
+        nearby = np.array(self.grid.query_rect(rect), dtype=np.intp)
+        return self.pos[nearby]
+
+    def render_items(self, view, alpha=1.0):
+        """view（世界坐标矩形）所在格子里的金币的 (贴图, 屏幕坐标) 列表"""
+        visible = np.array(self.grid.query_rect(view), dtype=np.intp)
+        if len(visible) == 0:
+            return []
+
+        types = self.types[visible]
+        frame = (self.time * self.animation_speed + self.phase[visible]).astype(int) % self.frame_counts[types]
+        pos = self.prev_pos[visible] + (self.pos[visible] - self.prev_pos[visible]) * alpha
+        topleft = np.round(pos - self.sizes[types] // 2 - np.array(view.topleft, dtype=float)).astype(int)
 
-    def load_images(self, path):
         return [
-            pygame.image.load(os.path.join(path, img)).convert_alpha()
-            for img in sorted(os.listdir(path)) if img.endswith(".png")
+            (self.frames[coin_type][frame_index], (x, y))
+            for coin_type, frame_index, (x, y) in zip(types.tolist(), frame.tolist(), topleft.tolist())
         ]
-
-    def update(self):
-        self.animation_timer += self.animation_speed
-        if self.animation_timer >= 1:
-            self.frame_index = (self.frame_index + 1) % len(self.images)
-            self.image = self.images[self.frame_index]
-            self.animation_timer = 0
-
-        # 吸附逻辑
-        if self.magnet_active and self.magnet_target:
-            dx = self.magnet_target.rect.centerx - self.rect.centerx
-            dy = self.magnet_target.rect.centery - self.rect.centery
-            distance = (dx**2 + dy**2) ** 0.5
-
-            # 只有在玩家靠近范围内才吸附
-            if distance <= self.magnet_target.coin_magnet_radius:
-                if distance < 5:  # 非常接近玩家时，金币被收集
-                    self.kill()  # 移除金币精灵
-                    self.magnet_target.collect_coin(self)
-                else:
-                    move_x = self.magnet_speed * dx / distance
-                    move_y = self.magnet_speed * dy / distance
-                    self.rect.x += int(move_x)
-                    self.rect.y += int(move_y)
-
-    def activate_magnet(self, player):
-        self.magnet_active = True
-        self.magnet_target = player
\ No newline at end of file
@@ -1,2 +1,38 @@
 # config.py
-FPS = 60
+FPS = 60  # 渲染帧率上限，0 表示不限制
+
+# 固定步长模拟：游戏逻辑每秒固定运行 SIMULATION_HZ 步，与渲染帧率无关
+SIMULATION_HZ = 120
+MAX_FRAME_TIME = 0.25  # 单帧最多追赶的模拟时间（秒），防止卡顿后无限追赶
+
+# 流式世界：地图按区块存放在磁盘上，摄像机附近的区块在后台加载
+STREAMING_WORLD = False
+STREAM_MEMORY_CAP_MB = 256
+
+# 主菜单和商店的中景滚动速度（像素/秒）；0 表示静止，此时没有输入菜单不会重画。
+# 中景每移动一个像素才整屏重画一次，6 像素/秒时菜单每秒只重画 6 次
+MENU_SCROLL_SPEED = 6
+
+# 内部渲染分辨率：None 表示直接按显示器分辨率绘制；例如 (1280, 720) 时先画到这个分辨率，
+# 再按 RENDER_SCALING 放大到全屏："integer" 整数倍最近邻放大，"smooth" 平滑放大铺满
+RENDER_RESOLUTION = None
+RENDER_SCALING = "integer"
+
+# 视差背景所有层贴图的内存上限（MB），与地图大小无关
+BACKGROUND_MEMORY_CAP_MB = 64
+
+# 粒子池容量（气泡、宝箱碎光、火花、浮游生物共用），池满时覆盖最早的粒子
+PARTICLE_CAPACITY = 32768
+# 每帧最多绘制的粒子数：屏幕上的粒子超过这个数时只画最新发射的，最早的（也是最淡的）先不画
+PARTICLE_DRAW_BUDGET = 2048
+PLANKTON_PER_SECOND = 60  # 摄像机附近每秒撒下的浮游生物数量
+
+# 每局结束时把 seed 和逐步输入录进 RECORDINGS_DIR，可用 replay.py 原样重放（用来复现卡顿）
+RECORD_RUNS = False
+RECORDINGS_DIR = "recordings"
+
+# 帧内计时（profiler.py）：F3 显示/隐藏性能叠加层，F4 把最近 PROFILER_TRACE_SECONDS 秒导出成 trace JSON。
+# PROFILER_ENABLED 为 True 时启动就开始记录（不显示叠加层），出现卡顿后可以直接按 F4 导出
+PROFILER_ENABLED = False
+PROFILER_TRACE_SECONDS = 10
+TRACES_DIR = "traces"
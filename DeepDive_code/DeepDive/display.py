@@ -0,0 +1,109 @@
+# display.py
+import pygame
+
+# 当前使用的 Display，mouse_pos() 用它把窗口坐标换算成逻辑坐标
+active = None
+
+
+class Display:
+    """窗口和内部渲染面。
+
+    logical_size 为 None 时直接画在窗口上；否则游戏、HUD 和菜单都画在这个分辨率的内部面上，
+    present() 时按 scaling 放大到窗口："integer" 为整数倍最近邻放大（像素画不糊），
+    "smooth" 为按比例平滑放大铺满窗口。两种都保持宽高比，多余部分留黑边。
+    窗口比逻辑分辨率小时 "integer" 也改为按比例平滑缩小。
+    """
+
+    def __init__(self, logical_size=None, scaling="integer", flags=pygame.FULLSCREEN, window_size=None):
+        """window_size 为 None 时按显示器分辨率打开窗口；无显示器（SDL dummy 驱动）时用它指定画面大小"""
+        global active
+        if window_size is None:
+            info = pygame.display.Info()
+            window_size = (info.current_w, info.current_h)
+        self.window = pygame.display.set_mode(window_size, flags)
+        self.set_mode(logical_size, scaling)
+        active = self
+
+    def set_mode(self, logical_size=None, scaling="integer"):
+        """切换逻辑分辨率/缩放方式；调用者需要重建和屏幕尺寸有关的缓存"""
+        window_width, window_height = self.window.get_size()
+        self.scaling = scaling
+        if logical_size is None or tuple(logical_size) == (window_width, window_height):
+            self.surface = self.window
+            self.factor = 1
+            self.target = self.window.get_rect()
+            self.scaled = None
+            return
+
+        width, height = logical_size
+        self.surface = pygame.Surface((width, height)).convert()
+        if scaling == "integer" and min(window_width // width, window_height // height) == 0:
+            # 窗口比逻辑分辨率还小，整数倍放不下：按比例平滑缩小，否则画面会被裁掉
+            self.scaling = "smooth"
+        if self.scaling == "integer":
+            self.factor = min(window_width // width, window_height // height)
+        else:
+            self.factor = min(window_width / width, window_height / height)
+        self.target = pygame.Rect(0, 0, round(width * self.factor), round(height * self.factor))
+        self.target.center = (window_width // 2, window_height // 2)
+        self.scaled = pygame.Surface(self.target.size).convert()
+        self.window.fill((0, 0, 0))
+
+    @property
+    def size(self):
+        return self.surface.get_size()
+
+    @property
+    def is_scaled(self):
+        return self.surface is not self.window
+
+    def present(self):
+        """把整个内部面放大到窗口并显示"""
+        if self.is_scaled:
+            if self.scaling == "integer":
+                pygame.transform.scale(self.surface, self.target.size, self.scaled)
+            else:
+                pygame.transform.smoothscale(self.surface, self.target.size, self.scaled)
+            self.window.blit(self.scaled, self.target)
+        pygame.display.flip()
+
+    def update(self, rects):
+        """只显示内部面上变化的矩形"""
+        if not self.is_scaled:
+            pygame.display.update(rects)
+            return
+        if self.scaling != "integer":
+            # 平滑放大在块边界会有接缝，整帧放大
+            self.present()
+            return
+        factor = self.factor
+        window_rects = []
+        for rect in rects:
+            rect = pygame.Rect(rect).clip(self.surface.get_rect())
+            if not rect:
+                continue
+            target = pygame.Rect(self.target.x + rect.x * factor, self.target.y + rect.y * factor,
+                                 rect.w * factor, rect.h * factor)
+            self.window.blit(pygame.transform.scale(self.surface.subsurface(rect), target.size), target)
+            window_rects.append(target)
+        pygame.display.update(window_rects)
+
+    def to_logical(self, pos):
+        """窗口坐标 -> 内部面坐标"""
+        if not self.is_scaled:
+            return pos
+        x = (pos[0] - self.target.x) / self.factor
+        y = (pos[1] - self.target.y) / self.factor
+        return int(x), int(y)
+
+    def map_event(self, event):
+        """鼠标事件的坐标换算成内部面坐标"""
+        if self.is_scaled and hasattr(event, "pos"):
+            event.pos = self.to_logical(event.pos)
+        return event
+
+
+def mouse_pos():
+    """内部面坐标下的鼠标位置"""
+    pos = pygame.mouse.get_pos()
+    return active.to_logical(pos) if active else pos
@@ -1,47 +1,73 @@
 import pygame
 import os
 import random
+import numpy as np
+from assets import load_image
 
 ENEMY_COUNT = 6
 ENEMY_PATH = "assets/enemies"
 SCALE_FACTOR = 2.4
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, enemy_id, tile_map):
-        super().__init__()
-        self.enemy_id = enemy_id
-        self.tile_map = tile_map
+WALK, ATTACK = 0, 1
+ACTIONS = ("walk", "attack")
 
-        self.walk_frames = self.load_frames("walk")
-        self.attack_frames = self.load_frames("attack")
-        self.current_frames = self.walk_frames
-        self.frame_index = 0
-        self.animation_speed = 0.1
-
-        self.image = self.current_frames[self.frame_index]
-        self.rect = self.image.get_rect()
-        self.direction = pygame.Vector2(random.choice([-1, 1]), 0)
-        self.speed = 100
-
-        map_width = len(tile_map.map_data[0]) * tile_map.tile_size
-        map_height = len(tile_map.map_data) * tile_map.tile_size
-        margin = 5 * tile_map.tile_size
-        self.world_pos = pygame.Vector2(
-            random.randint(margin, map_width - margin),
-            random.randint(margin, map_height - margin)
-        )
 
-    def load_frames(self, action):
-        path = os.path.join(ENEMY_PATH, str(self.enemy_id), action)
+class EnemySystem:
+    """所有敌人的位置、方向、速度和动画状态都放在数组里，每个模拟步一次性批量推进。
+
+    每种敌人的帧（含水平翻转版本）只加载一次；墙体碰撞用 TileMap.check_collisions 批量检测，
+    攻击范围和与玩家的碰撞也都是向量化计算。
+    """
+
+    def __init__(self, tile_map, player_start_pos, player, count=ENEMY_COUNT, rng=random):
+        """rng 决定出生点和初始朝向，传入带种子的 random.Random 可以复现"""
+        self.tile_map = tile_map
+        self.rng = rng
+        self.player = player
+
+        self.animation_speed = 6  # 每秒帧数
+        self.attack_range = 80
+
+        # frames[kind][action][facing] 为帧列表，facing 0 朝右、1 朝左
+        self.frames = [
+            [[self.load_frames(enemy_id, action, flip) for flip in (False, True)] for action in ACTIONS]
+            for enemy_id in self.enemy_ids()
+        ]
+
+        # 每种敌人每个动作的帧数和每帧尺寸，补齐成规则数组以便按下标批量取值
+        max_frames = max(len(frames[0]) for kind in self.frames for frames in kind)
+        self.frame_counts = np.array([[len(frames[0]) for frames in kind] for kind in self.frames])
+        self.frame_sizes = np.zeros((len(self.frames), len(ACTIONS), max_frames, 2), dtype=int)
+        for kind, kind_frames in enumerate(self.frames):
+            for action, (frames, _) in enumerate(kind_frames):
+                for index, frame in enumerate(frames):
+                    self.frame_sizes[kind, action, index] = frame.get_size()
+
+        self.kinds = np.zeros(0, dtype=int)
+        self.pos = np.zeros((0, 2))
+        self.prev_pos = np.zeros((0, 2))  # 上一个模拟步的位置，用于渲染插值
+        self.direction = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.action = np.zeros(0, dtype=int)
+        self.frame = np.zeros(0)
+        self.spawn_all_enemies(tile_map, player_start_pos, count)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def enemy_ids(self):
+        ids = sorted((name for name in os.listdir(ENEMY_PATH) if name.isdigit()), key=int)
+        return ids or ["1"]
+
+    def load_frames(self, enemy_id, action, flip=False):
+        path = os.path.join(ENEMY_PATH, str(enemy_id), action)
         max_frame_count = 10
         frames = []
 
         for i in range(1, max_frame_count + 1):
             frame_path = os.path.join(path, f"{i}.png")
             try:
-                img = pygame.image.load(frame_path).convert_alpha()
-                img = pygame.transform.scale_by(img, SCALE_FACTOR)
-                frames.append(img)
+                frames.append(load_image(frame_path, scale=SCALE_FACTOR, flip=flip))
             except FileNotFoundError:
                 continue
 
@@ -51,81 +77,91 @@ class Enemy(pygame.sprite.Sprite):
 
         return frames
 
-    def update(self, dt):
-        if hasattr(self, "player"):
-            distance = self.world_pos.distance_to(self.player.world_rect.center)
-            new_frames = self.attack_frames if distance < 80 else self.walk_frames
-            if new_frames != self.current_frames:
-                self.current_frames = new_frames
-                self.frame_index = 0
-
-
-        self.frame_index += self.animation_speed
-        if self.frame_index >= len(self.current_frames):
-            self.frame_index = 0
-
-        raw_image = self.current_frames[int(self.frame_index)]
-        if self.direction.x < 0:
-            self.image = pygame.transform.flip(raw_image, True, False)
-        else:
-            self.image = raw_image
-
-        move_vector = self.direction * self.speed * dt
-        new_pos = self.world_pos + move_vector
-        new_rect = self.image.get_rect(center=new_pos)
-
-        if self.tile_map.check_collision(new_rect):
-            self.direction.x *= -1
-        else:
-            self.world_pos = new_pos
-
-        self.rect = self.image.get_rect(center=self.world_pos)
-
-    def draw(self, surface, camera_offset):
-        draw_pos = self.rect.topleft - camera_offset
-        surface.blit(self.image, draw_pos)
-
-    def set_player_reference(self, player):
-        self.player = player
-
-class EnemyManager:
-    def __init__(self, tile_map, player_start_pos, player):
-        self.enemies = pygame.sprite.Group()
-        self.enemy_list = []
-        self.player = player
-        self.spawn_all_enemies(tile_map, player_start_pos)
-
-    def spawn_all_enemies(self, tile_map, player_start_pos):
-        used_y_positions = set()
-        max_tries = 50
+    def spawn_all_enemies(self, tile_map, player_start_pos, count):
         y_distance_threshold = 80
         min_distance_to_player = 150
 
-        for enemy_id in range(1, ENEMY_COUNT + 1):
-            success = False
-            for _ in range(max_tries):
-                new_enemy = Enemy(enemy_id, tile_map)
-                y = int(new_enemy.world_pos.y)
-                dist_to_player = new_enemy.world_pos.distance_to(player_start_pos)
-
-                test_rect = new_enemy.image.get_rect(center=new_enemy.world_pos)
-                if (all(abs(y - oy) > y_distance_threshold for oy in used_y_positions)
-                    and dist_to_player > min_distance_to_player
-                    and not tile_map.check_collision(test_rect)):  # ✅ 检查是否碰撞
-                    new_enemy.set_player_reference(self.player)
-                    used_y_positions.add(y)
-                    self.enemy_list.append(new_enemy)
-                    self.enemies.add(new_enemy)
-                    success = True
-                    break
-
-            if not success:
-                print(f"[⚠️] Enemy {enemy_id} failed to spawn after {max_tries} tries.")
+        # 按最大的行走帧尺寸抽位置，任何种类放进去都不会卡墙
+        footprint = tuple(self.frame_sizes[:, WALK, 0].max(axis=0))
+        positions = tile_map.spawn_index.sample(
+            footprint,
+            count=count,
+            min_separation=y_distance_threshold,
+            avoid=[(player_start_pos, min_distance_to_player)],
+            rng=self.rng,
+        )
+        if len(positions) < count:
+            print(f"[⚠️] Only {len(positions)} of {count} enemies could be spawned: no free space.")
+
+        spawned = len(positions)
+        self.kinds = np.arange(spawned) % len(self.frames)
+        self.pos = np.array(positions, dtype=float).reshape(spawned, 2)
+        self.prev_pos = self.pos.copy()
+        self.direction = np.array([self.rng.choice([-1, 1]) for _ in range(spawned)], dtype=float)
+        self.speed = np.full(spawned, 100.0)
+        self.action = np.full(spawned, WALK)
+        self.frame = np.zeros(spawned)
+        self.rects = self.rects_at(self.pos)
+
+    def rects_at(self, centers):
+        """以 centers 为中心、当前帧尺寸的矩形，N x 4 的 (x, y, w, h) 数组"""
+        sizes = self.frame_sizes[self.kinds, self.action, self.frame.astype(int)]
+        topleft = np.floor(centers - sizes / 2).astype(int)
+        return np.hstack([topleft, sizes])
 
     def update_all(self, dt):
-        for enemy in self.enemies:
-            enemy.update(dt)
+        if len(self) == 0:
+            return
+        self.prev_pos[:] = self.pos
+
+        # 攻击范围检测：靠近玩家时切换到攻击动画，切换时从第一帧开始
+        player_center = np.array(self.player.world_rect.center, dtype=float)
+        distance = np.hypot(*(self.pos - player_center).T)
+        action = np.where(distance < self.attack_range, ATTACK, WALK)
+        changed = action != self.action
+        self.action = action
+        self.frame[changed] = 0
+
+        self.frame += self.animation_speed * dt
+        self.frame[self.frame >= self.frame_counts[self.kinds, self.action]] = 0
+
+        # 批量墙体检测：撞墙的掉头，其余的前进
+        new_pos = self.pos.copy()
+        new_pos[:, 0] += self.direction * self.speed * dt
+        blocked = self.tile_map.check_collisions(self.rects_at(new_pos))
+        self.direction[blocked] *= -1
+        self.pos[~blocked] = new_pos[~blocked]
+
+        self.rects = self.rects_at(self.pos)
+
+    def colliding(self, rect):
+        """与 rect 相交的敌人下标"""
+        x, y, w, h = self.rects.T
+        hit = (x < rect.right) & (x + w > rect.left) & (y < rect.bottom) & (y + h > rect.top)
+        return np.flatnonzero(hit)
+
+    def render_items(self, view, alpha=1.0):
+        """与 view（世界坐标矩形）相交的敌人的 (贴图, 屏幕坐标) 列表"""
+        if len(self) == 0:
+            return []
+        camera = np.array(view.topleft, dtype=float)
+
+        # 插值后的屏幕位置，只绘制与屏幕相交的敌人
+        topleft = self.rects[:, :2] + (self.pos - self.prev_pos) * (alpha - 1) - camera
+        size = self.rects[:, 2:]
+        visible = np.flatnonzero(
+            (topleft[:, 0] < view.w) & (topleft[:, 0] + size[:, 0] > 0)
+            & (topleft[:, 1] < view.h) & (topleft[:, 1] + size[:, 1] > 0)
+        )
 
-    def draw_all(self, surface, camera_offset):
-        for enemy in self.enemies:
-            enemy.draw(surface, camera_offset)
+        frames = self.frames
+        return [
+            (frames[kind][action][facing][frame], (x, y))
+            for kind, action, facing, frame, (x, y) in zip(
+                self.kinds[visible].tolist(),
+                self.action[visible].tolist(),
+                (self.direction[visible] < 0).astype(int).tolist(),
+                self.frame[visible].astype(int).tolist(),
+                topleft[visible].astype(int).tolist(),
+            )
+        ]
@@ -1,36 +1,65 @@
 import pygame
 import os
-import random
 import math
 import json
+import logging
+import time
+import numpy as np
 
-from config import FPS
-from player import Player
+from config import (FPS, SIMULATION_HZ, MAX_FRAME_TIME, STREAMING_WORLD, STREAM_MEMORY_CAP_MB,
+                    RENDER_RESOLUTION, RENDER_SCALING, PARTICLE_CAPACITY, PARTICLE_DRAW_BUDGET, PLANKTON_PER_SECOND,
+                    RECORD_RUNS, RECORDINGS_DIR, PROFILER_ENABLED, TRACES_DIR)
 from background import Background
-from coin import Coin
 from ui import UIManager
 from map import TileMap
-from bubble import Bubble
-from level import Level
+from world import StreamingTileMap
+from particles import ParticleSystem
 from shop import ShopManager
 from data import load_user_data, save_user_data
 from skills import skill_list
-from enemy import EnemyManager
+from assets import cache as asset_cache
+from preload import Preloader
+from lighting import Lighting, TREASURE_LIGHT, ENEMY_LIGHT, COIN_LIGHT
+from display import Display
+from simulation import Simulation, Controls
+from replay import InputRecorder
+from profiler import profiler, ProfilerOverlay, log
+from text import render_text
+from render import RenderQueue, LAYER_COINS, LAYER_OBJECTS, LAYER_PLAYER, LAYER_ENEMIES, LAYER_PARTICLES
 
 class Game:
-    def __init__(self):
+    def __init__(self, window_size=None, seed=None):
+        """window_size 为 None 时全屏打开；指定时打开这个大小的普通窗口（无显示器运行见 headless.py）。
+        seed 决定这一局的全部随机数，None 为随机"""
         pygame.init()
-        info = pygame.display.Info()
-        self.screen_width, self.screen_height = info.current_w, info.current_h
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.FULLSCREEN)
+        self.window_size = window_size
+        # 所有画面都画在 self.screen 上；设置了 RENDER_RESOLUTION 时它是内部面，由 display 放大到窗口
+        if window_size is None:
+            self.display = Display(RENDER_RESOLUTION, RENDER_SCALING)
+        else:
+            self.display = Display(RENDER_RESOLUTION, RENDER_SCALING, flags=0, window_size=window_size)
+        self.screen = self.display.surface
+        self.screen_width, self.screen_height = self.display.size
         pygame.display.set_caption("Deep Dive Dash")
 
         self.camera_offset = pygame.Vector2(0, 0)
+        self.prev_camera_offset = pygame.Vector2(0, 0)
         self.clock = pygame.time.Clock()
 
-        self.tile_map = TileMap("assets/tiles/map.csv", "assets/tiles/tileset.png", 64)
-        map_width = len(self.tile_map.map_data[0]) * self.tile_map.tile_size
-        map_height = len(self.tile_map.map_data) * self.tile_map.tile_size
+        self.preload_assets()
+        self.lighting = Lighting((self.screen_width, self.screen_height))
+
+        # 固定步长模拟：accumulator 是还没模拟的真实时间（秒），模拟时间在 self.sim.time
+        self.sim_dt = 1.0 / SIMULATION_HZ
+        self.accumulator = 0.0
+
+        if STREAMING_WORLD:
+            self.tile_map = StreamingTileMap("assets/tiles/map.csv", "assets/tiles/tileset.png", 64,
+                                             memory_cap=STREAM_MEMORY_CAP_MB * 1024 * 1024)
+        else:
+            self.tile_map = TileMap("assets/tiles/map.csv", "assets/tiles/tileset.png", 64)
+        map_width = self.tile_map.pixel_width
+        map_height = self.tile_map.pixel_height
         self.background = Background(self.screen_width, self.screen_height, map_width, map_height)
         
         self.player_id = "default_player"
@@ -39,27 +68,19 @@ class Game:
         total_coins = load_user_data(self.player_id, self.skills)
         self.coin_data = {"total_coins": total_coins}
     
-        self.player = Player("assets/characters", self.skills)
-        self.all_sprites = pygame.sprite.Group(self.player)
-
-        player_start_pos = pygame.Vector2(self.player.world_rect.center)
-        self.enemy_manager = EnemyManager(self.tile_map, player_start_pos, self.player)
-
-        self.bubbles = pygame.sprite.Group()
-        self.bubble_timer = 0
+        self.particles = ParticleSystem(PARTICLE_CAPACITY, draw_budget=PARTICLE_DRAW_BUDGET)
+        self.render_queue = RenderQueue()
         self.bubble_spawn_interval = 150
-
-        self.level = Level("assets/coins", self.tile_map, self.screen_width, self.screen_height)
-        self.coins = self.level.coins
-        self.treasures = self.level.treasures
-        self.submarine = self.level.submarine
-
-        self.coin_count = 0
-        self.collected_treasures = 0
+        self.recorder = None  # 开启 RECORD_RUNS 时录制这一局的输入（replay.py）
+        self.profiler_overlay = None  # F3 打开的性能叠加层
+        # 这一局在按下 Play 时按当时的已购技能重新生成（见 start_run）；这里先建一局供无窗口脚本直接使用
+        self.seed = seed
+        self.attach_simulation(Simulation(self.skills, self.tile_map, seed=seed))
 
         self.total_coins = self.coin_data["total_coins"]
 
         self.state = 'menu'
+        self.drawn_state = None  # 上一次画到屏幕上的画面，切换画面时整屏重画
         self.game_result = False
 
         self.ui_manager = UIManager(self.screen_width, self.screen_height, player_id=self.player_id)
@@ -74,6 +95,33 @@ class Game:
         )
         self.skills = self.shop_manager.skills
 
+    def preload_assets(self):
+        """线程池并行解码图片，同时显示加载进度"""
+        if asset_cache.surfaces:
+            return  # 重新开始时图片都已经在缓存里
+        preloader = Preloader(asset_cache)
+        while not preloader.done:
+            progress = preloader.poll(timeout=1 / 60)
+            for event in self.get_events():
+                if event.type == pygame.QUIT:
+                    preloader.close()
+                    pygame.quit()
+                    raise SystemExit
+            self.draw_loading_screen(progress)
+        preloader.close()
+
+    def draw_loading_screen(self, progress):
+        bar_width, bar_height = self.screen_width // 3, 16
+        bar_x = (self.screen_width - bar_width) // 2
+        bar_y = self.screen_height // 2
+
+        self.screen.fill((0, 0, 0))
+        text = render_text(f"Loading... {int(progress * 100)}%", 36)
+        self.screen.blit(text, text.get_rect(midbottom=(self.screen_width // 2, bar_y - 12)))
+        pygame.draw.rect(self.screen, (80, 80, 80), (bar_x, bar_y, bar_width, bar_height), 2)
+        pygame.draw.rect(self.screen, (255, 255, 255), (bar_x + 2, bar_y + 2, int((bar_width - 4) * progress), bar_height - 4))
+        self.display.present()
+
     def save_user_progress(self):
         save_user_data(self.player_id, self.coin_data["total_coins"], self.shop_manager.skills)
 
@@ -83,92 +131,157 @@ class Game:
                 return skill
         return None
 
-    def update_game_logic(self):
-        dt = self.clock.get_time() / 1000.0
-
-        current_time = pygame.time.get_ticks()
-
-        keys = pygame.key.get_pressed()
-        self.player.update(keys, self.screen_width, self.screen_height, self.tile_map, dt)
-
-        self.player.update_skills(dt)
-
-        for enemy in self.enemy_manager.enemy_list:
-            if self.player.rect.colliderect(enemy.rect) and not self.player.invincible:
-                player_died = self.player.take_damage(20)
-                if player_died:
-                    self.state = 'gameover'
-                    self.game_result = False
-                    print("[DEBUG] Player died from enemy collision.")
-                    return
+    def reset(self):
+        """重试：窗口、地图、背景和所有已解码的图片都保留，回到主菜单。
+        金币、宝藏、敌人和玩家在下一次按 Play 时重新生成（start_run）。
+        金币和已购技能一直和存档同步，不需要重新读存档"""
+        self.total_coins = self.coin_data["total_coins"]
+        self.state = 'menu'
+        self.drawn_state = None
+        self.game_result = False
+        self.ui_manager.show_shop_menu = False
+        self.ui_manager.last_hud_update_time = -math.inf  # 技能 HUD 按新玩家立即重建
+
+    def start_run(self):
+        """按下 Play：按现在的已购技能新建一局并开始。
+        在商店里刚买的技能由新玩家在创建时生效，录像里记下的技能和这一局实际拥有的一致"""
+        self.attach_simulation(Simulation(self.skills, self.tile_map, seed=self.seed))
+        self.state = 'running'
+        self.accumulator = 0.0
+        # 菜单里阻塞等待的时间不算进第一帧，否则开局就要一口气追赶好几步模拟
+        self.clock.tick()
+        self.sim.start()
+        if RECORD_RUNS:
+            self.recorder = InputRecorder(self.sim, STREAMING_WORLD, SIMULATION_HZ)
+
+    def attach_simulation(self, sim):
+        """改用 sim 这一局：更新画面需要的引用，清空粒子和摄像机"""
+        # 游戏规则都在 Simulation 里，这里只保留画面需要的引用
+        if getattr(self, "tile_map", sim.tile_map) is not sim.tile_map:
+            self.tile_map.close()  # 换地图时停掉旧流式地图的读取线程
+        self.sim = sim
+        self.tile_map = sim.tile_map
+        self.player = sim.player
+        self.all_sprites = pygame.sprite.Group(self.player)
+        self.enemy_system = sim.enemy_system
+        self.level = sim.level
+        self.coins = sim.coins
+        self.treasures = sim.treasures
+        self.submarine = sim.submarine
+        self.object_grid = sim.object_grid
+        if hasattr(self, "shop_manager"):
+            self.shop_manager.player = sim.player
+
+        self.particles.clear()
+        self.particles.rng = np.random.default_rng(sim.stream("particles").getrandbits(64))
+        self.bubble_timer = 0
+        self.plankton_due = 0.0  # 累积的待撒浮游生物数量
+        self.camera_offset.update(0, 0)
+        self.prev_camera_offset.update(0, 0)
+        self.accumulator = 0.0
+
+    @property
+    def coin_count(self):
+        return self.sim.coin_count
+
+    @property
+    def collected_treasures(self):
+        return self.sim.collected_treasures
+
+    def update_game_logic(self, dt, controls=None):
+        """推进一个固定步长的模拟，dt 为步长（秒）；controls 默认读当前键盘"""
+        self.prev_camera_offset.update(self.camera_offset)
+        if controls is None:
+            controls = Controls.from_keys(pygame.key.get_pressed())
+        if self.recorder:
+            self.recorder.record(controls)
+        self.sim.step(controls, dt)
+
+        # 规则层产生的事件：播放特效、保存金币
+        for kind, data in self.sim.events:
+            if kind == "hit":
+                self.particles.emit("spark", *data, count=24)
+            elif kind == "treasure":
+                self.particles.emit("burst", *data, count=60)
+            elif kind == "coin":
+                self.total_coins += data.value
+                self.coin_data["total_coins"] = self.total_coins
+                self.save_user_progress()
+
+        if self.sim.state != "running":
+            self.state = 'gameover'
+            self.game_result = self.sim.state == "won"
+            self.finish_recording()
+            return
 
-        map_width = len(self.tile_map.map_data[0]) * self.tile_map.tile_size
-        map_height = len(self.tile_map.map_data) * self.tile_map.tile_size
+        map_width = self.tile_map.pixel_width
+        map_height = self.tile_map.pixel_height
         half_w, half_h = self.screen_width // 2, self.screen_height // 2
         player_center = self.player.world_rect.center
         offset_x = max(0, min(player_center[0] - half_w, map_width - self.screen_width))
         offset_y = max(0, min(player_center[1] - half_h, map_height - self.screen_height))
         self.camera_offset.update(offset_x, offset_y)
 
-        self.enemy_manager.update_all(dt)
-
-        if current_time - self.bubble_timer > self.bubble_spawn_interval:
-            Bubble.emit_bubble(
-                self.bubbles,
-                x=self.player.rect.centerx,
-                y=self.player.rect.top,
-                count=random.randint(1, 2) 
-            )
-            self.bubble_timer = current_time
-        
-        for bubble in self.bubbles.sprites():
-            bubble.update()
-
-        self.coins.update()
-        self.treasures.update()
-
-        if self.player.has_skill("coin magnet"):
-            for coin in self.coins:
-                coin.activate_magnet(self.player)
-
-        for coin in pygame.sprite.spritecollide(self.player, self.coins, dokill=True):
-            self.coin_count += coin.value
-            self.total_coins += coin.value
-            self.coin_data["total_coins"] = self.total_coins
-            self.save_user_progress()
+        with profiler.scope("bubbles"):
+            current_time = self.sim.time
+            if current_time - self.bubble_timer > self.bubble_spawn_interval:
+                self.particles.emit("bubble", self.player.rect.centerx, self.player.rect.top, count=int(self.particles.rng.integers(1, 3)))
+                self.bubble_timer = current_time
 
-        if self.state == 'running':
-            base_decay = 5 * dt
-            self.player.update_oxygen(base_decay)
-        
-            if self.player.oxygen <= 0:
-                self.state = 'gameover'
-                self.game_result = False
-                return
-
-        for treasure in self.treasures:
-            if self.player.rect.colliderect(treasure.rect) and not treasure.collected:
-                treasure.trigger_animation()
+            self.plankton_due += PLANKTON_PER_SECOND * dt
+            if self.plankton_due >= 1:
+                view = pygame.Rect(self.camera_offset, (self.screen_width, self.screen_height))
+                self.particles.emit_area("plankton", view, int(self.plankton_due))
+                self.plankton_due -= int(self.plankton_due)
 
-        self.collected_treasures = sum(1 for t in self.treasures if t.collected)
-
-        if self.collected_treasures >= 3 and self.player.rect.colliderect(self.submarine.rect):
-            self.state = 'gameover'
-            self.game_result = True
+            self.particles.update(dt)
 
         self.background.update(self.player.rect.centerx, self.player.rect.centery)
 
+    def wait_events(self, timeout=0):
+        """阻塞到有事件或超过 timeout 毫秒（0 表示一直等），返回所有待处理事件"""
+        event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        events = [] if event.type == pygame.NOEVENT else [self.display.map_event(event)]
+        return events + self.get_events()
+
+    def get_events(self):
+        """所有待处理事件，鼠标坐标已换算到内部面"""
+        return [self.display.map_event(event) for event in pygame.event.get()]
+
+    def set_render_mode(self, logical_size=None, scaling=RENDER_SCALING):
+        """切换内部渲染分辨率，并重建所有和屏幕尺寸有关的缓存"""
+        self.display.set_mode(logical_size, scaling)
+        self.screen = self.display.surface
+        self.screen_width, self.screen_height = self.display.size
+        self.background = Background(self.screen_width, self.screen_height,
+                                     self.tile_map.pixel_width, self.tile_map.pixel_height)
+        self.lighting.resize((self.screen_width, self.screen_height))
+        self.ui_manager.resize(self.screen_width, self.screen_height)
+        self.shop_manager.resize(self.screen_width, self.screen_height)
+        self.drawn_state = None
+
+    def menu_wait_timeout(self):
+        """菜单下一次需要重画前最多可以等多久（毫秒）"""
+        shop = self.shop_manager
+        fading = ((shop.confirmation_popup and shop.popup_alpha < 255)
+                  or (shop.not_enough_coins_popup and shop.ne_popup_alpha < 255))
+        if self.ui_manager.redraw_all or fading:
+            return 1
+        speed = self.ui_manager.menu_scroll_speed
+        return math.ceil(1000 / speed) if speed > 0 else 0
+
     def run(self):
         running = True  
         while running:
-            self.clock.tick(FPS)
+            frame_time = self.clock.tick(FPS) / 1000.0
 
             if self.state == 'menu':
-                self.ui_manager.midground_x -= 1
-                if self.ui_manager.midground_x <= -self.ui_manager.midground_width:
-                    self.ui_manager.midground_x = 0
+                if self.drawn_state != 'menu':
+                    self.ui_manager.redraw_all = True
+                self.ui_manager.advance_scroll(frame_time)
 
-                for event in pygame.event.get():
+                # 菜单画面没有变化时阻塞等待输入，最多等到中景下一次滚动
+                for event in self.wait_events(self.menu_wait_timeout()):
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -176,140 +289,175 @@ class Game:
                         if self.ui_manager.show_shop_menu:
                             self.shop_manager.handle_shop_click(event.pos)
                         if self.ui_manager.play_requested:
-                            self.state = 'running'
                             self.ui_manager.play_requested = False
-                            self.player.oxygen = self.player.oxygen_max
-                            self.coin_count = 0
-                            self.collected_treasures = 0
+                            self.start_run()
                         elif self.ui_manager.exit_requested:
                             running = False
                             self.ui_manager.exit_requested = False
                     elif event.type == pygame.USEREVENT + 1:
                         self.shop_manager.not_enough_coins_popup = False
                     
-                # 绘制界面
+                # 绘制界面，只更新变化的区域
                 if self.ui_manager.show_shop_menu:
-                    self.shop_manager.draw_shop_menu(self.screen)
+                    dirty = self.shop_manager.draw_shop_menu(self.screen)
                 else:
-                    self.ui_manager.draw_main_menu(self.screen)
-
-                pygame.display.flip() 
+                    dirty = self.ui_manager.draw_main_menu(self.screen)
+                if dirty:
+                    self.display.update(dirty)
+                self.drawn_state = 'menu'
 
             elif self.state == 'running':
-                keys = pygame.key.get_pressed()
-                for event in pygame.event.get():
+                profiler.begin_frame()
+                for event in self.get_events():
                     if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                         running = False
-
-                self.update_game_logic()
-                self.draw()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.toggle_profiler_overlay()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                        self.dump_trace()
+
+                # 按固定步长追赶真实时间，剩余不足一步的部分用于渲染插值
+                self.accumulator += min(frame_time, MAX_FRAME_TIME)
+                while self.accumulator >= self.sim_dt and self.state == 'running':
+                    self.update_game_logic(self.sim_dt)
+                    self.accumulator -= self.sim_dt
+                # 这一帧中途结束时循环会提前退出，剩下的时间可能超过一步，插值位置要限制在 [0, 1]
+                self.draw(min(1.0, self.accumulator / self.sim_dt))
+                self.drawn_state = 'running'
+                profiler.end_frame()
 
             elif self.state == 'gameover':
-                retry_btn, exit_btn = self.ui_manager.draw_game_over(self.screen, win=self.game_result)
-                for event in pygame.event.get():
+                # 结算画面是静态的，只画一次，之后阻塞等待输入
+                if self.drawn_state != 'gameover':
+                    retry_btn, exit_btn = self.ui_manager.draw_game_over(self.screen, win=self.game_result)
+                    self.display.present()
+                    self.drawn_state = 'gameover'
+                for event in self.wait_events():
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.MOUSEBUTTONDOWN:
                         if retry_btn.collidepoint(event.pos):
-                            self.__init__()
+                            self.reset()
                         elif exit_btn.collidepoint(event.pos):
                             running = False
 
+        self.finish_recording()
         self.save_user_progress()
+        self.tile_map.close()
         pygame.quit()
 
-    def draw(self):
-        self.screen.fill((0, 0, 0))
-        self.background.draw(self.screen, self.camera_offset)
-        self.tile_map.draw(self.screen, self.camera_offset)
-
-        # 绘制硬币
-        for coin in self.coins:
-            screen_pos = coin.rect.topleft - self.camera_offset
-            self.screen.blit(coin.image, screen_pos)
-
-        # 绘制宝藏
-        for treasure in self.treasures:
-            screen_pos = treasure.rect.topleft - self.camera_offset
-            self.screen.blit(treasure.image, screen_pos)
-
-        # 绘制潜水艇
-        submarine_pos = self.submarine.rect.topleft - self.camera_offset
-        self.screen.blit(self.submarine.image, submarine_pos)
-
-        # ===== 修改的玩家渲染部分 =====
-        player_screen_pos = self.player.world_rect.topleft - self.camera_offset
-        self.screen.blit(self.player.image, player_screen_pos)
+    def finish_recording(self):
+        """保存这一局的输入录像（没有在录制时什么也不做）"""
+        if self.recorder is None:
+            return
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.sim.seed}.ddr"
+        path = self.recorder.finish(os.path.join(RECORDINGS_DIR, name))
+        log.info("Saved input recording to %s", path)
+        self.recorder = None
+
+    def toggle_profiler_overlay(self):
+        """显示/隐藏性能叠加层；显示时开始记录，隐藏时恢复 PROFILER_ENABLED 的设置"""
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(profiler)
+            profiler.set_enabled(True)
+        else:
+            self.profiler_overlay = None
+            profiler.set_enabled(PROFILER_ENABLED)
+
+    def dump_trace(self):
+        if not profiler.frames:
+            log.warning("Profiler has nothing recorded; press F3 or set PROFILER_ENABLED first.")
+            return
+        name = time.strftime("trace-%Y%m%d-%H%M%S.json")
+        path = profiler.dump_trace(os.path.join(TRACES_DIR, name))
+        log.info("Saved %d frames of profiler trace to %s", len(profiler.frames), path)
+        if self.profiler_overlay:
+            self.profiler_overlay.notify(f"Saved {os.path.basename(path)}")
+
+    def draw(self, alpha=1.0):
+        """alpha 是当前时刻在上一个和当前模拟步之间的位置（0~1），用于插值"""
+        camera = self.prev_camera_offset.lerp(self.camera_offset, alpha)
+        camera.update(round(camera.x), round(camera.y))
 
-        # 绘制敌人
-        self.enemy_manager.draw_all(self.screen, self.camera_offset)
-
-        # 绘制气泡
-        for bubble in self.bubbles:
-            screen_pos = bubble.rect.topleft - self.camera_offset
-            self.screen.blit(bubble.image, screen_pos)
-
-        self.draw_darkness_overlay()
+        self.screen.fill((0, 0, 0))
+        with profiler.scope("background"):
+            self.background.draw(self.screen, camera, self.sim.time)
+        with profiler.scope("tiles"):
+            self.tile_map.draw(self.screen, camera)
+
+        # 世界中的精灵按层加入队列，剔除屏幕外的后每层一次 blits
+        with profiler.scope("sprites"):
+            queue = self.render_queue
+            queue.begin(camera, self.screen.get_size())
+            queue.extend(LAYER_COINS, self.coins.render_items(queue.view, alpha))
+            for treasure in self.treasures:
+                queue.add(LAYER_OBJECTS, treasure.image, treasure.rect.topleft)
+            queue.add(LAYER_OBJECTS, self.submarine.image, self.submarine.rect.topleft)
+
+            player_topleft = self.player.render_topleft(alpha)
+            queue.add(LAYER_PLAYER, self.player.image, player_topleft)
+            queue.extend(LAYER_ENEMIES, self.enemy_system.render_items(queue.view, alpha))
+            # 粒子（气泡、碎光、火花、浮游生物）
+            queue.extend(LAYER_PARTICLES, self.particles.render_items(queue.view, alpha))
+            queue.flush(self.screen)
+
+        with profiler.scope("lighting"):
+            player_center = player_topleft + pygame.Vector2(self.player.world_rect.size) / 2
+            self.draw_darkness_overlay(player_center - camera, camera)
 
         # 绘制UI
-        self.ui_manager.draw(
-            self.screen,
-            self.player,
-            coin_count=self.coin_count,
-            treasure_count=self.collected_treasures,
-        )
-
-        self.ui_manager.draw_skill_hud(self.screen, self.player)
-
-        pygame.display.flip()
+        with profiler.scope("hud"):
+            self.ui_manager.draw(
+                self.screen,
+                self.player,
+                coin_count=self.coin_count,
+                treasure_count=self.collected_treasures,
+            )
 
-    def get_flashlight_surface(self):
-        radius = int(self.player.base_flashlight_radius * self.player.flashlight_multiplier)
-        return self.create_flashlight_gradient(radius)
+            self.ui_manager.draw_skill_hud(self.screen, self.player)
 
-    def create_flashlight_gradient(self, radius):
-        surface = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
+        if self.profiler_overlay:
+            self.profiler_overlay.draw(self.screen)
 
-        for i in range(radius, 0, -1):
-            alpha = int(255 * (i / radius) ** 2.5)  # 中心亮，边缘弱
-            color = (0, 0, 0, 255 - alpha)  # 越靠近中心透明度越高
-            pygame.draw.circle(surface, color, (radius, radius), i)
+        with profiler.scope("present"):
+            self.display.present()
 
-        return surface
-    
-    def draw_darkness_overlay(self):
+    def draw_darkness_overlay(self, player_screen_pos, camera):
         player_y = self.player.world_rect.centery
-        map_height = len(self.tile_map.map_data) * self.tile_map.tile_size
+        map_height = self.tile_map.pixel_height
 
         # 深度决定黑暗程度
         depth_ratio = min(1, max(0, player_y / map_height))
         max_darkness = 255  # 最深暗度
         alpha = int(depth_ratio * max_darkness)
 
-        # 整体黑暗遮罩
-        darkness_overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-        darkness_overlay.fill((0, 0, 0, alpha))
-
-        # 生成/更新光圈渐变（当技能改变时重新生成）
-        current_radius = int(self.player.base_flashlight_radius * self.player.flashlight_multiplier)
-        if not hasattr(self, "flashlight_gradient") or \
-        self.flashlight_gradient.get_size()[0] != current_radius * 2:
-            self.flashlight_gradient = self.create_flashlight_gradient(current_radius)
-            
-        # 玩家在屏幕的中心位置
-        player_screen_x = self.player.world_rect.centerx - self.camera_offset.x
-        player_screen_y = self.player.world_rect.centery - self.camera_offset.y
-
-        # 在 darkness_overlay 上减去光圈亮度区域
-        darkness_overlay.blit(
-            self.flashlight_gradient,
-            (player_screen_x - current_radius, player_screen_y - current_radius),
-            special_flags=pygame.BLEND_RGBA_SUB
-        )
+        # 手电筒（技能改变半径）
+        flashlight_radius = int(self.player.base_flashlight_radius * self.player.flashlight_multiplier)
+        lights = [(player_screen_pos[0], player_screen_pos[1], flashlight_radius, 255)]
+
+        # 宝藏、敌人、金币自带微光；只有光圈能照到画面里的才加入
+        view = pygame.Rect(camera.x, camera.y, self.screen_width, self.screen_height)
+        radius, intensity = TREASURE_LIGHT
+        lit_view = view.inflate(radius * 2, radius * 2)
+        for treasure in self.treasures:
+            if not treasure.collected and lit_view.collidepoint(treasure.rect.center):
+                x, y = treasure.rect.center
+                lights.append((x - camera.x, y - camera.y, radius, intensity))
+
+        radius, intensity = ENEMY_LIGHT
+        screen_pos = self.enemy_system.pos - (camera.x, camera.y)
+        visible = ((screen_pos[:, 0] > -radius) & (screen_pos[:, 0] < self.screen_width + radius)
+                   & (screen_pos[:, 1] > -radius) & (screen_pos[:, 1] < self.screen_height + radius))
+        for x, y in screen_pos[visible].tolist():
+            lights.append((x, y, radius, intensity))
+
+        radius, intensity = COIN_LIGHT
+        for x, y in (self.coins.centers_in(view) - (camera.x, camera.y)).tolist():
+            lights.append((x, y, radius, intensity))
 
-        # 绘制最终黑暗遮罩
-        self.screen.blit(darkness_overlay, (0, 0))
+        self.lighting.render(self.screen, alpha, lights)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     game = Game()
     game.run()
\ No newline at end of file
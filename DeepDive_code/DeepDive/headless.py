@@ -0,0 +1,148 @@
+# headless.py
+"""无显示器渲染：用 SDL 的 dummy 驱动在指定分辨率的离屏画面上跑脚本化的帧，
+把游戏画面、主菜单和商店保存成 PNG，并统计每帧绘制耗时。
+
+    python headless.py --size 1280x720 --frames 120 --out shots
+    python headless.py --out shots_new --compare shots   # 和上一次的图逐像素比较
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+SCENES = ("game", "menu", "shop")
+
+
+def make_game(size, seed=0):
+    """在 dummy 驱动下创建 size 大小的 Game；seed 固定地图、敌人和粒子的随机数。
+    脚本化的帧里收集到的金币不写进玩家的存档"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from game import Game
+    game = Game(window_size=size, seed=seed)
+    game.save_user_progress = lambda: None
+    return game
+
+
+def timing_stats(times):
+    """每帧耗时列表（秒）-> 毫秒统计"""
+    ms = np.array(times) * 1000
+    return {
+        "frames": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def render_game(game, frames, save_every, out_dir):
+    """每帧推进一帧的模拟时间再绘制；只统计 draw() 的耗时"""
+    import pygame
+    game.state = "running"
+    steps_per_frame = max(1, round(1 / (60 * game.sim_dt)))
+    times = []
+    for index in range(frames):
+        for _ in range(steps_per_frame):
+            if game.state == "running":
+                game.update_game_logic(game.sim_dt)
+        start = time.perf_counter()
+        game.draw(1.0)
+        times.append(time.perf_counter() - start)
+        if out_dir and (index + 1) % save_every == 0:
+            pygame.image.save(game.screen, os.path.join(out_dir, f"game_{index + 1:04d}.png"))
+    return times
+
+
+def render_menu(game, frames, out_dir, shop=False):
+    """每帧都整屏重画菜单（或商店），统计最坏情况的耗时"""
+    import pygame
+    ui = game.ui_manager
+    ui.show_shop_menu = shop
+    times = []
+    for _ in range(frames):
+        ui.advance_scroll(1 / 60)
+        ui.redraw_all = True
+        start = time.perf_counter()
+        if shop:
+            game.shop_manager.draw_shop_menu(game.screen)
+        else:
+            ui.draw_main_menu(game.screen)
+        game.display.present()
+        times.append(time.perf_counter() - start)
+    ui.show_shop_menu = False
+    if out_dir:
+        pygame.image.save(game.screen, os.path.join(out_dir, "shop.png" if shop else "menu.png"))
+    return times
+
+
+def compare_images(out_dir, golden_dir, tolerance=0):
+    """逐像素比较两个目录里同名的 PNG，返回 {文件名: 不同的像素数}（缺图为 -1）"""
+    import pygame
+    result = {}
+    for name in sorted(os.listdir(out_dir)):
+        if not name.endswith(".png"):
+            continue
+        golden_path = os.path.join(golden_dir, name)
+        if not os.path.isfile(golden_path):
+            result[name] = -1
+            continue
+        new = pygame.surfarray.array3d(pygame.image.load(os.path.join(out_dir, name))).astype(int)
+        old = pygame.surfarray.array3d(pygame.image.load(golden_path)).astype(int)
+        if new.shape != old.shape:
+            result[name] = new.shape[0] * new.shape[1]
+            continue
+        result[name] = int(np.count_nonzero(np.abs(new - old).max(axis=2) > tolerance))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render scripted frames without a display.")
+    parser.add_argument("--size", default="1280x720", help="offscreen resolution, WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=120, help="frames per scene")
+    parser.add_argument("--save-every", type=int, default=30, help="save every Nth game frame")
+    parser.add_argument("--scenes", default=",".join(SCENES), help="comma separated: " + ", ".join(SCENES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="directory for the PNG files")
+    parser.add_argument("--compare", help="golden directory to pixel-diff the output against")
+    parser.add_argument("--tolerance", type=int, default=0, help="per-channel difference ignored when comparing")
+    parser.add_argument("--json", help="write the timing stats to this file")
+    args = parser.parse_args()
+
+    size = tuple(int(value) for value in args.size.lower().split("x"))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    game = make_game(size, args.seed)
+
+    stats = {}
+    for scene in args.scenes.split(","):
+        if scene == "game":
+            times = render_game(game, args.frames, args.save_every, args.out)
+        elif scene in ("menu", "shop"):
+            times = render_menu(game, args.frames, args.out, shop=scene == "shop")
+        else:
+            parser.error(f"unknown scene: {scene}")
+        stats[scene] = timing_stats(times)
+        print(f"{scene:5s} {size[0]}x{size[1]}  " + "  ".join(
+            f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+            for key, value in stats[scene].items()))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"size": size, "scenes": stats}, file, indent=2)
+
+    if args.compare:
+        if not args.out:
+            parser.error("--compare needs --out")
+        failed = False
+        for name, changed in compare_images(args.out, args.compare, args.tolerance).items():
+            status = "missing" if changed < 0 else f"{changed} px differ"
+            print(f"{name}: {status}")
+            failed |= changed != 0
+        raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,49 @@
 import pygame
 import random
-import os
-from coin import Coin
+from coin import CoinField, COIN_TYPES
 from treasure import Treasure
 from submarine import Submarine
+from spatial import SpatialHash
 
 class Level:
-    def __init__(self, folder_path, tile_map, screen_width, screen_height, num_coins=70, padding=64):
+    def __init__(self, folder_path, tile_map, num_coins=70, rng=random):
+        # rng 决定金币和宝藏的位置，传入带种子的 random.Random 可以复现
         self.tile_map = tile_map
+        self.rng = rng
         
-        map_width = len(self.tile_map.map_data[0]) * self.tile_map.tile_size
-        map_height = len(self.tile_map.map_data) * self.tile_map.tile_size
+        map_width = self.tile_map.pixel_width
+        map_height = self.tile_map.pixel_height
         
-        self.coins = pygame.sprite.Group()
+        self.coins = CoinField(folder_path, tile_map.tile_size, capacity=num_coins)
         self.treasures = pygame.sprite.Group()
         self.submarine = Submarine("assets/submarine.png", map_width, map_height)
 
+        # 以tile为格子的空间哈希：宝藏和潜水艇这类静态物体共用一张（金币在 CoinField 内部有自己的）
+        self.object_grid = SpatialHash(tile_map.tile_size)
+        self.object_grid.insert(self.submarine, self.submarine.rect)
+
         self.folder_path = folder_path
-        self.tile_map = tile_map
-        self.screen_width = screen_width
-        self.screen_height = screen_height
         self.num_coins = num_coins
-        self.padding = padding
 
         self.generate_coins()
         self.generate_treasures()
 
     def generate_coins(self):
-        tile_size = self.tile_map.tile_size
-        map_width = len(self.tile_map.map_data[0]) * tile_size
-        map_height = len(self.tile_map.map_data) * tile_size
-
-        attempts = 0
-        max_attempts = self.num_coins * 10
-
-        while len(self.coins) < self.num_coins and attempts < max_attempts:
-            attempts += 1
-            x = random.randint(self.padding, map_width - self.padding)
-            y = random.randint(self.padding, map_height - self.padding)
-            rect = pygame.Rect(x, y, 32, 32)
-
-            if not self.tile_map.check_collision(rect):
-                coin_type = random.choice(["gold", "silver"])
-                coin = Coin(self.folder_path, coin_type, x, y)
-                self.coins.add(coin)
+        positions = self.tile_map.spawn_index.sample((32, 32), count=self.num_coins, rng=self.rng)
+        for x, y in positions:
+            self.coins.add(self.rng.choice(COIN_TYPES), x, y)
 
     def generate_treasures(self):
         treasure_types = ["treasure1", "treasure2", "treasure3"]
-        tile_size = self.tile_map.tile_size
-        map_width = len(self.tile_map.map_data[0]) * tile_size
-        map_height = len(self.tile_map.map_data) * tile_size
-
-        for treasure_type in treasure_types:
-            while True:
-                x = random.randint(64, map_width - 64 - 48)  # 保证右侧不越界
-                y = random.randint(64, map_height - 64 - 32)  # 保证底部不越界
-                rect = pygame.Rect(x, y, 48, 32)  # 使用实际宝藏大小
-                if not self.tile_map.check_collision(rect):
-                    treasure = Treasure(treasure_type, "assets/treasure", (x, y))
-                    self.treasures.add(treasure)
-                    break
-
-    def update(self):
-        self.coins.update()
-        self.treasures.update()
-
-    def draw(self, surface, camera_offset):
-        for coin in self.coins:
-            surface.blit(coin.image, coin.rect.topleft - camera_offset)
-        for treasure in self.treasures:
-            surface.blit(treasure.image, treasure.rect.topleft - camera_offset)
-        surface.blit(self.submarine.image, self.submarine.rect.topleft - camera_offset)
+        treasure_size = (96, 64)  # 宝藏图片缩放后的实际大小
+
+        positions = self.tile_map.spawn_index.sample(treasure_size, count=len(treasure_types), min_separation=treasure_size[0],
+                                                       rng=self.rng)
+        for treasure_type, (x, y) in zip(treasure_types, positions):
+            topleft = (x - treasure_size[0] // 2, y - treasure_size[1] // 2)
+            treasure = Treasure(treasure_type, "assets/treasure", topleft)
+            self.treasures.add(treasure)
+            self.object_grid.insert(treasure, treasure.rect)
+
+        if len(positions) < len(treasure_types):
+            print(f"[⚠️] Only {len(positions)} of {len(treasure_types)} treasures could be placed.")
@@ -0,0 +1,110 @@
+# lighting.py
+import math
+import numpy as np
+import pygame
+
+# 光照图最大宽度（像素）。屏幕再大，合成光照的开销也不超过这个分辨率
+LIGHTMAP_WIDTH = 480
+# 光照图按 TILE x TILE 分块，只有光源覆盖的块才放大，其余是均匀的黑暗
+TILE = 8
+
+# 各类光源的 (半径, 强度)；强度是光心处减去的黑暗值（0~255）
+TREASURE_LIGHT = (72, 150)
+ENEMY_LIGHT = (48, 110)
+COIN_LIGHT = (28, 80)
+
+
+class Lighting:
+    """低分辨率光照图：每个像素是亮度系数（255 为不变暗），光源用预先生成的光斑叠加上去。
+
+    光照图每边是屏幕的 1/scale（scale 为整数）。只有光源覆盖的块放大到屏幕分辨率，
+    写进常驻的全屏系数图层；最后一次 BLEND_RGB_MULT 乘到屏幕上。
+    每种 (半径, 强度) 的光斑只生成一次，所有图层都不再每帧分配。
+    """
+
+    def __init__(self, screen_size, max_width=LIGHTMAP_WIDTH):
+        self.max_width = max_width
+        self.stamps = {}
+        self.resize(screen_size)
+
+    def resize(self, screen_size):
+        """屏幕尺寸变化时重建图层（光斑按光照图像素缓存，也要清空）"""
+        self.screen_size = tuple(screen_size)
+        self.scale = max(1, math.ceil(self.screen_size[0] / self.max_width))
+        self.size = (math.ceil(self.screen_size[0] / self.scale), math.ceil(self.screen_size[1] / self.scale))
+        self.lightmap = pygame.Surface(self.size)
+        self.factor = pygame.Surface(self.screen_size)
+        self.factor_level = None  # factor 图层当前填充的均匀亮度
+        self.lit_rects = []       # 上一帧在 factor 上放大过的区域，下一帧要恢复成均匀亮度
+        self.stamps.clear()
+
+    def stamp(self, radius, intensity):
+        """半径 radius（光照图像素）的光斑：中心加亮 intensity，边缘逐渐减为 0"""
+        key = (radius, intensity)
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            size = radius * 2
+            y, x = np.ogrid[:size, :size]
+            distance = np.hypot(x + 0.5 - radius, y + 0.5 - radius) / radius
+            value = (intensity * (1 - np.clip(distance, 0, 1) ** 2.5)).astype(np.uint8)  # 中心亮，边缘弱
+
+            stamp = pygame.Surface((size, size))
+            pygame.surfarray.blit_array(stamp, np.repeat(value.T[:, :, None], 3, axis=2))
+            self.stamps[key] = stamp
+        return stamp
+
+    def render(self, surface, darkness, lights):
+        """darkness: 整体黑暗（0~255）；lights: [(屏幕x, 屏幕y, 半径, 强度), ...]"""
+        if darkness <= 0:
+            return
+        level = 255 - darkness
+        self.lightmap.fill((level, level, level))
+
+        width, height = self.size
+        rows, cols = math.ceil(height / TILE), math.ceil(width / TILE)
+        lit = np.zeros((rows, cols), dtype=bool)
+        batch = []
+        for x, y, radius, intensity in lights:
+            radius = max(1, round(radius / self.scale))
+            left, top = round(x / self.scale) - radius, round(y / self.scale) - radius
+            right, bottom = left + radius * 2, top + radius * 2
+            # 跳过完全在屏幕外的光源
+            if right <= 0 or bottom <= 0 or left >= width or top >= height:
+                continue
+            batch.append((self.stamp(radius, int(intensity)), (left, top), None, pygame.BLEND_RGB_ADD))
+            lit[max(0, top) // TILE:(min(bottom, height) - 1) // TILE + 1,
+                max(0, left) // TILE:(min(right, width) - 1) // TILE + 1] = True
+        self.lightmap.blits(batch, doreturn=False)
+
+        # 系数图层：亮度变了整张重填，否则只恢复上一帧放大过的区域
+        if level != self.factor_level:
+            self.factor.fill((level, level, level))
+            self.factor_level = level
+        else:
+            for rect in self.lit_rects:
+                self.factor.fill((level, level, level), rect)
+        self.lit_rects = [self.upscale(rect) for rect in self.lit_runs(lit)]
+
+        surface.blit(self.factor, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+
+    def lit_runs(self, lit):
+        """把每一行里连续的亮块合并成矩形（光照图坐标）"""
+        width, height = self.size
+        for row in range(lit.shape[0]):
+            marks = np.flatnonzero(np.diff(np.concatenate(([0], lit[row].view(np.int8), [0]))))
+            for start, end in zip(marks[::2].tolist(), marks[1::2].tolist()):
+                left, top = start * TILE, row * TILE
+                yield pygame.Rect(left, top, min(end * TILE, width) - left, min(TILE, height - top))
+
+    def upscale(self, rect):
+        """把光照图上的 rect 平滑放大写进 factor，返回对应的屏幕矩形。
+
+        多取一圈像素一起放大，块与块的接缝处也能平滑过渡。
+        """
+        scale = self.scale
+        padded = rect.inflate(2, 2).clip(self.lightmap.get_rect())
+        scaled = pygame.transform.smoothscale(self.lightmap.subsurface(padded), (padded.w * scale, padded.h * scale))
+        area = pygame.Rect((rect.x - padded.x) * scale, (rect.y - padded.y) * scale, rect.w * scale, rect.h * scale)
+        target = pygame.Rect(rect.x * scale, rect.y * scale, rect.w * scale, rect.h * scale)
+        self.factor.blit(scaled, target, area)
+        return target.clip(self.factor.get_rect())
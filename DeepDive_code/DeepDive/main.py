@@ -1,6 +1,8 @@
 # main.py
+import logging
 from game import Game
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     game = Game()
     game.run()
\ No newline at end of file
@@ -1,19 +1,72 @@
 # map.py
 import pygame
-import csv
+import numpy as np
 import os
+from mapfile import load_map
+from spawn import SpawnIndex
+from assets import load_image
+
+# 每个预渲染区块包含 CHUNK_SIZE x CHUNK_SIZE 个tile
+CHUNK_SIZE = 16
+
+def is_opaque(tile):
+    """tile的每个像素都完全不透明时返回True"""
+    width, height = tile.get_size()
+    return pygame.mask.from_surface(tile, 254).count() == width * height
+
+
+def bake_tiles(block, tiles, opaque_tiles, tile_size):
+    """把一块tile id（二维数组，-1为空）预渲染到一张表面上，整块为空时返回None"""
+    tile_ys, tile_xs = np.nonzero(block != -1)
+    if len(tile_xs) == 0:
+        return None
+    tile_ids = block[tile_ys, tile_xs]
+
+    # 区块被不透明tile铺满时不需要逐像素alpha，blit更快
+    opaque = len(tile_ids) == block.size and opaque_tiles[tile_ids].all()
+    size = (block.shape[1] * tile_size, block.shape[0] * tile_size)
+    if opaque:
+        surface = pygame.Surface(size).convert()
+    else:
+        surface = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+
+    surface.blits(
+        [
+            (tiles[tile_index], (x * tile_size, y * tile_size))
+            for x, y, tile_index in zip(tile_xs.tolist(), tile_ys.tolist(), tile_ids.tolist())
+        ],
+        doreturn=False,
+    )
+    return surface
+
 
 class TileMap:
-    def __init__(self, csv_path, tileset_path, tile_size):
-        self.tile_size = tile_size
-        self.tiles = self.load_tiles(tileset_path)
-        self.map_data = self.load_csv(csv_path)
+    def __init__(self, map_path, tileset_path=None, tile_size=None, chunk_size=CHUNK_SIZE):
+        """map_path 可以是 CSV（需要同时给出 tileset_path 和 tile_size）或 Tiled 的 .tmx。
+        源文件会被编译成二进制缓存，之后的启动直接 mmap 缓存。"""
+        compiled = load_map(map_path, tileset_path, tile_size)
+        self.tile_size = compiled.tile_size
+        self.chunk_size = chunk_size
+        self.tiles = self.load_tiles(compiled.tileset["image"], compiled.tileset["tilecount"])
+        self.map_data = compiled.tile_ids
+        self.rows = compiled.rows
+        self.cols = compiled.cols
+        self.pixel_width = self.cols * self.tile_size
+        self.pixel_height = self.rows * self.tile_size
 
-        # 创建一个用于碰撞检测的二维矩阵
-        self.collidable_tiles = self.create_collidable_tiles()
+        # 用于碰撞检测的二维矩阵直接来自编译后的碰撞位图
+        self.collidable_tiles = compiled.collision
+        self.collision_sat = self.build_collision_sat()
+        # 金币、宝藏、敌人的出生点都从这里抽取
+        self.spawn_index = SpawnIndex(self.collidable_tiles, self.tile_size)
 
-    def load_tiles(self, path):
-        image = pygame.image.load(path).convert_alpha()
+        # 静态tile层只烘焙一次：区块第一次进入画面时烘焙，之后一直复用
+        self.opaque_tiles = np.array([is_opaque(tile) for tile in self.tiles], dtype=bool)
+        self.chunks = {}
+
+    def load_tiles(self, path, tilecount=None):
+        image = load_image(path)
         tiles = []
         image_width, image_height = image.get_size()
         for y in range(0, image_height, self.tile_size):
@@ -21,48 +74,88 @@ class TileMap:
                 rect = pygame.Rect(x, y, self.tile_size, self.tile_size)
                 tile = image.subsurface(rect)
                 tiles.append(tile)
-        return tiles
-
-    def load_csv(self, path):
-        with open(path) as f:
-            reader = csv.reader(f)
-            return [[int(tile) for tile in row] for row in reader]
-
-    def create_collidable_tiles(self):
-        """根据tile的ID创建一个碰撞矩阵。"""
-        collidable = []
-        for row in self.map_data:
-            collidable_row = []
-            for tile_id in row:
-                # 这里假设tile_id < 0的tile是不能碰撞的
-                if tile_id >= 0:
-                    collidable_row.append(True)
-                else:
-                    collidable_row.append(False)
-            collidable.append(collidable_row)
-        return collidable
+        return tiles[:tilecount]
+
+    def build_collision_sat(self):
+        """积分图（summed-area table），多一行一列的0，任意矩形内的碰撞tile数量 O(1) 可得"""
+        sat = np.zeros((self.rows + 1, self.cols + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(self.collidable_tiles, axis=0), axis=1, out=sat[1:, 1:])
+        return sat
+
+    def rects_to_tile_bounds(self, rects):
+        """把 N x 4 的 (x, y, w, h) 像素矩形转换为裁剪到地图内的tile范围 [left, right), [top, bottom)"""
+        rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+        x, y, w, h = rects.T
+        left = np.clip(x // self.tile_size, 0, self.cols)
+        right = np.clip((x + w - 1) // self.tile_size + 1, 0, self.cols)
+        top = np.clip(y // self.tile_size, 0, self.rows)
+        bottom = np.clip((y + h - 1) // self.tile_size + 1, 0, self.rows)
+        return left, right, top, bottom
+
+    def check_collisions(self, rects):
+        """批量检查 N 个矩形（N x 4 数组或Rect列表），返回长度为 N 的bool数组。地图外的部分视为空。"""
+        left, right, top, bottom = self.rects_to_tile_bounds(rects)
+        # 空范围（完全在地图外或宽高为0）时让右下角等于左上角，结果为0
+        right = np.maximum(right, left)
+        bottom = np.maximum(bottom, top)
+        sat = self.collision_sat
+        counts = sat[bottom, right] - sat[top, right] - sat[bottom, left] + sat[top, left]
+        return counts > 0
+
+    def check_points(self, points):
+        """批量检查 N 个像素坐标点是否落在碰撞tile上，返回长度为 N 的bool数组。"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        tile_x = points[:, 0] // self.tile_size
+        tile_y = points[:, 1] // self.tile_size
+        inside = (tile_x >= 0) & (tile_x < self.cols) & (tile_y >= 0) & (tile_y < self.rows)
+        result = np.zeros(len(points), dtype=bool)
+        result[inside] = self.collidable_tiles[tile_y[inside], tile_x[inside]]
+        return result
 
     def check_collision(self, rect):
         """检查玩家的矩形是否与任何平台碰撞"""
-        # 计算玩家矩形的范围
-        left = rect.left // self.tile_size
-        right = (rect.right - 1) // self.tile_size
-        top = rect.top // self.tile_size
-        bottom = (rect.bottom - 1) // self.tile_size
-
-        # 检查玩家的矩形是否与任何collidable的tile重叠
-        for y in range(top, bottom + 1):
-            for x in range(left, right + 1):
-                if self.collidable_tiles[y][x]:
-                    return True  # 如果发生碰撞
-        return False
+        # 计算玩家矩形覆盖的tile范围，超出地图的部分被裁剪掉
+        left = max(rect.left // self.tile_size, 0)
+        right = min((rect.right - 1) // self.tile_size + 1, self.cols)
+        top = max(rect.top // self.tile_size, 0)
+        bottom = min((rect.bottom - 1) // self.tile_size + 1, self.rows)
+        if left >= right or top >= bottom:
+            return False
+
+        # 用积分图求矩形内碰撞tile的数量
+        sat = self.collision_sat
+        return bool(sat[bottom, right] - sat[top, right] - sat[bottom, left] + sat[top, left])
+
+    def get_chunk(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        if key not in self.chunks:
+            # 空区块存 None，避免重复检查
+            self.chunks[key] = self.bake_chunk(chunk_x * self.chunk_size, chunk_y * self.chunk_size)
+        return self.chunks[key]
+
+    def bake_chunk(self, start_x, start_y):
+        """把一个区块的tile预渲染到一张表面上，区块为空时返回None"""
+        block = np.asarray(self.map_data[start_y:start_y + self.chunk_size, start_x:start_x + self.chunk_size])
+        return bake_tiles(block, self.tiles, self.opaque_tiles, self.tile_size)
 
     def draw(self, surface, camera_offset):
-        for y, row in enumerate(self.map_data):
-            for x, tile_index in enumerate(row):
-                if tile_index == -1:
-                    continue
-                tile_rect = pygame.Rect(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size)
-                screen_pos = tile_rect.topleft - camera_offset
-                surface.blit(self.tiles[tile_index], screen_pos)
+        """只绘制与摄像机矩形相交的区块"""
+        chunk_pixels = self.chunk_size * self.tile_size
+        view_width, view_height = surface.get_size()
+        offset_x, offset_y = int(camera_offset[0]), int(camera_offset[1])
+
+        first_x = max(0, offset_x // chunk_pixels)
+        first_y = max(0, offset_y // chunk_pixels)
+        last_x = min((offset_x + view_width - 1) // chunk_pixels, (self.cols - 1) // self.chunk_size)
+        last_y = min((offset_y + view_height - 1) // chunk_pixels, (self.rows - 1) // self.chunk_size)
+
+        blits = []
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                if chunk is not None:
+                    blits.append((chunk, (chunk_x * chunk_pixels - offset_x, chunk_y * chunk_pixels - offset_y)))
+        surface.blits(blits, doreturn=False)
 
+    def close(self):
+        """与 StreamingTileMap 接口一致；整张地图都在内存里，没有需要释放的线程或文件"""
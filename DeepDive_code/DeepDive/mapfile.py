@@ -0,0 +1,205 @@
+# mapfile.py
+"""编译后的二进制地图格式。
+
+CSV / TMX 源文件第一次加载时被编译成一个可以 mmap 的 .ddmap 文件，
+之后只要源文件内容不变就直接映射这个文件，不再解析文本。
+
+文件布局（小端）：
+    8 字节魔数 | uint32 头长度 | JSON 头 | int16 tile id (rows x cols) | 碰撞位图 (按行 packbits)
+数据段都按 64 字节对齐，JSON 头里记录了各段的偏移。
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import struct
+import xml.etree.ElementTree as ET
+import numpy as np
+
+MAGIC = b"DDMAP\x00\x01\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+CACHE_DIR = os.path.join("assets", ".mapcache")
+
+# TMX 的 gid 高位是翻转标记
+TMX_FLIP_FLAGS = 0xE0000000
+
+
+class CompiledMap:
+    def __init__(self, tile_ids, collision, tile_size, tileset):
+        self.tile_ids = tile_ids      # int16 数组，-1 表示空
+        self.collision = collision    # bool 数组，True 表示不可穿过
+        self.tile_size = tile_size
+        self.tileset = tileset        # {"image": 路径, "columns": 列数, "tilecount": tile数量}
+
+    @property
+    def rows(self):
+        return self.tile_ids.shape[0]
+
+    @property
+    def cols(self):
+        return self.tile_ids.shape[1]
+
+
+def read_csv(path):
+    with open(path) as f:
+        rows = [[int(tile) for tile in row] for row in csv.reader(f) if row]
+    return np.asarray(rows, dtype=np.int16)
+
+
+def read_tileset(tsx_path):
+    root = ET.parse(tsx_path).getroot()
+    image = root.find("image")
+    return {
+        "image": os.path.normpath(os.path.join(os.path.dirname(tsx_path), image.get("source"))),
+        "columns": int(root.get("columns")),
+        "tilecount": int(root.get("tilecount")),
+    }
+
+
+def read_tmx(path):
+    """读取 Tiled 的 .tmx（单个tileset，CSV编码的第一个tile层），返回 (tile_ids, tile_size, tileset)"""
+    root = ET.parse(path).getroot()
+    width, height = int(root.get("width")), int(root.get("height"))
+    tile_size = int(root.get("tilewidth"))
+
+    first_gid = int(root.find("tileset").get("firstgid"))
+    tileset = read_tileset(tmx_tileset_path(path))
+
+    data = root.find("layer/data")
+    if data.get("encoding") != "csv":
+        raise ValueError(f"{path}: only CSV encoded tile layers are supported")
+    gids = np.array([int(v) for v in data.text.replace("\n", "").split(",") if v.strip()], dtype=np.int64)
+    gids = (gids & ~TMX_FLIP_FLAGS).reshape(height, width)
+
+    # gid 0 表示空，其余减去 firstgid 得到tileset中的下标（与CSV导出一致）
+    tile_ids = np.where(gids == 0, -1, gids - first_gid).astype(np.int16)
+    return tile_ids, tile_size, tileset
+
+
+def tmx_tileset_path(path):
+    tileset_node = ET.parse(path).getroot().find("tileset")
+    return os.path.join(os.path.dirname(path), tileset_node.get("source"))
+
+
+def source_hash(paths, extra=""):
+    digest = hashlib.sha1(f"{FORMAT_VERSION}:{extra}".encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_compiled(path, compiled, key):
+    rows, cols = compiled.tile_ids.shape
+    collision_bits = np.packbits(compiled.collision, axis=1)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "key": key,
+        "rows": rows,
+        "cols": cols,
+        "tile_size": compiled.tile_size,
+        "tileset": compiled.tileset,
+        "collision_row_bytes": collision_bits.shape[1],
+    }
+    # 偏移依赖头长度，先用占位值算出长度再回填
+    header["tiles_offset"] = header["collision_offset"] = 0
+    for _ in range(2):
+        header_bytes = json.dumps(header).encode()
+        tiles_offset = align(len(MAGIC) + 4 + len(header_bytes))
+        collision_offset = align(tiles_offset + compiled.tile_ids.nbytes)
+        header["tiles_offset"], header["collision_offset"] = tiles_offset, collision_offset
+    header_bytes = json.dumps(header).encode()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.seek(tiles_offset)
+        f.write(compiled.tile_ids.astype("<i2").tobytes())
+        f.seek(collision_offset)
+        f.write(collision_bits.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a compiled map file")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(header_length))
+
+
+def load_compiled(path):
+    """mmap 已编译的地图文件；tile id 不会被读入内存，直到真正访问"""
+    header = read_header(path)
+    rows, cols = header["rows"], header["cols"]
+    tile_ids = np.memmap(path, dtype="<i2", mode="r", offset=header["tiles_offset"], shape=(rows, cols))
+    collision_bits = np.memmap(path, dtype=np.uint8, mode="r", offset=header["collision_offset"],
+                               shape=(rows, header["collision_row_bytes"]))
+    collision = np.unpackbits(collision_bits, axis=1, count=cols).astype(bool)
+    return CompiledMap(tile_ids, collision, header["tile_size"], header["tileset"])
+
+
+def compile_source(source_path, tileset_path=None, tile_size=None):
+    """解析 CSV/TMX 源文件"""
+    if source_path.endswith(".tmx"):
+        tile_ids, tile_size, tileset = read_tmx(source_path)
+    else:
+        if tileset_path is None or tile_size is None:
+            raise ValueError("CSV maps need tileset_path and tile_size")
+        tile_ids = read_csv(source_path)
+        tileset = {"image": tileset_path, "columns": None, "tilecount": None}
+
+    # 这里假设tile_id < 0的tile是不能碰撞的
+    collision = tile_ids >= 0
+    return CompiledMap(tile_ids, collision, tile_size, tileset)
+
+
+def source_key(source_path, tileset_path=None, tile_size=None):
+    """缓存键：源文件（TMX 还包括引用的 .tsx）内容的哈希"""
+    if source_path.endswith(".tmx"):
+        return source_hash([source_path, tmx_tileset_path(source_path)])
+    return source_hash([source_path], extra=f"{tileset_path}:{tile_size}")
+
+
+def cache_path_for(source_path, key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{os.path.basename(source_path)}-{key}.ddmap")
+
+
+def load_map(source_path, tileset_path=None, tile_size=None, cache_dir=CACHE_DIR):
+    """加载地图：源文件哈希命中缓存时直接 mmap，否则重新编译并写入缓存"""
+    key = source_key(source_path, tileset_path, tile_size)
+    path = cache_path_for(source_path, key, cache_dir)
+    if os.path.exists(path):
+        try:
+            return load_compiled(path)
+        except (ValueError, OSError) as e:
+            print(f"[⚠️] Ignoring broken map cache {path}: {e}")
+
+    compiled = compile_source(source_path, tileset_path, tile_size)
+    try:
+        remove_stale(source_path, cache_dir)
+        write_compiled(path, compiled, key)
+        return load_compiled(path)
+    except OSError as e:
+        print(f"[⚠️] Could not write map cache {path}: {e}")
+        return compiled
+
+
+def remove_stale(source_path, cache_dir=CACHE_DIR):
+    """删除同一源文件的旧缓存"""
+    if not os.path.isdir(cache_dir):
+        return
+    pattern = re.compile(re.escape(os.path.basename(source_path)) + r"-[0-9a-f]{16}\.ddmap")
+    for name in os.listdir(cache_dir):
+        if pattern.fullmatch(name):
+            os.remove(os.path.join(cache_dir, name))
@@ -0,0 +1,198 @@
+# particles.py
+import math
+import random
+import numpy as np
+import pygame
+from pygame import gfxdraw  # 更平滑的圆形绘制
+
+# 每张粒子贴图预先烘焙的透明度档数，绘制时按当前透明度取最接近的一档，不再逐个 set_alpha
+ALPHA_STEPS = 16
+
+# 各类粒子的参数。sizes 为直径范围（像素，含两端）；alpha 为初始透明度，fade 为每秒减少的透明度范围；
+# speed 为初速度范围（像素/秒），有 direction 时为 (vx 候选, vy 范围)，否则向四周随机散开；
+# drag 为每秒速度保留的比例，gravity 为竖直加速度（像素/秒²，负数向上）；spread 为发射点的随机偏移
+PARTICLE_KINDS = {
+    # 潜水员呼出的气泡，和原来的 Bubble 一样缓慢上浮、左右漂移
+    "bubble": {"sizes": (12, 20), "color": (173, 216, 230), "highlight": True, "alpha": 180,
+               "fade": (90, 150), "direction": ((-12, 0, 12), (-48, -24)), "spread": (10, 5)},
+    # 打开宝箱时迸出的金色碎光
+    "burst": {"sizes": (4, 8), "color": (255, 215, 120), "alpha": 230, "fade": (180, 300),
+              "speed": (60, 180), "drag": 0.2, "gravity": 40, "spread": (6, 6)},
+    # 被敌人撞到时的火花
+    "spark": {"sizes": (3, 6), "color": (255, 240, 200), "alpha": 255, "fade": (450, 700),
+              "speed": (120, 260), "drag": 0.05, "spread": (4, 4)},
+    # 环境中的浮游生物，漂得很慢、慢慢变淡
+    "plankton": {"sizes": (2, 4), "color": (180, 255, 210), "alpha": 110, "fade": (12, 25),
+                 "speed": (2, 10), "drag": 1.0, "gravity": -2, "spread": (0, 0)},
+}
+
+
+class ParticleSystem:
+    """固定容量的粒子池：位置、速度、透明度、贴图都放在 NumPy 数组里，每个模拟步一次性批量推进。
+
+    活着的粒子按发射先后紧凑地放在数组的 [0, count) 段，推进、剔除和绘制都只碰这一段，
+    开销和活着的粒子数成正比而不是和容量成正比；粒子消失时压缩掉空位，池满时丢掉最早发射的粒子。
+    每种粒子每个尺寸的各档透明度贴图只生成一次，绘制时剔除屏幕外的粒子后一次 blits 画完；
+    屏幕上的粒子超过 draw_budget 时只画最新的 draw_budget 个（None 表示不限）。
+    """
+
+    def __init__(self, capacity, kinds=PARTICLE_KINDS, rng=None, draw_budget=None):
+        self.capacity = capacity
+        self.draw_budget = draw_budget
+        # 默认从 random 模块取种子，random.seed() 之后粒子也可以复现
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self.kind_ids = {name: index for index, name in enumerate(kinds)}
+        self.specs = list(kinds.values())
+
+        # frames[first_frame[kind] + (size - min_size) * ALPHA_STEPS + step] 为对应贴图
+        self.frames = []
+        self.first_frame = []
+        for spec in self.specs:
+            self.first_frame.append(len(self.frames))
+            for size in range(spec["sizes"][0], spec["sizes"][1] + 1):
+                self.frames.extend(self.bake(size, spec))
+        self.drag = np.array([spec.get("drag", 1.0) for spec in self.specs])
+        self.gravity = np.array([spec.get("gravity", 0.0) for spec in self.specs])
+        self.drag_dt = None  # drag_step 为按步长 drag_dt 换算好的每步速度保留比例
+
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.alpha = np.zeros(capacity)        # 0 表示空槽
+        self.fade = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=int)
+        self.frame_base = np.zeros(capacity, dtype=int)
+        self.kind = np.zeros(capacity, dtype=int)
+        self.count = 0  # 活着的粒子数
+
+    @staticmethod
+    def bake(size, spec):
+        """一个尺寸的粒子在各档透明度下的贴图"""
+        base = pygame.Surface((size, size), pygame.SRCALPHA)
+        radius = max(1, size // 2)
+        gfxdraw.filled_circle(base, size // 2, size // 2, radius, (*spec["color"], 255))
+        if spec.get("highlight"):
+            gfxdraw.filled_circle(base, size // 3, size // 3, max(2, size // 6), (255, 255, 255, 140))
+
+        frames = []
+        for step in range(ALPHA_STEPS):
+            frame = base.copy()
+            alpha = round(255 * (step + 1) / ALPHA_STEPS)
+            frame.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+            frames.append(frame)
+        return frames
+
+    def __len__(self):
+        return self.count
+
+    def arrays(self):
+        return (self.pos, self.prev_pos, self.vel, self.alpha, self.fade, self.size, self.frame_base, self.kind)
+
+    def emit(self, kind, x, y, count=1):
+        """在 (x, y) 附近发射 count 个 kind 粒子（世界坐标）"""
+        if count <= 0:
+            return
+        count = min(count, self.capacity)
+        spec = self.specs[self.kind_ids[kind]]
+        rng = self.rng
+        spread_x, spread_y = spec["spread"]
+        pos = np.column_stack((x + rng.uniform(-spread_x, spread_x, count),
+                               y + rng.uniform(-spread_y, spread_y, count)))
+        self.place(kind, pos)
+
+    def emit_area(self, kind, rect, count):
+        """在 rect 范围内均匀撒 count 个粒子（用于环境粒子）"""
+        if count <= 0:
+            return
+        count = min(count, self.capacity)
+        rng = self.rng
+        pos = np.column_stack((rng.uniform(rect.left, rect.right, count),
+                               rng.uniform(rect.top, rect.bottom, count)))
+        self.place(kind, pos)
+
+    def place(self, kind, pos):
+        """把 pos 处的新粒子接在活着的粒子后面；放不下时先丢掉最早发射的粒子"""
+        kind_id = self.kind_ids[kind]
+        spec = self.specs[kind_id]
+        rng = self.rng
+        count = len(pos)
+        overflow = self.count + count - self.capacity
+        if overflow > 0:
+            keep = self.count - overflow
+            for array in self.arrays():
+                array[:keep] = array[overflow:self.count]
+            self.count = keep
+        slots = slice(self.count, self.count + count)
+        self.count += count
+
+        if "direction" in spec:
+            choices, (vy_min, vy_max) = spec["direction"]
+            vel = np.column_stack((rng.choice(choices, count), rng.uniform(vy_min, vy_max, count)))
+        else:
+            angle = rng.uniform(0, 2 * math.pi, count)
+            speed = rng.uniform(*spec["speed"], count)
+            vel = np.column_stack((np.cos(angle) * speed, np.sin(angle) * speed))
+
+        min_size, max_size = spec["sizes"]
+        size = rng.integers(min_size, max_size + 1, count)
+
+        self.pos[slots] = pos
+        self.prev_pos[slots] = pos
+        self.vel[slots] = vel
+        self.alpha[slots] = spec["alpha"]
+        self.fade[slots] = rng.uniform(*spec["fade"], count)
+        self.size[slots] = size
+        self.frame_base[slots] = self.first_frame[kind_id] + (size - min_size) * ALPHA_STEPS
+        self.kind[slots] = kind_id
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        if self.drag_dt != dt:
+            self.drag_step = self.drag ** dt
+            self.drag_dt = dt
+        kind = self.kind[:n]
+        vel = self.vel[:n]
+        vel *= self.drag_step[kind][:, None]
+        vel[:, 1] += self.gravity[kind] * dt
+        self.prev_pos[:n] = self.pos[:n]
+        self.pos[:n] += vel * dt
+        alpha = self.alpha[:n]
+        alpha -= self.fade[:n] * dt
+
+        # 压缩掉已经消失的粒子，保持发射先后的顺序
+        alive = alpha > 0
+        if not alive.all():
+            keep = int(np.count_nonzero(alive))
+            for array in self.arrays():
+                array[:keep] = array[:n][alive]
+            self.count = keep
+
+    def clear(self):
+        self.count = 0
+
+    def render_items(self, view, alpha=1.0):
+        """与 view（世界坐标矩形）相交的粒子的 (贴图, 屏幕坐标) 序列"""
+        n = self.count
+        if n == 0:
+            return []
+        camera = np.array(view.topleft, dtype=float)
+
+        # 插值后的屏幕位置（粒子位置为中心），只绘制与屏幕相交的粒子
+        size = self.size[:n]
+        pos = self.pos[:n]
+        topleft = pos + (pos - self.prev_pos[:n]) * (alpha - 1) - camera - (size // 2)[:, None]
+        visible = ((topleft[:, 0] < view.w) & (topleft[:, 0] + size > 0)
+                   & (topleft[:, 1] < view.h) & (topleft[:, 1] + size > 0))
+        visible = np.flatnonzero(visible)
+        if self.draw_budget is not None and len(visible) > self.draw_budget:
+            # 粒子按发射先后排列，丢掉前面最早的；被丢掉的粒子之后也不会再被画出来，不会闪烁
+            visible = visible[len(visible) - self.draw_budget:]
+        topleft = topleft[visible]
+
+        steps = np.minimum(ALPHA_STEPS - 1, (self.alpha[visible] * ALPHA_STEPS / 256).astype(int))
+        # 全部用 C 层的 map/zip 拼出 (贴图, 位置) 序列，几万个粒子也不走 Python 循环
+        x, y = topleft.astype(int).T
+        frames = map(self.frames.__getitem__, (self.frame_base[visible] + steps).tolist())
+        return zip(frames, zip(x.tolist(), y.tolist()))
@@ -1,6 +1,8 @@
 # player.py
 import pygame
 import os
+from assets import load_folder
+from profiler import log
 clock = pygame.time.Clock()
 
 class Player(pygame.sprite.Sprite):
@@ -17,9 +19,13 @@ class Player(pygame.sprite.Sprite):
             self.cooldowns[skill_id] = 0
             self.active_skills[skill_id] = {"duration": 0, "remaining": 0}
 
+        folders = {"idle": "idle", "swimming": "default_swimming"}
         self.animations = {
-            "idle": self.load_images(os.path.join(asset_path, "idle")),
-            "swimming": self.load_images(os.path.join(asset_path, "default_swimming"))
+            state: self.load_images(os.path.join(asset_path, folder)) for state, folder in folders.items()
+        }
+        # Mirrored frames for swimming left, shared through the asset cache
+        self.flipped_animations = {
+            state: self.load_images(os.path.join(asset_path, folder), flip=True) for state, folder in folders.items()
         }
 
         self.state = "idle"  # Initial state
@@ -29,9 +35,12 @@ class Player(pygame.sprite.Sprite):
         # Player world position (in virtual world space)
         self.world_rect = self.image.get_rect(center=(400, 300))  # Initial position
         self.rect = self.world_rect  # Add rect property for sprite collision
+        # Sub-pixel position of world_rect.topleft; prev_pos is the value before the last simulation step
+        self.pos = pygame.math.Vector2(self.world_rect.topleft)
+        self.prev_pos = self.pos.copy()
 
         self.animation_timer = 0
-        self.animation_speed = 0.1
+        self.animation_speed = 6  # frames per second
         self.velocity = pygame.math.Vector2(0, 0)
 
         # Skill-related attributes
@@ -44,7 +53,7 @@ class Player(pygame.sprite.Sprite):
         self.health_max = self.base_health_max
         self.health = self.health_max
 
-        self.swim_speed = 4
+        self.swim_speed = 240  # pixels per second
         self.swim_speed_max = self.swim_speed
         self.swim_speed = self.swim_speed_max
 
@@ -71,14 +80,9 @@ class Player(pygame.sprite.Sprite):
         if self.has_skill("swim speed"):
             self.swim_speed *= 1.25
 
-    def load_images(self, folder):
+    def load_images(self, folder, flip=False):
         """Load images from the specified folder."""
-        images = []
-        for filename in sorted(os.listdir(folder)):
-            if filename.endswith('.png'):
-                path = os.path.join(folder, filename)
-                images.append(pygame.image.load(path).convert_alpha())
-        return images
+        return load_folder(folder, flip=flip)
 
     def take_damage(self, amount):
         if getattr(self, 'invincible', False):
@@ -86,7 +90,7 @@ class Player(pygame.sprite.Sprite):
 
         if self.has_skill("invincibility shield") and self.shield_count > 0:
             self.shield_count -= 1
-            print(f"[DEBUG] Shield blocked damage. Charges remaining: {self.shield_count}")
+            log.debug("Shield blocked damage. Charges remaining: %d", self.shield_count)
             self.invincible = True
             self.invincible_timer = 2.0  # Brief invincibility after blocking
             return False
@@ -97,7 +101,7 @@ class Player(pygame.sprite.Sprite):
         self.invincible = True
         self.invincible_timer = 2.0
 
-        print(f"[DEBUG] Took damage: {amount}, Health now: {self.health}")
+        log.debug("Took damage: %s, Health now: %s", amount, self.health)
 
         return self.health <= 0
 
@@ -117,7 +121,7 @@ class Player(pygame.sprite.Sprite):
         self.health_max = new_max
         self.health = int(self.health_max * health_percent)
         self.health = max(0, self.health)
-        print(f"[DEBUG] Health adjusted: {self.health}/{self.health_max} ({health_percent*100:.1f}%)")
+        log.debug("Health adjusted: %s/%s (%.1f%%)", self.health, self.health_max, health_percent * 100)
 
         # Oxygen
         oxygen_percent = (self.oxygen / self.oxygen_max) if (hasattr(self, "oxygen") and self.oxygen_max > 0) else 1.0
@@ -125,7 +129,7 @@ class Player(pygame.sprite.Sprite):
         self.oxygen = int(self.oxygen_max * oxygen_percent)
         self.oxygen = max(0, self.oxygen)  # 至少为 0
 
-        print(f"[DEBUG] apply_skill_effects: oxygen={self.oxygen}, max={self.oxygen_max}, percent={oxygen_percent}")
+        log.debug("apply_skill_effects: oxygen=%s, max=%s, percent=%s", self.oxygen, self.oxygen_max, oxygen_percent)
     
         # Swim Speed
         if hasattr(self, "base_swim_speed"):
@@ -133,7 +137,7 @@ class Player(pygame.sprite.Sprite):
         if self.has_skill("swim faster"):
             self.swim_speed *= 1.25
 
-        print(f"[DEBUG] apply_skill_effects: swim_speed={self.swim_speed}/{self.swim_speed_max}")
+        log.debug("apply_skill_effects: swim_speed=%s/%s", self.swim_speed, self.swim_speed_max)
  
         # Invincibility Shield
         self.has_invincibility_shield = self.has_skill("invincibility shield")
@@ -147,9 +151,15 @@ class Player(pygame.sprite.Sprite):
         self.total_coins += coin.value
         self.coin_data["total_coins"] = self.total_coins
         self.save_user_progress()
-        print(f"[DEBUG] Collected {coin.value} coin(s). Total: {self.total_coins}")
+        log.debug("Collected %s coin(s). Total: %s", coin.value, self.total_coins)
+
+    def render_topleft(self, alpha):
+        """World position interpolated between the last two simulation steps."""
+        return self.prev_pos.lerp(self.pos, alpha)
 
-    def update(self, keys_pressed, world_width, world_height, tile_map, dt):
+    def update(self, controls, tile_map, dt):
+        """controls: the simulation.Controls for this step (left/right/up/down)."""
+        self.prev_pos.update(self.pos)
         self.velocity.x = 0
         self.velocity.y = 0
 
@@ -157,27 +167,28 @@ class Player(pygame.sprite.Sprite):
 
         # Movement input
         speed = self.swim_speed
-        if keys_pressed[pygame.K_LEFT] or keys_pressed[pygame.K_a]:
+        if controls.left:
             self.velocity.x = -speed
-        if keys_pressed[pygame.K_RIGHT] or keys_pressed[pygame.K_d]:
+        if controls.right:
             self.velocity.x = speed
-        if keys_pressed[pygame.K_UP] or keys_pressed[pygame.K_w]:
+        if controls.up:
             self.velocity.y = -speed
-        if keys_pressed[pygame.K_DOWN] or keys_pressed[pygame.K_s]:
+        if controls.down:
             self.velocity.y = speed
 
         # Apply movement with bounds of the virtual world
-        new_x = self.world_rect.x + self.velocity.x
-        new_y = self.world_rect.y + self.velocity.y
+        new_x = self.pos.x + self.velocity.x * dt
+        new_y = self.pos.y + self.velocity.y * dt
 
         # Get the map bounds
-        map_width = len(tile_map.map_data[0]) * tile_map.tile_size
-        map_height = len(tile_map.map_data) * tile_map.tile_size
+        map_width = tile_map.pixel_width
+        map_height = tile_map.pixel_height
 
         # Calculate new rectangle position
+        new_x = max(0, min(new_x, map_width - self.world_rect.width))
+        new_y = max(0, min(new_y, map_height - self.world_rect.height))
         new_rect = self.world_rect.copy()
-        new_rect.x = max(0, min(new_x, map_width - self.world_rect.width))
-        new_rect.y = max(0, min(new_y, map_height - self.world_rect.height))
+        new_rect.topleft = (round(new_x), round(new_y))
 
         if self.invincible:
             self.invincible_timer -= dt
@@ -192,11 +203,12 @@ class Player(pygame.sprite.Sprite):
             if self.shield_recharge_timer >= self.shield_recharge_time:
                 self.shield_count += 1
                 self.shield_recharge_timer = 0
-                print(f"[DEBUG] Shield recharged. Total charges: {self.shield_count}")
+                log.debug("Shield recharged. Total charges: %d", self.shield_count)
 
         # Check for collisions with the tile map
         if not tile_map.check_collision(new_rect):
             self.world_rect = new_rect  # 没有碰撞，更新玩家位置
+            self.pos.update(new_x, new_y)
 
         # Sync the rect to the world position
         self.rect = self.world_rect
@@ -211,7 +223,7 @@ class Player(pygame.sprite.Sprite):
         if self.state != prev_state:
             self.image_index = 0
 
-        self.animate()
+        self.animate(dt)
         self.update_active_skill_effects()
 
     def update_skills(self, dt):
@@ -229,21 +241,20 @@ class Player(pygame.sprite.Sprite):
         # Flashlight
         self.flashlight_multiplier = 1.5 if self.has_skill("flashlight boost") else 1.0
 
-    def animate(self):
+    def animate(self, dt):
         """Update the player's animation based on state and movement."""
         if self.state not in self.animations or not self.animations[self.state]:
-            print(f"[ERROR] No animation frames for state: {self.state}")
+            log.error("No animation frames for state: %s", self.state)
             return
 
-        self.animation_timer += self.animation_speed
+        self.animation_timer += self.animation_speed * dt
         if self.animation_timer >= 1:
             self.animation_timer = 0
             self.image_index = (self.image_index + 1) % len(self.animations[self.state])
 
         # 获取当前帧图像
-        new_image = self.animations[self.state][self.image_index]
-        if self.velocity.x < 0:
-            new_image = pygame.transform.flip(new_image, True, False)
+        animations = self.flipped_animations if self.velocity.x < 0 else self.animations
+        new_image = animations[self.state][self.image_index]
 
         
         self.image = new_image
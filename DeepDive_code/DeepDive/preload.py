@@ -0,0 +1,100 @@
+# preload.py
+"""启动时在线程池里并行解码 PNG。
+
+工作线程只做 pygame.image.load（解码时不持有 GIL），结果交给主线程的 AssetCache，
+convert / convert_alpha 仍在主线程第一次用到时进行。主线程一边 poll() 一边画加载画面。
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pygame
+from atlas import load_atlas
+
+# 启动时一定会用到的零散图片（动画帧在图集里）
+PRELOAD_FILES = [
+    "assets/backgrounds/background.png",
+    "assets/backgrounds/midground.png",
+    "assets/tiles/tileset.png",
+    "assets/submarine.png",
+]
+# 这些文件夹下的 png 全部预加载（不递归）
+PRELOAD_FOLDERS = [
+    "assets/ui",
+    "assets/shop",
+    "assets/main_menu/button",
+]
+
+
+def startup_images(files=PRELOAD_FILES, folders=PRELOAD_FOLDERS):
+    paths = [path for path in files if os.path.exists(path)]
+    for folder in folders:
+        if os.path.isdir(folder):
+            paths.extend(
+                os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                if name.endswith(".png") and os.path.isfile(os.path.join(folder, name))
+            )
+    return paths
+
+
+def decode(path):
+    return pygame.image.load(path)
+
+
+class Preloader:
+    """把 paths 和精灵图集放到线程池里解码，poll() 在主线程把完成的结果交给 cache。"""
+
+    def __init__(self, cache, paths=None, workers=None):
+        self.cache = cache
+        self.paths = startup_images() if paths is None else paths
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1),
+                                           thread_name_prefix="preload")
+        self.pending = {}  # future -> ("image", path) / ("sheet", 序号) / ("atlas", None)
+        self.completed = 0
+        self.expected_sheets = 4  # 图集索引读出来之前的估计值，只影响进度条
+
+        for path in self.paths:
+            self.pending[self.executor.submit(decode, path)] = ("image", path)
+        # 图集需要时会在工作线程里重新打包
+        self.pending[self.executor.submit(load_atlas)] = ("atlas", None)
+
+    @property
+    def total(self):
+        return len(self.paths) + 1 + self.expected_sheets
+
+    @property
+    def done(self):
+        return not self.pending
+
+    @property
+    def progress(self):
+        return self.completed / self.total if self.total else 1.0
+
+    def poll(self, timeout=0):
+        """处理已完成的任务，返回当前进度（0~1）。timeout 内没有任务完成时直接返回"""
+        finished, _ = wait(list(self.pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in finished:
+            kind, item = self.pending.pop(future)
+            self.completed += 1
+            try:
+                result = future.result()
+            except (OSError, pygame.error) as e:
+                # 解码失败时什么都不做，之后由正常加载路径报错或回退
+                print(f"[⚠️] Preloading {item} failed: {e}")
+                continue
+
+            if kind == "image":
+                self.cache.add_decoded(item, result)
+            elif kind == "sheet":
+                self.cache.atlas.set_sheet(item, result)
+            else:
+                self.cache.set_atlas(result)
+                if result is None:
+                    self.expected_sheets = 0
+                    continue
+                self.expected_sheets = len(result.sheet_names)
+                for number in range(len(result.sheet_names)):
+                    future = self.executor.submit(decode, result.sheet_path(number))
+                    self.pending[future] = ("sheet", number)
+        return self.progress
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,194 @@
+# profiler.py
+"""帧内计时：给游戏循环的各个阶段加上命名的计时区间，用来定位卡顿。
+
+    with profiler.scope("enemies"):
+        ...
+
+关闭时 scope() 直接返回一个共享的空上下文，不取时间也不记录，开销只有一次方法调用。
+开启时每帧的区间都保存下来，保留最近 PROFILER_TRACE_SECONDS 秒：
+游戏里 F3 显示/隐藏叠加层（帧耗时曲线和各阶段耗时），F4 把保留的区间导出成
+Chrome / Perfetto 能直接打开的 trace JSON（chrome://tracing 或 ui.perfetto.dev）。
+
+诊断输出（导出的 trace、录像路径等）统一写到 log 这个 logger；叠加层打开时也显示在叠加层里。
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import pygame
+
+from config import PROFILER_ENABLED, PROFILER_TRACE_SECONDS
+from text import draw_text, render_text, SHADOW
+
+NULL_SCOPE = nullcontext()
+
+log = logging.getLogger("deepdive")
+
+
+class Scope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.spans.append((self.name, self.start, end - self.start))
+        return False
+
+
+class Frame:
+    __slots__ = ("start", "duration", "spans", "totals")
+
+    def __init__(self, start, duration, spans):
+        self.start = start
+        self.duration = duration
+        self.spans = spans    # [(名字, 开始时间, 耗时), ...]，时间单位为秒
+        self.totals = {}      # 名字 -> 这一帧里的总耗时
+        for name, _, elapsed in spans:
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+
+
+class Profiler:
+    def __init__(self, keep_seconds=10.0):
+        self.enabled = False
+        self.keep_seconds = keep_seconds
+        self.frames = deque()
+        self.spans = []            # 当前帧已结束的区间
+        self.frame_start = None
+        self.origin = time.perf_counter()
+
+    def scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        return Scope(self, name)
+
+    def begin_frame(self):
+        if self.enabled:
+            self.spans = []
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frames.append(Frame(self.frame_start, end - self.frame_start, self.spans))
+        self.spans = []
+        self.frame_start = None
+        # 只保留最近 keep_seconds 秒
+        while self.frames and end - self.frames[0].start > self.keep_seconds:
+            self.frames.popleft()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.frame_start = None
+        if not enabled:
+            self.frames.clear()
+            self.spans = []
+
+    def summary(self, frame_count=60):
+        """最近 frame_count 帧的 (平均帧耗时, 最大帧耗时, {名字: 平均耗时})，单位毫秒"""
+        frames = list(self.frames)[-frame_count:]
+        if not frames:
+            return 0.0, 0.0, {}
+        scopes = {}
+        for frame in frames:
+            for name, elapsed in frame.totals.items():
+                scopes[name] = scopes.get(name, 0.0) + elapsed
+        count = len(frames)
+        average = sum(frame.duration for frame in frames) / count * 1000
+        worst = max(frame.duration for frame in frames) * 1000
+        return average, worst, {name: total / count * 1000 for name, total in scopes.items()}
+
+    def trace_events(self):
+        """保留的帧和区间，Chrome trace 格式的完整事件（"ph": "X"，时间单位为微秒）"""
+        events = []
+        for index, frame in enumerate(self.frames):
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": (frame.start - self.origin) * 1e6, "dur": frame.duration * 1e6,
+                           "args": {"index": index}})
+            for name, start, elapsed in frame.spans:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": (start - self.origin) * 1e6, "dur": elapsed * 1e6})
+        return events
+
+    def dump_trace(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, file)
+        return path
+
+
+profiler = Profiler(PROFILER_TRACE_SECONDS)
+profiler.enabled = PROFILER_ENABLED
+
+
+class ProfilerOverlay:
+    """右上角的性能叠加层：最近 graph_frames 帧的耗时曲线和各阶段平均耗时。
+    文字每 refresh 秒才更新一次，数字每帧变化时不会挤满文字缓存。"""
+
+    def __init__(self, profiler, graph_frames=240, graph_height=80, refresh=0.5, message_seconds=3.0):
+        self.profiler = profiler
+        self.graph_frames = graph_frames
+        self.graph_height = graph_height
+        self.refresh = refresh
+        self.message_seconds = message_seconds
+        self.lines = []
+        self.last_refresh = 0.0
+        self.message = None
+        self.message_until = 0.0
+        self.panel = pygame.Surface((graph_frames, graph_height), pygame.SRCALPHA)
+
+    def notify(self, message):
+        """在叠加层底部显示 message_seconds 秒"""
+        self.message = message
+        self.message_until = time.perf_counter() + self.message_seconds
+
+    def draw(self, surface):
+        now = time.perf_counter()
+        if now - self.last_refresh >= self.refresh:
+            self.last_refresh = now
+            average, worst, scopes = self.profiler.summary()
+            self.lines = [("frame", f"{average:.2f} ms  max {worst:.2f}")]
+            self.lines += [(name, f"{elapsed:.2f}") for name, elapsed in
+                           sorted(scopes.items(), key=lambda item: -item[1])]
+
+        width, height = self.graph_frames, self.graph_height
+        x = surface.get_width() - width - 10
+        y = 10
+        self.panel.fill((0, 0, 0, 160))
+        # 纵轴满格 50 ms；16.7 ms（60 帧）和 33.3 ms（30 帧）画参考线
+        scale = height / 50.0
+        for budget in (1000 / 60, 1000 / 30):
+            line_y = height - budget * scale
+            pygame.draw.line(self.panel, (90, 90, 90, 255), (0, line_y), (width, line_y))
+        frames = list(self.profiler.frames)[-width:]
+        offset = width - len(frames)
+        for index, frame in enumerate(frames):
+            ms = frame.duration * 1000
+            color = (80, 220, 80) if ms <= 1000 / 60 else (240, 200, 60) if ms <= 1000 / 30 else (240, 70, 70)
+            bar = min(height, ms * scale)
+            pygame.draw.line(self.panel, color, (offset + index, height), (offset + index, height - bar))
+        surface.blit(self.panel, (x, y))
+
+        text_y = y + height + 4
+        for label, value in self.lines:
+            rect = draw_text(surface, label, (x, text_y), size=18, effect=SHADOW)
+            value_width = render_text(value, 18, effect=SHADOW).get_width()
+            draw_text(surface, value, (x + width - value_width, text_y), size=18, effect=SHADOW)
+            text_y += rect.height
+        if self.message and now < self.message_until:
+            # 右对齐，长消息往左延伸而不是超出屏幕
+            message_width = render_text(self.message, 18, (255, 255, 0), effect=SHADOW).get_width()
+            draw_text(surface, self.message, (x + width - message_width, text_y + 4), size=18,
+                      color=(255, 255, 0), effect=SHADOW)
@@ -0,0 +1,51 @@
+# render.py
+import pygame
+
+# 世界层的绘制顺序（数字小的先画）。同一层内按加入顺序绘制
+LAYER_COINS = 10
+LAYER_OBJECTS = 20    # 宝藏、潜水艇
+LAYER_PLAYER = 30
+LAYER_ENEMIES = 40
+LAYER_PARTICLES = 50
+
+
+class RenderQueue:
+    """一帧内的世界精灵绘制队列。
+
+    每帧先 begin() 设定摄像机，再把要画的东西按层加入：单个精灵用 add()，在这里按摄像机矩形剔除
+    并换算成屏幕坐标；金币、敌人、粒子这类批量系统自己剔除后用 extend() 交上 (贴图, 屏幕坐标) 序列。
+    flush() 按层序每层调用一次 Surface.blits，开销只和屏幕上看得见的数量有关。
+    """
+
+    def __init__(self):
+        self.layers = {}
+        self.view = pygame.Rect(0, 0, 0, 0)
+        self.drawn = 0  # 上一次 flush 画出的精灵数
+
+    def begin(self, camera_offset, view_size):
+        """开始新的一帧；camera_offset 为屏幕左上角的世界坐标"""
+        self.view = pygame.Rect(round(camera_offset[0]), round(camera_offset[1]), *view_size)
+        for items in self.layers.values():
+            items.clear()
+
+    def add(self, layer, image, topleft):
+        """加入一个精灵，topleft 为世界坐标；完全在屏幕外的直接丢弃"""
+        x = round(topleft[0]) - self.view.x
+        y = round(topleft[1]) - self.view.y
+        width, height = image.get_size()
+        if x < self.view.w and y < self.view.h and x + width > 0 and y + height > 0:
+            self.layers.setdefault(layer, []).append((image, (x, y)))
+
+    def extend(self, layer, items):
+        """加入一批已经剔除过、换算成屏幕坐标的 (贴图, (x, y))"""
+        self.layers.setdefault(layer, []).extend(items)
+
+    def flush(self, surface):
+        drawn = 0
+        for layer in sorted(self.layers):
+            items = self.layers[layer]
+            if items:
+                surface.blits(items, doreturn=False)
+                drawn += len(items)
+                items.clear()
+        self.drawn = drawn
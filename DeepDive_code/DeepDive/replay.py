@@ -0,0 +1,167 @@
+# replay.py
+"""逐步输入的录制和回放。
+
+一局由 seed、已购技能、地图类型和每个模拟步的方向键状态完全决定（见 simulation.Simulation）。
+录像文件只保存这些：文件头之后是 (按键位, 连续步数) 的游程编码，按住同一组键时几乎不占空间。
+文件末尾记录结束时的状态指纹，回放时逐步重新模拟并核对：
+
+    python replay.py recordings/run.ddr            # 回放并核对
+    python replay.py --bot 5000 --seed 3 bot.ddr   # 用随机机器人录一段固定的负载
+"""
+import argparse
+import os
+import struct
+import time
+
+from config import SIMULATION_HZ
+from simulation import Simulation, Controls, random_inputs
+
+MAGIC = b"DDRP"
+VERSION = 2  # 2: 结束状态指纹包含护盾次数
+# magic, 版本, seed, 模拟频率, 已购技能位图, 标志位, 步数, 游程数, 结束状态指纹
+HEADER = struct.Struct("<4sHQHIBII8s")
+RUN = struct.Struct("<BH")
+MAX_RUN = 0xFFFF
+STREAMING = 1  # 标志位：使用流式世界
+
+
+def pack_controls(controls):
+    return controls.left | controls.right << 1 | controls.up << 2 | controls.down << 3
+
+
+def unpack_controls(bits):
+    return Controls(bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+
+
+def skill_mask(skills):
+    return sum(1 << index for index, skill in enumerate(skills) if skill.purchased)
+
+
+class Recording:
+    def __init__(self, seed, hz=SIMULATION_HZ, skills=0, streaming=False, runs=None, digest=None):
+        self.seed = seed
+        self.hz = hz
+        self.skills = skills          # 已购技能位图，按 skills.skill_list 的顺序
+        self.streaming = streaming
+        self.runs = runs or []        # [[按键位, 连续步数], ...]
+        self.digest = digest          # 结束时 Simulation.digest()，None 表示没有记录
+
+    @property
+    def ticks(self):
+        return sum(count for _, count in self.runs)
+
+    def inputs(self):
+        """逐步展开的 Controls"""
+        for bits, count in self.runs:
+            controls = unpack_controls(bits)
+            for _ in range(count):
+                yield controls
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        digest = bytes.fromhex(self.digest) if self.digest else bytes(8)
+        flags = STREAMING if self.streaming else 0
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.hz, self.skills, flags,
+                                   self.ticks, len(self.runs), digest))
+            file.write(b"".join(RUN.pack(bits, count) for bits, count in self.runs))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, seed, hz, skills, flags, ticks, run_count, digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+        runs = [list(run) for run in RUN.iter_unpack(data[HEADER.size:HEADER.size + run_count * RUN.size])]
+        recording = cls(seed, hz, skills, bool(flags & STREAMING), runs, digest.hex() if any(digest) else None)
+        if recording.ticks != ticks:
+            raise ValueError(f"{path} is truncated: {recording.ticks} of {ticks} ticks")
+        return recording
+
+
+class InputRecorder:
+    """跟着一局 Simulation 录制每步的输入；finish() 时记下结束状态"""
+
+    def __init__(self, sim, streaming=False, hz=SIMULATION_HZ):
+        self.sim = sim
+        self.recording = Recording(sim.seed, hz, skill_mask(sim.skills), streaming)
+
+    def record(self, controls):
+        runs = self.recording.runs
+        bits = pack_controls(controls)
+        if runs and runs[-1][0] == bits and runs[-1][1] < MAX_RUN:
+            runs[-1][1] += 1
+        else:
+            runs.append([bits, 1])
+
+    def finish(self, path):
+        self.recording.digest = self.sim.digest()
+        self.recording.save(path)
+        return path
+
+
+def make_simulation(recording, skills):
+    """按录像的 seed、技能和地图类型新建一局（会修改 skills 的 purchased）"""
+    for index, skill in enumerate(skills):
+        skill.purchased = bool(recording.skills & (1 << index))
+    tile_map = None
+    if recording.streaming:
+        from world import StreamingTileMap
+        tile_map = StreamingTileMap("assets/tiles/map.csv", "assets/tiles/tileset.png", 64)
+    return Simulation(skills, tile_map, seed=recording.seed)
+
+
+def replay(recording, skills):
+    """重新模拟整段录像，返回 Simulation"""
+    sim = make_simulation(recording, skills)
+    try:
+        sim.run(recording.inputs(), recording.ticks, dt=1.0 / recording.hz)
+    finally:
+        sim.tile_map.close()
+    return sim
+
+
+def main():
+    from skills import skill_list
+
+    parser = argparse.ArgumentParser(description="Replay or record deterministic input recordings.")
+    parser.add_argument("path", help="recording file")
+    parser.add_argument("--bot", type=int, metavar="TICKS", help="record a random-walk bot run to PATH instead")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --bot")
+    args = parser.parse_args()
+
+    if args.bot:
+        for skill in skill_list:
+            skill.purchased = False
+        sim = Simulation(skill_list, seed=args.seed)
+        recorder = InputRecorder(sim)
+        for controls in random_inputs(sim.stream("bot")):
+            if sim.state != "running" or sim.ticks >= args.bot:
+                break
+            recorder.record(controls)
+            sim.step(controls, 1.0 / SIMULATION_HZ)
+        recorder.finish(args.path)
+        print(f"Recorded {sim.ticks} ticks ({len(recorder.recording.runs)} runs, "
+              f"{os.path.getsize(args.path)} bytes) to {args.path}")
+        return
+
+    recording = Recording.load(args.path)
+    start = time.perf_counter()
+    sim = replay(recording, skill_list)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {sim.ticks} ticks in {elapsed:.2f}s ({sim.ticks / elapsed:.0f} ticks/s): {sim.state}, "
+          f"coins {sim.coin_count}, treasures {sim.collected_treasures}")
+    if recording.digest is None:
+        print("[⚠️] Recording has no final state to check against.")
+    elif sim.digest() != recording.digest:
+        print(f"[⚠️] Replay diverged: final state {sim.digest()} != recorded {recording.digest}")
+        raise SystemExit(1)
+    else:
+        print(f"Final state matches ({recording.digest}).")
+
+
+if __name__ == "__main__":
+    main()
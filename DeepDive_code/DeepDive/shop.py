@@ -5,6 +5,9 @@ import json
 import copy
 from skills import skill_list
 from data import load_user_data, save_user_data
+from assets import load_image
+from text import render_text, draw_text, SHADOW, outline
+import display
 
 def load_player_coins_and_skills(player_id, skills):
     return load_user_data(player_id, skills)
@@ -23,46 +26,32 @@ class ShopManager:
         self.coin_data = coin_data
         self.skills = skill_list
         
-        self.font = pygame.font.SysFont(None, 36)
-        self.small_font = pygame.font.SysFont(None, 26)
-        self.coin_font = pygame.font.SysFont(None, 48)
-
         self.icon = self.load_and_scale("assets/ui/icon_coin.png", (40, 40))
 
         self.coin_data = coin_data
         self.total_coin_count = coin_data["total_coins"]  # Initialize total coin count
 
-        self.bg_original = pygame.image.load("assets/backgrounds/background.png").convert()
-        self.midground_original = pygame.image.load("assets/backgrounds/midground.png").convert_alpha()
-        self.midground_x = 0
-        self.midground_width = self.midground_original.get_width()
-
         self.show_shop_menu = False
         self.buying_skill = None
         self.confirmation_popup = False
         self.shop_menu_rect = pygame.Rect(0, 0, 0, 0)
-        self.bold_small_font = pygame.font.SysFont(None, 26, bold=True)
 
-        self.background_image = pygame.transform.scale(self.bg_original, (self.screen_width, self.screen_height))
-        self.midground_image = pygame.transform.scale(self.midground_original, (self.screen_width, self.screen_height))
-
-        back_active = pygame.image.load("assets/shop/back_active.png").convert_alpha()
-        back_nonactive = pygame.image.load("assets/shop/back_nonactive.png").convert_alpha()
+        back_active = load_image("assets/shop/back_active.png")
 
         scale_factor = 0.5
         new_size = (int(back_active.get_width() * scale_factor), int(back_active.get_height() * scale_factor))
 
         self.back_button_images = {
-            "active": pygame.transform.smoothscale(back_active, new_size),
-            "nonactive": pygame.transform.smoothscale(back_nonactive, new_size)
+            "active": load_image("assets/shop/back_active.png", size=new_size, smooth=True),
+            "nonactive": load_image("assets/shop/back_nonactive.png", size=new_size, smooth=True)
         }
         self.back_button_rect = self.back_button_images["nonactive"].get_rect()
         self.back_button_rect.topleft = (30, self.screen_height - self.back_button_images["nonactive"].get_height() - 30)
 
         self.buy_button_images = {
-            "active": pygame.image.load("assets/shop/buy_active.png").convert_alpha(),
-            "nonactive": pygame.image.load("assets/shop/buy_nonactive.png").convert_alpha(),
-            "sold": pygame.image.load("assets/shop/sold.png").convert_alpha(),
+            "active": load_image("assets/shop/buy_active.png"),
+            "nonactive": load_image("assets/shop/buy_nonactive.png"),
+            "sold": load_image("assets/shop/sold.png"),
         }
 
         self.skill_icons = {}
@@ -73,8 +62,7 @@ class ShopManager:
         for skill in skill_list:
             icon_path = f"assets/shop/{skill.name.lower().replace(' ', '_')}.png"
             try:
-                icon_img = pygame.image.load(icon_path).convert_alpha()
-                self.skill_icons[skill.name] = pygame.transform.scale(icon_img, (64, 64))
+                self.skill_icons[skill.name] = load_image(icon_path, size=(64, 64))
                 skill.icon_path = icon_path
             except:
                 skill.icon_path = None 
@@ -88,8 +76,20 @@ class ShopManager:
         self.ne_popup_alpha = 0
         self.ne_popup_surface = pygame.Surface((400, 160), pygame.SRCALPHA)
 
+        # 商店面板（半透明底、图标、名称、描述、金币数）只在金币或已购技能变化时重新生成
+        self.panel_layer = None
+        self.panel_key = None
+        self.drawn_popups = None
+
     def load_and_scale(self, path, size):
-        return pygame.transform.smoothscale(pygame.image.load(path).convert_alpha(), size)
+        return load_image(path, size=size, smooth=True)
+
+    def resize(self, screen_width, screen_height):
+        """屏幕（逻辑）尺寸变化后重新布局，面板图层下次绘制时重建"""
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.back_button_rect.topleft = (30, self.screen_height - self.back_button_images["nonactive"].get_height() - 30)
+        self.panel_key = None
 
     def handle_shop_click(self, pos):
         if self.confirmation_popup and self.popup_ready:
@@ -196,7 +196,7 @@ class ShopManager:
 
         # 问题文字
         question = f"Buy {self.buying_skill.name}?"
-        text = self.font.render(question, True, (255, 255, 255))
+        text = render_text(question, 36)
         self.popup_surface.blit(text, ((width - text.get_width()) // 2, 30))
 
         # YES / NO 按钮
@@ -206,13 +206,11 @@ class ShopManager:
         # YES：黄绿色 + 加粗
         pygame.draw.rect(surface, (0, 0, 0, 0), self.yes_rect)  # 确保背景透明
         pygame.draw.rect(self.popup_surface, (181, 230, 29), (60, 120, 100, 40), border_radius=8)
-        bold_yes = self.bold_small_font.render("YES", True, (0, 50, 0))
-        self.popup_surface.blit(bold_yes, (60 + 30, 120 + 8))
+        draw_text(self.popup_surface, "YES", (60 + 30, 120 + 8), 26, (0, 50, 0), bold=True)
 
         # NO：莫兰迪红色 + 加粗
         pygame.draw.rect(self.popup_surface, (169, 116, 116), (240, 120, 100, 40), border_radius=8)
-        bold_no =  self.bold_small_font.render("NO", True, (50, 0, 0))
-        self.popup_surface.blit(bold_no, (240 + 30, 120 + 8))
+        draw_text(self.popup_surface, "NO", (240 + 30, 120 + 8), 26, (50, 0, 0), bold=True)
 
         # 将整张 popup_surface 贴到 screen 上
         surface.blit(self.popup_surface, (popup_x, popup_y))
@@ -233,7 +231,7 @@ class ShopManager:
         pygame.draw.rect(self.ne_popup_surface, (40, 0, 0, 220), (0, 0, width, height), border_radius=12)
         pygame.draw.rect(self.ne_popup_surface, (255, 100, 100), (0, 0, width, height), 2, border_radius=12)
 
-        warning_text = self.font.render("Not enough coins!", True, (255, 255, 255))
+        warning_text = render_text("Not enough coins!", 36)
         self.ne_popup_surface.blit(warning_text, ((width - warning_text.get_width()) // 2, 50))
 
         surface.blit(self.ne_popup_surface, (popup_x, popup_y))
@@ -242,25 +240,17 @@ class ShopManager:
             # 自动在显示 1.2 秒后关闭
             pygame.time.set_timer(pygame.USEREVENT + 1, 1200, loops=1)
 
-    def draw_shop_menu(self, surface):
-        # --- 滚动背景 ---
-        self.ui_manager.midground_x -= 1
-        if self.ui_manager.midground_x <= -self.ui_manager.midground_width:
-            self.ui_manager.midground_x = 0
-
-        surface.blit(self.ui_manager.background_image, (0, 0))
-        surface.blit(self.ui_manager.midground_image, (self.ui_manager.midground_x, 0))
-        surface.blit(self.ui_manager.midground_image, (self.ui_manager.midground_x + self.screen_width, 0))
-        
+    def build_panel(self):
+        """生成商店面板图层，同时计算购买按钮的位置"""
+        self.panel_layer = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+        surface = self.panel_layer
+
         menu_width = int(self.screen_width * 0.9)
         menu_height = int(self.screen_height * 0.9)
         x = (self.screen_width - menu_width) // 2
         y = (self.screen_height - menu_height) // 2
 
-        transparent_bg = pygame.Surface((menu_width, menu_height), pygame.SRCALPHA)
-        transparent_bg.fill((0, 0, 0, 51))
-        surface.blit(transparent_bg, (x, y))
-
+        surface.fill((0, 0, 0, 51), (x, y, menu_width, menu_height))
         self.shop_menu_rect = pygame.Rect(x, y, menu_width, menu_height)
 
         top_padding = 60
@@ -271,7 +261,6 @@ class ShopManager:
         icon_x = x + 40
         text_x = x + 120
 
-        mouse_pos = pygame.mouse.get_pos()
         self.skill_buy_rects.clear()
 
         for i, skill in enumerate(self.skills):
@@ -281,59 +270,87 @@ class ShopManager:
             if icon:
                 surface.blit(icon, (icon_x, skill_y))
 
-            name_font = pygame.font.SysFont(None, 40, bold=True)
-            name_text = name_font.render(skill.name, True, (255, 255, 255))
-            outline = name_font.render(skill.name, True, (0, 0, 0))
-            surface.blit(outline, (text_x + 2, skill_y + 4))
-            surface.blit(name_text, (text_x, skill_y + 2))
-
-            desc_font = pygame.font.SysFont(None, 26)
-            desc_text = desc_font.render(skill.description, True, (255, 255, 255))
-            surface.blit(desc_text, (text_x, skill_y + 40))
+            draw_text(surface, skill.name, (text_x, skill_y + 2), 40, bold=True, effect=SHADOW)
+            draw_text(surface, skill.description, (text_x, skill_y + 40), 26)
 
             btn_x = x + menu_width - 180
             btn_y = skill_y
-            default_rect = self.buy_button_images["nonactive"].get_rect(topleft=(btn_x, btn_y))
-            self.skill_buy_rects[skill.name] = default_rect
-
-            if skill.purchased:
-                btn_img = self.buy_button_images["sold"]
-            else:
-                btn_img = self.buy_button_images["active"] if default_rect.collidepoint(mouse_pos) else self.buy_button_images["nonactive"]
-
-            surface.blit(btn_img, default_rect.topleft)
-
-        is_hover = self.back_button_rect.collidepoint(mouse_pos)
-        back_img = self.back_button_images["active"] if is_hover else self.back_button_images["nonactive"]
-        surface.blit(back_img, self.back_button_rect.topleft)
+            self.skill_buy_rects[skill.name] = self.buy_button_images["nonactive"].get_rect(topleft=(btn_x, btn_y))
 
         icon_x = self.screen_width - 62
         icon_y = 30
         surface.blit(self.icon, (icon_x, icon_y))
         coin_str = str(self.coin_data["total_coins"])
 
-        coin_color = (180, 255, 100)
-        shadow_color = (0, 0, 0)
-        outline_color = (80, 150, 50)
-
-        coin_text = self.coin_font.render(coin_str, True, coin_color)
-        shadow = self.coin_font.render(coin_str, True, shadow_color)
-        outline = self.coin_font.render(coin_str, True, outline_color)
-
-        text_x = icon_x - coin_text.get_width() - 10
-        text_y = icon_y + (self.icon.get_height() - coin_text.get_height()) // 2
+        # 描边在下，阴影在上，最后是正文
+        effect = outline((80, 150, 50)) + (((0, 0, 0), (2, 2)),)
+        text_width, text_height = render_text(coin_str, 48).get_size()
+        text_x = icon_x - text_width - 10
+        text_y = icon_y + (self.icon.get_height() - text_height) // 2
+        draw_text(surface, coin_str, (text_x, text_y), 48, (180, 255, 100), effect=effect)
 
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            surface.blit(outline, (text_x + dx, text_y + dy))
-
-        surface.blit(shadow, (text_x + 2, text_y + 2))
-        surface.blit(coin_text, (text_x, text_y))
-
-        if self.confirmation_popup:
-            self.draw_confirmation_popup(surface)
+    def shop_buttons(self, hover):
+        """[(名称, 图片, 矩形)]：所有购买按钮和返回按钮在 hover 状态下的样子"""
+        buttons = []
+        for skill in self.skills:
+            rect = self.skill_buy_rects[skill.name]
+            if skill.purchased:
+                image = self.buy_button_images["sold"]
+            else:
+                image = self.buy_button_images["active" if hover == skill.name else "nonactive"]
+            buttons.append((skill.name, image, rect))
+        back_image = self.back_button_images["active" if hover == "Back" else "nonactive"]
+        buttons.append(("Back", back_image, self.back_button_rect))
+        return buttons
 
-        if self.not_enough_coins_popup:
-            self.draw_not_enough_coins_popup(surface)
+    def draw_shop_menu(self, surface):
+        """只重画和上一次不同的部分，返回需要更新到屏幕的矩形"""
+        ui = self.ui_manager
+        panel_key = (self.coin_data["total_coins"], tuple(skill.purchased for skill in self.skills))
+        panel_changed = panel_key != self.panel_key
+        if panel_changed:
+            self.build_panel()
+            self.panel_key = panel_key
+
+        mouse_pos = display.mouse_pos()
+        hover_rects = [(skill.name, self.skill_buy_rects[skill.name]) for skill in self.skills]
+        hover_rects.append(("Back", self.back_button_rect))
+        hover = next((name for name, rect in hover_rects if rect.collidepoint(mouse_pos)), None)
+
+        scroll = round(ui.midground_x)
+        popups = (self.confirmation_popup, self.popup_alpha, self.not_enough_coins_popup, self.ne_popup_alpha)
+        popup_open = self.confirmation_popup or self.not_enough_coins_popup
+
+        if (ui.redraw_all or panel_changed or scroll != ui.drawn_scroll or popups != self.drawn_popups
+                or (popup_open and hover != ui.drawn_hover)):
+            ui.draw_menu_background(surface)
+            surface.blit(self.panel_layer, (0, 0))
+            for _, image, rect in self.shop_buttons(hover):
+                surface.blit(image, rect.topleft)
+
+            if self.confirmation_popup:
+                self.draw_confirmation_popup(surface)
+
+            if self.not_enough_coins_popup:
+                self.draw_not_enough_coins_popup(surface)
+            dirty = [surface.get_rect()]
+        elif hover != ui.drawn_hover:
+            # 只有悬停的按钮变了：恢复按钮下面的背景和面板再画按钮
+            dirty = []
+            for name, image, rect in self.shop_buttons(hover):
+                if name in (hover, ui.drawn_hover):
+                    ui.draw_menu_background(surface, rect)
+                    surface.blit(self.panel_layer, rect.topleft, rect)
+                    surface.blit(image, rect.topleft)
+                    dirty.append(rect)
+        else:
+            return []
+
+        ui.redraw_all = False
+        ui.drawn_scroll = scroll
+        ui.drawn_hover = hover
+        self.drawn_popups = popups
+        return dirty
 
     def reset(self):
         self.selected_skill = None
@@ -0,0 +1,198 @@
+# simulation.py
+"""不依赖窗口的游戏规则核心：玩家、敌人、金币、宝藏、氧气、伤害和胜负判定。
+
+输入由调用者逐步注入（Controls），时间只按 step(dt) 推进，不读键盘也不读系统时钟；
+图片只用来取尺寸，没有视频模式时不做 convert。窗口版 Game 每个模拟步驱动同一个核心，
+机器人、长时间浸泡测试和数值平衡可以直接批量运行：
+
+    python simulation.py --ticks 100000
+"""
+import argparse
+import hashlib
+import random
+import time
+from collections import namedtuple
+
+import pygame
+
+from config import SIMULATION_HZ
+from player import Player
+from map import TileMap
+from level import Level
+from enemy import EnemySystem
+from profiler import log, profiler
+
+OXYGEN_DECAY = 5        # 每秒消耗的氧气（乘以玩家的消耗倍率）
+ENEMY_DAMAGE = 20
+TREASURES_TO_WIN = 3
+
+
+class Controls(namedtuple("Controls", "left right up down")):
+    """一个模拟步的输入"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_keys(cls, keys):
+        """由 pygame.key.get_pressed() 的结果生成"""
+        return cls(
+            keys[pygame.K_LEFT] or keys[pygame.K_a],
+            keys[pygame.K_RIGHT] or keys[pygame.K_d],
+            keys[pygame.K_UP] or keys[pygame.K_w],
+            keys[pygame.K_DOWN] or keys[pygame.K_s],
+        )
+
+
+NO_INPUT = Controls(False, False, False, False)
+
+
+class Simulation:
+    """一局游戏的全部规则状态。
+
+    state 为 "running"、"won" 或 "lost"。每步产生的事件放在 events 里，供画面层播放特效、存档：
+    ("hit", (x, y)) 被敌人撞到，("treasure", (x, y)) 宝箱开始打开，("coin", CollectedCoin) 收集到金币。
+
+    所有随机数都来自由 seed 派生的独立随机流（见 stream()），同一个 seed、同样的已购技能和
+    同样的输入序列总是得到完全相同的一局。seed 为 None 时随机选一个，记在 self.seed 里。
+    """
+
+    def __init__(self, skills, tile_map=None, seed=None):
+        if tile_map is None:
+            tile_map = TileMap("assets/tiles/map.csv", "assets/tiles/tileset.png", 64)
+        self.tile_map = tile_map
+        self.skills = skills
+        self.seed = random.SystemRandom().getrandbits(63) if seed is None else seed
+
+        self.player = Player("assets/characters", skills)
+        player_start_pos = pygame.Vector2(self.player.world_rect.center)
+        self.enemy_system = EnemySystem(tile_map, player_start_pos, self.player, rng=self.stream("enemies"))
+
+        self.level = Level("assets/coins", tile_map, rng=self.stream("level"))
+        self.coins = self.level.coins
+        self.treasures = self.level.treasures
+        self.submarine = self.level.submarine
+        self.object_grid = self.level.object_grid
+
+        self.time = 0.0  # 模拟时间（毫秒）
+        self.ticks = 0
+        self.events = []
+        self.start()
+
+    def stream(self, name):
+        """名为 name 的随机流。每个用途一条流，某处多抽或少抽随机数不会影响其他部分"""
+        return random.Random(f"{self.seed}:{name}")
+
+    def start(self):
+        """开始（或重新开始）计时和计数；地图、敌人和金币保持当前状态，技能的激活和冷却清零"""
+        self.state = "running"
+        for skill in self.skills:
+            skill.reset_runtime()
+        self.player.oxygen = self.player.oxygen_max
+        self.coin_count = 0
+        self.collected_treasures = 0
+
+    def step(self, controls, dt):
+        """推进一个固定步长（秒）；controls 为这一步的输入"""
+        self.events.clear()
+        if self.state != "running":
+            return
+        self.time += dt * 1000
+        self.ticks += 1
+        player = self.player
+
+        with profiler.scope("player"):
+            player.update(controls, self.tile_map, dt)
+            player.update_skills(dt)
+
+        with profiler.scope("enemies"):
+            for enemy in self.enemy_system.colliding(player.rect):
+                if not player.invincible:
+                    # 撞击点取玩家和敌人中心连线的中点
+                    hit = (self.enemy_system.pos[enemy] + player.rect.center) / 2
+                    self.events.append(("hit", tuple(hit.tolist())))
+                    if player.take_damage(ENEMY_DAMAGE):
+                        self.state = "lost"
+                        log.debug("Player died from enemy collision.")
+                        return
+
+            self.enemy_system.update_all(dt)
+
+        with profiler.scope("coins"):
+            # 磁铁吸走的金币和碰到的金币一起结算
+            collected = self.coins.update(dt, player)
+            collected += self.coins.collect(player.rect)
+            for coin in collected:
+                self.coin_count += coin.value
+                self.events.append(("coin", coin))
+
+        player.update_oxygen(OXYGEN_DECAY * dt)
+        if player.oxygen <= 0:
+            self.state = "lost"
+            return
+
+        with profiler.scope("treasures"):
+            self.treasures.update(dt)
+            nearby_objects = self.object_grid.colliding(player.rect)
+            for treasure in nearby_objects:
+                if treasure is not self.submarine and not treasure.collected:
+                    if not treasure.animating:
+                        self.events.append(("treasure", treasure.rect.center))
+                    treasure.trigger_animation()
+
+            self.collected_treasures = sum(1 for t in self.treasures if t.collected)
+        if self.collected_treasures >= TREASURES_TO_WIN and self.submarine in nearby_objects:
+            self.state = "won"
+
+    def digest(self):
+        """当前规则状态的指纹，用来确认回放和原来的一局完全一致"""
+        player = self.player
+        state = hashlib.blake2b(digest_size=8)
+        state.update(repr((self.ticks, self.state, self.coin_count, self.collected_treasures,
+                           tuple(player.pos), player.health, player.oxygen, player.shield_count)).encode())
+        state.update(self.enemy_system.pos.tobytes())
+        state.update(self.coins.pos.tobytes())
+        return state.hexdigest()
+
+    def run(self, inputs, ticks, dt=1.0 / SIMULATION_HZ):
+        """从输入流 inputs（可迭代的 Controls）依次取输入，最多推进 ticks 步，游戏结束时提前停止。
+        返回实际推进的步数。"""
+        inputs = iter(inputs)
+        for tick in range(ticks):
+            if self.state != "running":
+                return tick
+            self.step(next(inputs, NO_INPUT), dt)
+        return ticks
+
+
+def random_inputs(rng=random, hold=30):
+    """随机游走的机器人：每 hold 步换一个方向组合"""
+    while True:
+        controls = Controls(*(rng.random() < 0.3 for _ in range(4)))
+        for _ in range(hold):
+            yield controls
+
+
+def main():
+    from skills import skill_list
+
+    parser = argparse.ArgumentParser(description="Run the game rules without a display.")
+    parser.add_argument("--ticks", type=int, default=10000, help="maximum simulation steps per run")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    total_ticks = 0
+    start = time.perf_counter()
+    for run in range(args.runs):
+        sim = Simulation(skill_list, seed=args.seed + run)
+        ticks = sim.run(random_inputs(sim.stream("bot")), args.ticks)
+        total_ticks += ticks
+        print(f"run {run}: {sim.state} after {ticks} ticks ({sim.time / 1000:.1f}s game time), "
+              f"coins {sim.coin_count}, treasures {sim.collected_treasures}, "
+              f"health {sim.player.health}, oxygen {sim.player.oxygen:.1f}")
+    elapsed = time.perf_counter() - start
+    print(f"{total_ticks} ticks in {elapsed:.2f}s ({total_ticks / elapsed:.0f} ticks/s including setup)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 import json
 import os
 
+from profiler import log
+
 class Skill:
     def __init__(self, name, description, price, apply_func, is_passive=True, duration=0, cooldown=0):
         self.name = name
@@ -11,10 +13,17 @@ class Skill:
         self.purchased = False
         self.is_passive = is_passive  # True = 被动，False = 主动技能
         self.duration = duration      # 持续时间（秒）
+        self.base_duration = duration
         self.cooldown = cooldown      # 冷却时间（秒）
         self.active = False
         self.cooldown_timer = 0
 
+    def reset_runtime(self):
+        """新的一局开始时清除激活、持续和冷却状态；是否已购买保持不变"""
+        self.active = False
+        self.duration = self.base_duration
+        self.cooldown_timer = 0
+
     def apply(self, player):
         self.apply_func(player)
     
@@ -47,13 +56,13 @@ class ExtraHealthSkill(Skill):
         self.multiplier = 1.2  # 保持与氧气技能相同的乘数命名
 
     def apply(self, player):
-        print(f"Applying health skill - before: {player.health_max}")  # 调试
+        log.debug("Applying health skill - before: %s", player.health_max)
         if not hasattr(player, 'base_health_max'):
             player.base_health_max = player.health_max
-            print(f"Base health saved: {player.base_health_max}")  # 调试
+            log.debug("Base health saved: %s", player.base_health_max)
         
         player.health_max = int(player.base_health_max * self.multiplier)
-        print(f"After apply: base={player.base_health_max}, max={player.health_max}")  # 调试
+        log.debug("After apply: base=%s, max=%s", player.base_health_max, player.health_max)
         player.health = min(player.health, player.health_max)
         self.purchased = True
 
@@ -125,7 +134,7 @@ class OxygenReductionSkill(Skill):
         
         player.oxygen_consumption_multiplier = player.base_oxygen_consumption_multiplier * self.multiplier
         self.purchased = True
-        print("[DEBUG] Oxygen reduction passive applied: multiplier =", player.oxygen_consumption_multiplier)
+        log.debug("Oxygen reduction passive applied: multiplier = %s", player.oxygen_consumption_multiplier)
 
     def deactivate(self, player):
         # 如果你有重置技能的逻辑（例如重新开始游戏时）
@@ -149,7 +158,7 @@ class CoinMagnetSkill(Skill):
 
         player.coin_magnet_radius = player.base_coin_magnet_radius * self.range_multiplier
         self.purchased = True
-        print("[DEBUG] Coin Magnet passive applied: radius =", player.coin_magnet_radius)
+        log.debug("Coin Magnet passive applied: radius = %s", player.coin_magnet_radius)
 
     def deactivate(self, player):
         if hasattr(player, 'base_coin_magnet_radius'):
@@ -171,13 +180,13 @@ class InvincibilityShieldSkill(Skill):
         player.invincibility_charges = self.max_charges
         player.has_invincibility_shield = True
         self.purchased = True
-        print(f"[DEBUG] Invincibility Shield applied: {self.max_charges} charges.")
+        log.debug("Invincibility Shield applied: %d charges.", self.max_charges)
 
     def deactivate(self, player):
         player.has_invincibility_shield = False
         if hasattr(player, 'invincibility_charges'):
             del player.invincibility_charges
-        print(f"[DEBUG] Invincibility Shield removed.")
+        log.debug("Invincibility Shield removed.")
 
 
 # --- Skill Functions ---
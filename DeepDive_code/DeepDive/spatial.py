@@ -0,0 +1,81 @@
+# spatial.py
+import pygame
+
+
+class SpatialHash:
+    """均匀网格空间哈希：物体按矩形登记到覆盖的格子里，查询只检查附近的格子。
+
+    格子里用 dict 当有序集合，保证遍历顺序与登记顺序一致（结果可复现）。
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}    # (cell_x, cell_y) -> {obj: None}
+        self.entries = {}  # obj -> (left, top, right, bottom) 格子范围（闭区间）
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        x, y, width, height = (int(v) for v in rect)
+        return (x // size, y // size, (x + max(width, 1) - 1) // size, (y + max(height, 1) - 1) // size)
+
+    def insert(self, obj, rect):
+        cells = self.cell_range(rect)
+        self.entries[obj] = cells
+        self.add_to_cells(obj, cells)
+
+    def remove(self, obj):
+        cells = self.entries.pop(obj, None)
+        if cells is None:
+            return
+        left, top, right, bottom = cells
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.pop(obj, None)
+                    if not bucket:
+                        del self.cells[(cell_x, cell_y)]
+
+    def update(self, obj, rect):
+        """物体移动后调用；只有覆盖的格子变化时才真正修改网格"""
+        cells = self.cell_range(rect)
+        if self.entries.get(obj) == cells:
+            return
+        self.remove(obj)
+        self.entries[obj] = cells
+        self.add_to_cells(obj, cells)
+
+    def add_to_cells(self, obj, cells):
+        left, top, right, bottom = cells
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                self.cells.setdefault((cell_x, cell_y), {})[obj] = None
+
+    def query_cells(self, left, top, right, bottom):
+        found = {}
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return list(found)
+
+    def query_rect(self, rect):
+        """与 rect 所在格子重叠的物体（候选集合，调用者再做精确检测）"""
+        return self.query_cells(*self.cell_range(rect))
+
+    def query_radius(self, center, radius):
+        """中心点 radius 范围内的格子里的物体（候选集合）"""
+        x, y = center
+        return self.query_cells(*self.cell_range((x - radius, y - radius, 2 * radius + 1, 2 * radius + 1)))
+
+    def colliding(self, rect):
+        """与 rect 真正相交的物体（物体需要有 rect 属性）"""
+        rect = pygame.Rect(rect)
+        return [obj for obj in self.query_rect(rect) if rect.colliderect(obj.rect)]
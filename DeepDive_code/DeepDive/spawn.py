@@ -0,0 +1,129 @@
+# spawn.py
+import math
+import random
+import numpy as np
+
+# 距离场只计算到这个上限（单位：tile），足够容纳最大的实体
+MAX_CLEARANCE = 8
+
+
+def dilate(grid):
+    """3x3 膨胀（切比雪夫距离 +1）"""
+    out = grid.copy()
+    out[1:, :] |= grid[:-1, :]
+    out[:-1, :] |= grid[1:, :]
+    rows = out.copy()
+    out[:, 1:] |= rows[:, :-1]
+    out[:, :-1] |= rows[:, 1:]
+    return out
+
+
+class SpawnSampler:
+    """按最小间距和回避区域批量抽取出生点；子类实现 draw(size, rng) 返回单个候选点或 None。"""
+
+    def sample(self, size, count=1, min_separation=0, avoid=(), rng=random, max_tries=20):
+        """抽取最多 count 个能放下 size 的中心点。
+
+        min_separation: 抽到的点之间的最小距离（像素）
+        avoid: [(point, radius), ...] 需要远离的区域，例如玩家出生点
+        每个点最多尝试 max_tries 次，总耗时有上限，与地图拥挤程度无关。
+        """
+        bucket_size = max(min_separation, 1)
+        buckets = {}
+        positions = []
+        for _ in range(count):
+            for _ in range(max_tries):
+                pos = self.draw(size, rng)
+                if pos is None:
+                    return positions
+                if any(math.dist(pos, point) <= radius for point, radius in avoid):
+                    continue
+                key = (pos[0] // bucket_size, pos[1] // bucket_size)
+                if min_separation > 0 and self.too_close(buckets, key, pos, min_separation):
+                    continue
+                buckets.setdefault(key, []).append(pos)
+                positions.append(pos)
+                break
+        return positions
+
+    def too_close(self, buckets, key, pos, min_separation):
+        bucket_x, bucket_y = key
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                for other in buckets.get((bucket_x + dx, bucket_y + dy), ()):
+                    if math.dist(pos, other) < min_separation:
+                        return True
+        return False
+
+
+class SpawnIndex(SpawnSampler):
+    """出生点索引：每张地图构建一次，之后按占地大小 O(1) 抽取空闲位置。
+
+    collidable 也可以是大地图的一个窗口：origin 是窗口左上角的tile坐标，
+    margin 圈的格子只参与距离计算，不会被抽中（流式世界用它跨区块边界计算净空）。
+    """
+
+    def __init__(self, collidable, tile_size, max_clearance=MAX_CLEARANCE, origin=(0, 0), margin=0):
+        self.tile_size = tile_size
+        self.rows, self.cols = collidable.shape
+        self.max_clearance = max_clearance
+        self.origin = origin
+        self.clearance = self.build_distance_field(collidable)
+        if margin:
+            self.clearance[:margin, :] = 0
+            self.clearance[-margin:, :] = 0
+            self.clearance[:, :margin] = 0
+            self.clearance[:, -margin:] = 0
+
+        # 所有空闲格子按净空从大到小排序：净空 >= k 的格子正好是前缀 [0, count_at_least[k])
+        flat = self.clearance.ravel()
+        order = np.argsort(-flat.astype(np.int16), kind="stable")
+        self.free_cells = order[:np.count_nonzero(flat)]
+        counts = np.bincount(flat, minlength=max_clearance + 2)
+        self.count_at_least = np.cumsum(counts[::-1])[::-1]
+
+    def build_distance_field(self, collidable):
+        """每个空闲格子到最近墙体（地图外也算墙）的切比雪夫距离，墙体为0。"""
+        blocked = np.pad(collidable, 1, constant_values=True)
+        clearance = np.zeros(collidable.shape, dtype=np.uint8)
+        clearance[~collidable] = 1
+
+        reach = blocked
+        for distance in range(2, self.max_clearance + 1):
+            reach = dilate(reach)
+            outside = ~reach[1:-1, 1:-1]
+            if not outside.any():
+                break
+            clearance[outside] = distance
+        return clearance
+
+    def required_clearance(self, size):
+        """以格子中心放置 size 大小的矩形时，格子至少需要的净空"""
+        half_extent = max(size) / 2
+        return max(1, math.ceil(half_extent / self.tile_size + 0.5))
+
+    def candidates(self, size):
+        """可以容纳 size 的空闲格子（扁平索引），按净空从大到小排列"""
+        need = self.required_clearance(size)
+        if need > self.max_clearance:
+            return self.free_cells[:0]
+        return self.free_cells[:self.count_at_least[need]]
+
+    def position_in_cell(self, cell, size, rng):
+        """在格子的富余空间内随机偏移，返回像素中心点"""
+        tile_y, tile_x = divmod(int(cell), self.cols)
+        # 格子中心周围 (clearance - 0.5) 个tile内都是空的
+        free_extent = (self.clearance[tile_y, tile_x] - 0.5) * self.tile_size
+        slack_x = max(0, int(free_extent - size[0] / 2))
+        slack_y = max(0, int(free_extent - size[1] / 2))
+        center_x = (self.origin[0] + tile_x) * self.tile_size + self.tile_size // 2
+        center_y = (self.origin[1] + tile_y) * self.tile_size + self.tile_size // 2
+        return (center_x + rng.randint(-slack_x, slack_x),
+                center_y + rng.randint(-slack_y, slack_y))
+
+    def draw(self, size, rng=random):
+        """O(1) 抽取一个能放下 size 的中心点，没有合适的格子时返回 None"""
+        cells = self.candidates(size)
+        if len(cells) == 0:
+            return None
+        return self.position_in_cell(cells[rng.randrange(len(cells))], size, rng)
@@ -1,14 +1,14 @@
 # submarine.py
 import pygame
+from assets import load_image
 
 class Submarine(pygame.sprite.Sprite):
     def __init__(self, image_path, map_width, map_height):
         super().__init__()
         # 加载并缩小潜艇图像为原来的一半
-        original_image = pygame.image.load(image_path).convert_alpha()
-        width, height = original_image.get_size()
+        width, height = load_image(image_path).get_size()
         scaled_width, scaled_height = width // 3, height // 3
-        self.image = pygame.transform.smoothscale(original_image, (scaled_width, scaled_height))
+        self.image = load_image(image_path, size=(scaled_width, scaled_height), smooth=True)
 
         # 将潜艇放置在地图右下角
         x = map_width - scaled_width
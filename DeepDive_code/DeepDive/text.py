@@ -0,0 +1,96 @@
+# text.py
+import os
+from collections import OrderedDict
+import pygame
+
+# 最多缓存多少个渲染好的文字 Surface，超出时丢掉最久没用到的
+TEXT_CACHE_SIZE = 512
+
+# 常用的文字效果：(颜色, (dx, dy)) 图层从下往上依次画在正文下面
+HUD_EFFECT = (((0, 0, 0), (2, 2)), ((50, 50, 0), (-1, -1)))   # 阴影 + 描边
+SHADOW = (((0, 0, 0), (2, 2)),)
+
+
+def outline(color, width=1):
+    """上下左右各偏移 width 的描边效果"""
+    return tuple((color, offset) for offset in ((-width, 0), (width, 0), (0, -width), (0, width)))
+
+
+class TextCache:
+    """全局文字缓存：字体对象按 (name, size, bold) 只创建一次，渲染结果按
+    (字体, 文字, 颜色, 效果) 放进 LRU。阴影/描边和正文预先合成为一张 Surface，每帧只需一次 blit。
+
+    返回的 Surface 被共享，调用者不能在上面绘制或修改透明度。
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, name=None, size=24, bold=False):
+        """name 为字体文件路径、系统字体名或 None（默认字体）"""
+        key = (name, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            if name and os.path.isfile(name):
+                font = pygame.font.Font(name, size)
+                font.set_bold(bold)
+            else:
+                font = pygame.font.SysFont(name, size, bold=bold)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size=24, color=(255, 255, 255), name=None, bold=False, effect=()):
+        """渲染好的文字，返回 (surface, offset)：正文左上角在 surface 上的位置为 -offset"""
+        key = (name, size, bold, text, tuple(color), effect)
+        entry = self.surfaces.get(key)
+        if entry is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        font = self.font(name, size, bold)
+        body = font.render(text, True, color)
+        if effect:
+            # 合成后的范围要包住所有偏移过的图层
+            left = min(0, *(dx for _, (dx, _) in effect))
+            top = min(0, *(dy for _, (_, dy) in effect))
+            right = max(0, *(dx for _, (dx, _) in effect))
+            bottom = max(0, *(dy for _, (_, dy) in effect))
+            surface = pygame.Surface((body.get_width() + right - left, body.get_height() + bottom - top), pygame.SRCALPHA)
+            for layer_color, (dx, dy) in effect:
+                surface.blit(font.render(text, True, layer_color), (dx - left, dy - top))
+            surface.blit(body, (-left, -top))
+            entry = (surface, (left, top))
+        else:
+            entry = (body, (0, 0))
+
+        self.misses += 1
+        self.surfaces[key] = entry
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return entry
+
+    def size(self, text, size=24, name=None, bold=False):
+        """正文（不含效果）的宽高"""
+        return self.font(name, size, bold).size(text)
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+cache = TextCache()
+
+
+def render_text(text, size=24, color=(255, 255, 255), **options):
+    """只要正文的 Surface（有效果时含效果），不关心偏移时用"""
+    return cache.render(text, size, color, **options)[0]
+
+
+def draw_text(surface, text, pos, size=24, color=(255, 255, 255), **options):
+    """把文字画到 surface 上，pos 为正文左上角；返回画到的矩形（含效果）"""
+    image, (left, top) = cache.render(text, size, color, **options)
+    return surface.blit(image, (pos[0] + left, pos[1] + top))
@@ -1,6 +1,7 @@
 # treasure.py
 import pygame
 import os
+from assets import load_image
 
 class Treasure(pygame.sprite.Sprite):
     def __init__(self, treasure_type, base_path, pos):
@@ -10,7 +11,7 @@ class Treasure(pygame.sprite.Sprite):
         self.index = 0
         self.image = self.images[0]
         self.rect = self.image.get_rect(topleft=pos)
-        self.animation_speed = 0.1
+        self.animation_speed = 6  # 每秒帧数
 
         self.collected = False
         self.animating = False
@@ -19,19 +20,16 @@ class Treasure(pygame.sprite.Sprite):
         folder_path = os.path.join(base_path, treasure_type)
         for i in range(10):
             img_path = os.path.join(folder_path, f"{i}.png")
-            image = pygame.image.load(img_path).convert_alpha()
-            # 缩放为 48x32
-            image = pygame.transform.scale(image, (96,64))
-            self.images.append(image)
+            self.images.append(load_image(img_path, size=(96, 64)))
 
     def trigger_animation(self):
         if not self.collected and not self.animating:
             self.animating = True
             self.index = 0  # 每次播放从头开始
 
-    def update(self):
+    def update(self, dt):
         if self.animating:
-            self.index += self.animation_speed
+            self.index += self.animation_speed * dt
             if self.index >= len(self.images):
                 self.index = len(self.images) - 1
                 self.animating = False
@@ -4,30 +4,37 @@ import os
 from skills import skill_list, get_skill_by_name
 from shop import ShopManager
 from data import load_user_data, save_user_data
+from assets import load_image
+from text import render_text, draw_text, HUD_EFFECT
+from config import MENU_SCROLL_SPEED
+import display
 
 class UIManager:
     def __init__(self, screen_width, screen_height, font_path=None, player_id="player1"):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.font = pygame.font.Font(font_path, 36) if font_path else pygame.font.SysFont(None, 36)
-        self.small_font = pygame.font.SysFont(None, 26)
+        self.font_path = font_path  # 标题和按钮文字的字体，None 为默认字体
 
         self.icon = self.load_and_scale("assets/ui/icon_coin.png", (40, 40))
-        self.coin_font = pygame.font.SysFont(None, 48)
         self.coin_icon_pos = (20, 20) 
 
         self.treasure_icon_pos = (self.coin_icon_pos[0], self.coin_icon_pos[1] + 48 + 10)
         self.treasure_icon = self.load_and_scale("assets/ui/icon_treasure.png", (40, 40))
-        self.treasure_font = pygame.font.SysFont(None, 48)
 
-        self.bar_bg = pygame.transform.scale_by(pygame.image.load("assets/ui/valueBar.png").convert_alpha(), 2)
-        self.bar_red = pygame.transform.scale_by(pygame.image.load("assets/ui/valueRed.png").convert_alpha(), 2)
-        self.bar_blue = pygame.transform.scale_by(pygame.image.load("assets/ui/valueBlue.png").convert_alpha(), 2)
+        self.bar_bg = load_image("assets/ui/valueBar.png", scale=2)
+        self.bar_red = load_image("assets/ui/valueRed.png", scale=2)
+        self.bar_blue = load_image("assets/ui/valueBlue.png", scale=2)
 
-        self.bg_original = pygame.image.load("assets/backgrounds/background.png").convert()
-        self.midground_original = pygame.image.load("assets/backgrounds/midground.png").convert_alpha()
-        self.midground_x = 0
-        self.midground_width = self.midground_original.get_width()
+        self.bg_original = load_image("assets/backgrounds/background.png", alpha=False)
+        self.midground_original = load_image("assets/backgrounds/midground.png")
+        self.midground_x = 0.0
+        self.midground_width = self.screen_width
+        self.menu_scroll_speed = MENU_SCROLL_SPEED
+
+        # 菜单和商店只重画变化的部分：drawn_scroll / drawn_hover 是上一次画到屏幕上的状态
+        self.redraw_all = True
+        self.drawn_scroll = None
+        self.drawn_hover = None
 
         self.button_images = {
             "Play": self.load_button("start"),
@@ -40,18 +47,17 @@ class UIManager:
         self.buying_skill = None
         self.confirmation_popup = False
 
-        self.background_image = pygame.transform.scale(self.bg_original, (self.screen_width, self.screen_height))
-        self.midground_image = pygame.transform.scale(self.midground_original, (self.screen_width, self.screen_height))
+        self.background_image = load_image("assets/backgrounds/background.png", size=(self.screen_width, self.screen_height), alpha=False)
+        self.midground_image = load_image("assets/backgrounds/midground.png", size=(self.screen_width, self.screen_height))
 
-        back_active = pygame.image.load("assets/shop/back_active.png").convert_alpha()
-        back_nonactive = pygame.image.load("assets/shop/back_nonactive.png").convert_alpha()
+        back_active = load_image("assets/shop/back_active.png")
 
         scale_factor = 0.5
         new_size = (int(back_active.get_width() * scale_factor), int(back_active.get_height() * scale_factor))
 
         self.back_button_images = {
-            "active": pygame.transform.smoothscale(back_active, new_size),
-            "nonactive": pygame.transform.smoothscale(back_nonactive, new_size)
+            "active": load_image("assets/shop/back_active.png", size=new_size, smooth=True),
+            "nonactive": load_image("assets/shop/back_nonactive.png", size=new_size, smooth=True)
         }
         self.back_button_rect = self.back_button_images["nonactive"].get_rect()
         self.back_button_rect.topleft = (30, self.screen_height - self.back_button_images["nonactive"].get_height() - 30)
@@ -60,9 +66,9 @@ class UIManager:
         self.total_coin_count = load_user_data(self.player_id, skill_list)
 
         self.buy_button_images = {
-            "active": pygame.image.load("assets/shop/buy_active.png").convert_alpha(),
-            "nonactive": pygame.image.load("assets/shop/buy_nonactive.png").convert_alpha(),
-            "sold": pygame.image.load("assets/shop/sold.png").convert_alpha(),
+            "active": load_image("assets/shop/buy_active.png"),
+            "nonactive": load_image("assets/shop/buy_nonactive.png"),
+            "sold": load_image("assets/shop/sold.png"),
         }
 
         self.skill_icons = {}
@@ -71,21 +77,19 @@ class UIManager:
         self.skill_key_mapping = {
             skill.name: str(i + 1) for i, skill in enumerate(self.skills)
         }
-        self.font_small = pygame.font.SysFont("arial", 18)
-        self.font_small_bold = pygame.font.SysFont("arial", 25, bold=True)
-        self.skill_bg_box = pygame.image.load("assets/shop/box.png").convert_alpha()
-        self.skill_bg_box = pygame.transform.scale(self.skill_bg_box, (34, 34))
+        self.tooltips = {}  # 描述文字 -> 画好的提示框
+        self.skill_bg_box = load_image("assets/shop/box.png", size=(34, 34))
 
         self.last_hud_update_time = 0
         self.cached_skill_hud = pygame.Surface((1, 1), pygame.SRCALPHA)
+        self.skill_icon_rects = []  # 第一次生成 HUD 之前也要能做悬停检测
         for skill_name, icon in self.skill_icons.items():
             self.skill_icons[skill_name] = pygame.transform.smoothscale(icon, (64, 64))
 
         for skill in skill_list:
             icon_path = f"assets/shop/{skill.name.lower().replace(' ', '_')}.png"
             try:
-                icon_img = pygame.image.load(icon_path).convert_alpha()
-                self.skill_icons[skill.name] = pygame.transform.scale(icon_img, (64, 64))
+                self.skill_icons[skill.name] = load_image(icon_path, size=(64, 64))
                 skill.icon_path = icon_path
             except:
                 skill.icon_path = None
@@ -96,12 +100,24 @@ class UIManager:
 
     def load_button(self, name):
         return {
-            "active": pygame.image.load(f"assets/main_menu/button/{name}_active.png").convert_alpha(),
-            "nonactive": pygame.image.load(f"assets/main_menu/button/{name}_nonactive.png").convert_alpha()
+            "active": load_image(f"assets/main_menu/button/{name}_active.png"),
+            "nonactive": load_image(f"assets/main_menu/button/{name}_nonactive.png")
         }
 
     def load_and_scale(self, path, size):
-        return pygame.transform.scale(pygame.image.load(path).convert_alpha(), size)
+        return load_image(path, size=size)
+
+    def resize(self, screen_width, screen_height):
+        """屏幕（逻辑）尺寸变化后重建背景缓存和按钮布局"""
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.background_image = load_image("assets/backgrounds/background.png", size=(screen_width, screen_height), alpha=False)
+        self.midground_image = load_image("assets/backgrounds/midground.png", size=(screen_width, screen_height))
+        self.midground_x = 0.0
+        self.midground_width = screen_width
+        self.back_button_rect.topleft = (30, screen_height - self.back_button_images["nonactive"].get_height() - 30)
+        self.buttons.clear()
+        self.redraw_all = True
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -115,9 +131,11 @@ class UIManager:
                             self.exit_requested = True
                         elif label == "Shop":
                             self.show_shop_menu = True   # 这里设置了显示商店菜单
+                            self.redraw_all = True
             else:
                 if self.back_button_rect.collidepoint(mouse_pos):
                     self.show_shop_menu = False
+                    self.redraw_all = True
 
     def draw_skill_hud(self, surface, player):
         current_time = pygame.time.get_ticks()
@@ -136,7 +154,7 @@ class UIManager:
         surface.blit(self.cached_skill_hud, hud_pos)
 
         # 检查鼠标悬停，显示 tooltip
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        mouse_x, mouse_y = display.mouse_pos()
         for rect, description in self.skill_icon_rects:
             global_rect = rect.move(hud_x, hud_y)  # 修正相对 HUD 的坐标
             if global_rect.collidepoint(mouse_x, mouse_y):
@@ -150,11 +168,6 @@ class UIManager:
         hud_width = 340
         skill_number = 1
 
-        # 字体设置
-        font_name = self.font_small     # 技能名
-        font_cd = self.font_small_bold  # CD时间
-        font_index = self.font_small_bold  # 序号
-
         purchased_skills = [s for s in self.skills if s.purchased]
         hud_height = (box_size + spacing) * len(purchased_skills)
         hud_surface = pygame.Surface((hud_width, hud_height), pygame.SRCALPHA)
@@ -189,12 +202,10 @@ class UIManager:
             self.skill_icon_rects.append((rect, skill.description))
 
             # 技能名（图标下方左对齐）
-            name_surface = font_name.render(skill.name, True, (255, 255, 255))
-            hud_surface.blit(name_surface, (box_x, box_y + box_size + 6))
+            draw_text(hud_surface, skill.name, (box_x, box_y + box_size + 6), 18, name="arial")
 
             # 序号左上角
-            index_surface = font_index.render(str(skill_number), True, (200, 200, 200))
-            hud_surface.blit(index_surface, (0, y + 6))
+            draw_text(hud_surface, str(skill_number), (0, y + 6), 25, (200, 200, 200), name="arial", bold=True)
 
             y += box_size + spacing
             skill_number += 1
@@ -202,25 +213,27 @@ class UIManager:
         return hud_surface
 
     def _draw_tooltip(self, surface, text, pos):
-        font = self.font_small
-        lines = text.split("\n")
-        rendered_lines = [font.render(line, True, (255, 255, 255)) for line in lines]
-        width = max(line.get_width() for line in rendered_lines) + 12
-        height = sum(line.get_height() for line in rendered_lines) + 12
-
-        tooltip_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        tooltip_surface.fill((30, 30, 30, 220))
-        pygame.draw.rect(tooltip_surface, (200, 200, 200), tooltip_surface.get_rect(), 1)
-
-        y = 6
-        for line in rendered_lines:
-            tooltip_surface.blit(line, (6, y))
-            y += line.get_height()
+        # 每段描述的提示框只画一次，悬停时每帧只贴一次
+        tooltip_surface = self.tooltips.get(text)
+        if tooltip_surface is None:
+            rendered_lines = [render_text(line, 18, name="arial") for line in text.split("\n")]
+            width = max(line.get_width() for line in rendered_lines) + 12
+            height = sum(line.get_height() for line in rendered_lines) + 12
+
+            tooltip_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            tooltip_surface.fill((30, 30, 30, 220))
+            pygame.draw.rect(tooltip_surface, (200, 200, 200), tooltip_surface.get_rect(), 1)
+
+            y = 6
+            for line in rendered_lines:
+                tooltip_surface.blit(line, (6, y))
+                y += line.get_height()
+            self.tooltips[text] = tooltip_surface
 
         surface.blit(tooltip_surface, pos)
 
     def draw_hover_tooltip(self, surface):
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = display.mouse_pos()
         for rect, description in self.skill_icon_rects:
             global_rect = rect.move(self.hud_x, self.hud_y)  # <== 添加全局坐标转换
             if global_rect.collidepoint(mouse_pos):
@@ -258,18 +271,9 @@ class UIManager:
                 mark_pos = base_x + pad_x + int(color_w * base_max_ratio)
                 self._draw_mark_line(surface, mark_pos, y_offset, bar_h, (255, 215, 0)) 
         
-        # 4. 文本渲染（使用缓存优化）
+        # 4. 文本渲染（text 模块缓存）
         text_str = f"{label}: {text_override if text_override else int(value)}"
-        
-        # 文本缓存机制
-        if not hasattr(self, 'text_cache'):
-            self.text_cache = {}
-        
-        cache_key = (text_str, label)  # 使用组合键避免冲突
-        if cache_key not in self.text_cache:
-            self.text_cache[cache_key] = self.small_font.render(text_str, True, (255, 255, 255))
-        
-        text_surface = self.text_cache[cache_key]
+        text_surface = render_text(text_str, 26)
         text_y = y_offset + (bar_h - text_surface.get_height()) // 2
         surface.blit(text_surface, (base_x + bar_w + 10, text_y))
         
@@ -312,72 +316,84 @@ class UIManager:
         icon_y = y
         surface.blit(self.icon, (icon_x, icon_y))
 
+        # 阴影和描边与数字预先合成在一起，数字不变时只是一次 blit
         coin_str = str(coin_count)
-        coin_text = self.coin_font.render(coin_str, True, (255, 255, 0))
-        shadow = self.coin_font.render(coin_str, True, (0, 0, 0))
-        outline = self.coin_font.render(coin_str, True, (50, 50, 0))
-
+        text_height = render_text(coin_str, 48).get_height()
         text_x = icon_x + self.icon.get_width() + 10
-        text_y = y + (self.icon.get_height() - coin_text.get_height()) // 2
-
-        surface.blit(shadow, (text_x + 2, text_y + 2))
-        surface.blit(outline, (text_x - 1, text_y - 1))
-        surface.blit(coin_text, (text_x, text_y))
+        text_y = y + (self.icon.get_height() - text_height) // 2
+        draw_text(surface, coin_str, (text_x, text_y), 48, (255, 255, 0), effect=HUD_EFFECT)
 
         # ---------- Treasure ----------
         treasure_icon_y = icon_y + self.icon.get_height() + 15
         surface.blit(self.treasure_icon, (icon_x, treasure_icon_y))
 
         treasure_str = f"{treasure_count} / 3"
-        treasure_text = self.coin_font.render(treasure_str, True, (255, 255, 0))
-        shadow = self.coin_font.render(treasure_str, True, (0, 0, 0))
-        outline = self.coin_font.render(treasure_str, True, (50, 50, 0))
-
-        treasure_text_x = text_x
-        treasure_text_y = treasure_icon_y + (self.treasure_icon.get_height() - treasure_text.get_height()) // 2
-
-        surface.blit(shadow, (treasure_text_x + 2, treasure_text_y + 2))
-        surface.blit(outline, (treasure_text_x - 1, treasure_text_y - 1))
-        surface.blit(treasure_text, (treasure_text_x, treasure_text_y))
-
+        treasure_text_y = treasure_icon_y + (self.treasure_icon.get_height() - text_height) // 2
+        draw_text(surface, treasure_str, (text_x, treasure_text_y), 48, (255, 255, 0), effect=HUD_EFFECT)
+
+
+    def advance_scroll(self, dt):
+        """按时间滚动中景"""
+        self.midground_x -= self.menu_scroll_speed * dt
+        if self.midground_x <= -self.midground_width:
+            self.midground_x += self.midground_width
+
+    def draw_menu_background(self, surface, area=None):
+        """画远景和滚动的中景；area 不为空时只重画这块区域"""
+        surface.set_clip(area)
+        surface.blit(self.background_image, (0, 0))
+        scroll = round(self.midground_x)
+        surface.blit(self.midground_image, (scroll, 0))
+        surface.blit(self.midground_image, (scroll + self.midground_width, 0))
+        surface.set_clip(None)
+
+    def layout_menu_buttons(self, screen_width, screen_height):
+        self.buttons.clear()
+        labels = ["Play", "Shop", "Exit"]
+        total_height = sum(self.button_images[l]["active"].get_height() + 40 for l in labels) - 40
+        start_y = (screen_height - total_height) // 2
+
+        for label in labels:
+            rect = self.button_images[label]["nonactive"].get_rect(center=(screen_width // 2, start_y))
+            self.buttons.append((label, rect))
+            start_y += rect.height + 40
 
     def draw_main_menu(self, surface):
+        """只重画和上一次不同的部分，返回需要更新到屏幕的矩形"""
         screen_width, screen_height = surface.get_size()
-        self.bg = pygame.transform.scale(self.bg_original, (screen_width, screen_height))
-        self.midground = pygame.transform.scale(self.midground_original, (screen_width, screen_height))
-        self.midground_width = screen_width
-
-        surface.blit(self.bg, (0, 0))
-        surface.blit(self.midground, (self.midground_x, 0))
-        surface.blit(self.midground, (self.midground_x + screen_width, 0))
-        self.midground_x -= 0.1
-        if self.midground_x <= -screen_width:
-            self.midground_x = 0
-
-        if not self.show_shop_menu:
-            self.buttons.clear()
-            mouse_pos = pygame.mouse.get_pos()
-            labels = ["Play", "Shop", "Exit"]
-            total_height = sum(self.button_images[l]["active"].get_height() + 40 for l in labels) - 40
-            start_y = (screen_height - total_height) // 2
-
-            for label in labels:
-                active_img = self.button_images[label]["active"]
-                nonactive_img = self.button_images[label]["nonactive"]
-                rect = nonactive_img.get_rect(center=(screen_width // 2, start_y))
-                img = active_img if rect.collidepoint(mouse_pos) else nonactive_img
-                surface.blit(img, rect.topleft)
-                self.buttons.append((label, rect))
-                start_y += rect.height + 40
+        if not self.buttons:
+            self.layout_menu_buttons(screen_width, screen_height)
+
+        mouse_pos = display.mouse_pos()
+        hover = next((label for label, rect in self.buttons if rect.collidepoint(mouse_pos)), None)
+        scroll = round(self.midground_x)
+
+        if self.redraw_all or scroll != self.drawn_scroll:
+            self.draw_menu_background(surface)
+            changed = self.buttons
+            dirty = [surface.get_rect()]
+        elif hover != self.drawn_hover:
+            # 只有悬停的按钮变了：恢复按钮下面的背景再画按钮
+            changed = [(label, rect) for label, rect in self.buttons if label in (hover, self.drawn_hover)]
+            for _, rect in changed:
+                self.draw_menu_background(surface, rect)
+            dirty = [rect for _, rect in changed]
         else:
-            self.draw_shop_menu(surface)
+            return []
+
+        for label, rect in changed:
+            state = "active" if label == hover else "nonactive"
+            surface.blit(self.button_images[label][state], rect.topleft)
 
-        pygame.display.flip()
+        self.redraw_all = False
+        self.drawn_scroll = scroll
+        self.drawn_hover = hover
+        return dirty
 
     def draw_game_over(self, surface, win=False):
         surface.fill((0, 0, 0))
         message = "You Win!" if win else "Game Over"
-        msg_render = self.font.render(message, True, (255, 255, 0))
+        msg_render = render_text(message, 36, (255, 255, 0), name=self.font_path)
         surface.blit(msg_render, (self.screen_width // 2 - msg_render.get_width() // 2, 200))
 
         retry_y = self.screen_height // 2
@@ -389,8 +405,7 @@ class UIManager:
         pygame.draw.rect(surface, (0, 100, 200), retry_btn, border_radius=10)
         pygame.draw.rect(surface, (150, 0, 0), exit_btn, border_radius=10)
 
-        surface.blit(self.font.render("Retry", True, (255, 255, 255)), (retry_btn.x + 60, retry_btn.y + 15))
-        surface.blit(self.font.render("Exit", True, (255, 255, 255)), (exit_btn.x + 70, exit_btn.y + 15))
+        draw_text(surface, "Retry", (retry_btn.x + 60, retry_btn.y + 15), 36, name=self.font_path)
+        draw_text(surface, "Exit", (exit_btn.x + 70, exit_btn.y + 15), 36, name=self.font_path)
 
-        pygame.display.flip()
         return retry_btn, exit_btn
@@ -0,0 +1,393 @@
+# world.py
+"""流式世界：地图按固定大小的区块存放在磁盘上。
+
+摄像机附近的区块由后台线程读取，远处的区块按 LRU 淘汰，常驻内存不超过 memory_cap。
+碰撞使用整张地图的碰撞位图（mmap，每个tile 1 bit），所以跨区块边界的查询和
+远离摄像机的敌人都不需要加载区块。
+
+文件布局（小端）：
+    8 字节魔数 | uint32 头长度 | JSON 头 | 区块数据 | 碰撞位图 | 每个区块的空闲tile数
+区块数据按区块顺序连续存放，每个区块是 chunk_size x chunk_size 个 int16（地图外填 -1）。
+"""
+import json
+import os
+import queue
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from assets import load_image
+from map import CHUNK_SIZE, bake_tiles, is_opaque
+from mapfile import CACHE_DIR, compile_source, source_key
+from spawn import SpawnIndex, SpawnSampler
+
+MAGIC = b"DDWORLD\x01"
+ALIGNMENT = 64
+MEMORY_CAP = 256 * 1024 * 1024
+
+PREFETCH_RADIUS = 1      # 可见区块之外再预取几圈
+BAKES_PER_FRAME = 2      # 每帧最多烘焙几个预取的区块，避免卡顿
+SPAWN_MARGIN = 4         # 出生点索引跨区块边界多读取的tile圈数（也是可用的最大净空）
+SPAWN_INDEX_CACHE = 64   # 最多缓存多少个区块的出生点索引
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_world(path, compiled, chunk_size=CHUNK_SIZE):
+    """把编译后的地图写成按区块存放的世界文件"""
+    rows, cols = compiled.tile_ids.shape
+    chunk_rows = -(-rows // chunk_size)
+    chunk_cols = -(-cols // chunk_size)
+
+    padded = np.full((chunk_rows * chunk_size, chunk_cols * chunk_size), -1, dtype="<i2")
+    padded[:rows, :cols] = compiled.tile_ids
+    # 区块优先的布局：一个区块的tile在文件里是连续的，一次读取即可
+    blocks = padded.reshape(chunk_rows, chunk_size, chunk_cols, chunk_size).swapaxes(1, 2)
+
+    free = np.zeros(padded.shape, dtype=bool)
+    free[:rows, :cols] = ~compiled.collision
+    free_counts = free.reshape(chunk_rows, chunk_size, chunk_cols, chunk_size).sum(axis=(1, 3)).astype("<u4")
+    collision_bits = np.packbits(compiled.collision, axis=1)
+
+    header = {
+        "rows": rows,
+        "cols": cols,
+        "tile_size": compiled.tile_size,
+        "tileset": compiled.tileset,
+        "chunk_size": chunk_size,
+        "chunk_rows": chunk_rows,
+        "chunk_cols": chunk_cols,
+        "collision_row_bytes": collision_bits.shape[1],
+        "chunks_offset": 0,
+        "collision_offset": 0,
+        "free_offset": 0,
+    }
+    # 偏移依赖头长度，先用占位值算出长度再回填
+    for _ in range(2):
+        header_bytes = json.dumps(header).encode()
+        header["chunks_offset"] = align(len(MAGIC) + 4 + len(header_bytes))
+        header["collision_offset"] = align(header["chunks_offset"] + blocks.nbytes)
+        header["free_offset"] = align(header["collision_offset"] + collision_bits.nbytes)
+    header_bytes = json.dumps(header).encode()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.seek(header["chunks_offset"])
+        f.write(np.ascontiguousarray(blocks).tobytes())
+        f.seek(header["collision_offset"])
+        f.write(collision_bits.tobytes())
+        f.seek(header["free_offset"])
+        f.write(free_counts.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_world_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a world file")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(header_length))
+
+
+def world_path_for(map_path, tileset_path=None, tile_size=None, chunk_size=CHUNK_SIZE, cache_dir=CACHE_DIR):
+    """源文件对应的世界文件；源文件没变时复用，否则重新生成"""
+    key = source_key(map_path, tileset_path, tile_size)
+    path = os.path.join(cache_dir, f"{os.path.basename(map_path)}-{key}-c{chunk_size}.ddworld")
+    if not os.path.exists(path):
+        write_world(path, compile_source(map_path, tileset_path, tile_size), chunk_size)
+    return path
+
+
+class WorldChunk:
+    def __init__(self, tile_ids):
+        self.tile_ids = tile_ids
+        self.surface = None
+        self.baked = False
+
+    @property
+    def nbytes(self):
+        size = self.tile_ids.nbytes
+        if self.surface is not None:
+            size += self.surface.get_width() * self.surface.get_height() * self.surface.get_bytesize()
+        return size
+
+
+class StreamingTileMap:
+    """与 TileMap 接口相同的流式地图：draw / check_collision / check_collisions / check_points / spawn_index"""
+
+    def __init__(self, map_path, tileset_path=None, tile_size=None, chunk_size=CHUNK_SIZE, memory_cap=MEMORY_CAP):
+        """map_path 可以是源文件（CSV/TMX，会先转换成世界文件缓存）或者已经生成好的 .ddworld 文件"""
+        if map_path.endswith(".ddworld"):
+            self.path = map_path
+        else:
+            self.path = world_path_for(map_path, tileset_path, tile_size, chunk_size)
+        header = read_world_header(self.path)
+
+        self.tile_size = header["tile_size"]
+        self.chunk_size = header["chunk_size"]
+        self.rows, self.cols = header["rows"], header["cols"]
+        self.chunk_rows, self.chunk_cols = header["chunk_rows"], header["chunk_cols"]
+        self.pixel_width = self.cols * self.tile_size
+        self.pixel_height = self.rows * self.tile_size
+        self.chunks_offset = header["chunks_offset"]
+        self.chunk_bytes = self.chunk_size * self.chunk_size * 2
+
+        self.tiles = self.load_tiles(header["tileset"]["image"], header["tileset"]["tilecount"])
+        self.opaque_tiles = np.array([is_opaque(tile) for tile in self.tiles], dtype=bool)
+
+        # 碰撞位图和每个区块的空闲tile数直接 mmap，由操作系统按需换页
+        self.collision_bits = np.memmap(self.path, dtype=np.uint8, mode="r", offset=header["collision_offset"],
+                                        shape=(self.rows, header["collision_row_bytes"]))
+        self.free_counts = np.memmap(self.path, dtype="<u4", mode="r", offset=header["free_offset"],
+                                     shape=(self.chunk_rows, self.chunk_cols))
+        # 主线程同步读取区块时用的映射，不必每次重新打开文件
+        self.chunk_data = np.memmap(self.path, dtype="<i2", mode="r", offset=self.chunks_offset,
+                                    shape=(self.chunk_rows * self.chunk_cols, self.chunk_size, self.chunk_size))
+
+        # 常驻区块，最近使用的在末尾
+        self.memory_cap = memory_cap
+        self.chunks = OrderedDict()
+        self.resident_bytes = 0
+        self.pending = set()
+        self.requests = queue.Queue()
+        self.loaded = queue.Queue()
+        self.loader = threading.Thread(target=self.load_worker, name="world-loader", daemon=True)
+        self.loader.start()
+
+        self.spawn_index = StreamingSpawnIndex(self)
+
+    def load_tiles(self, path, tilecount=None):
+        image = load_image(path)
+        tiles = []
+        image_width, image_height = image.get_size()
+        for y in range(0, image_height, self.tile_size):
+            for x in range(0, image_width, self.tile_size):
+                tiles.append(image.subsurface(pygame.Rect(x, y, self.tile_size, self.tile_size)))
+        return tiles[:tilecount]
+
+    # ---------- 区块读取 ----------
+
+    def read_chunk(self, f, key):
+        chunk_x, chunk_y = key
+        f.seek(self.chunks_offset + (chunk_y * self.chunk_cols + chunk_x) * self.chunk_bytes)
+        data = np.frombuffer(f.read(self.chunk_bytes), dtype="<i2")
+        return data.reshape(self.chunk_size, self.chunk_size)
+
+    def load_worker(self):
+        """后台线程：只做磁盘读取，表面的烘焙留在主线程"""
+        with open(self.path, "rb") as f:
+            while True:
+                key = self.requests.get()
+                if key is None:
+                    break
+                self.loaded.put((key, self.read_chunk(f, key)))
+
+    def request(self, key):
+        if key not in self.chunks and key not in self.pending:
+            self.pending.add(key)
+            self.requests.put(key)
+
+    def collect_loaded(self):
+        while True:
+            try:
+                key, tile_ids = self.loaded.get_nowait()
+            except queue.Empty:
+                return
+            self.pending.discard(key)
+            if key not in self.chunks:
+                self.add_chunk(key, WorldChunk(tile_ids))
+
+    def add_chunk(self, key, chunk):
+        self.chunks[key] = chunk
+        self.resident_bytes += chunk.nbytes
+
+    def get_chunk(self, key):
+        """取一个常驻区块；还没加载时在主线程同步读取（只会发生在预取没跟上的时候）"""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk_x, chunk_y = key
+            chunk = WorldChunk(np.array(self.chunk_data[chunk_y * self.chunk_cols + chunk_x]))
+            self.add_chunk(key, chunk)
+        self.chunks.move_to_end(key)
+        return chunk
+
+    def bake(self, chunk):
+        self.resident_bytes -= chunk.nbytes
+        chunk.surface = bake_tiles(chunk.tile_ids, self.tiles, self.opaque_tiles, self.tile_size)
+        chunk.baked = True
+        self.resident_bytes += chunk.nbytes
+
+    def evict(self, pinned):
+        """按 LRU 淘汰区块直到低于内存上限；正在显示的区块不会被淘汰"""
+        for key in list(self.chunks):
+            if self.resident_bytes <= self.memory_cap:
+                break
+            if key in pinned:
+                continue
+            self.resident_bytes -= self.chunks.pop(key).nbytes
+
+    def close(self):
+        """停止后台读取线程并解除文件映射；地图不再使用时调用，可以重复调用"""
+        if self.loader.is_alive():
+            self.requests.put(None)
+            self.loader.join()
+        for name in ("collision_bits", "free_counts", "chunk_data"):
+            array = getattr(self, name)
+            if array is None:
+                continue
+            setattr(self, name, None)
+            mapping = array._mmap
+            del array  # 先放掉数组对 mmap 的引用，否则 close() 会因为还有导出的缓冲区而失败
+            mapping.close()
+
+    # ---------- 绘制 ----------
+
+    def chunk_range(self, left, top, right, bottom):
+        """像素范围覆盖的区块坐标范围（闭区间，已裁剪到地图内）"""
+        chunk_pixels = self.chunk_size * self.tile_size
+        return (max(0, left // chunk_pixels), max(0, top // chunk_pixels),
+                min(right // chunk_pixels, self.chunk_cols - 1), min(bottom // chunk_pixels, self.chunk_rows - 1))
+
+    def draw(self, surface, camera_offset):
+        """绘制可见区块，同时让后台线程预取周围一圈区块"""
+        self.collect_loaded()
+
+        chunk_pixels = self.chunk_size * self.tile_size
+        view_width, view_height = surface.get_size()
+        offset_x, offset_y = int(camera_offset[0]), int(camera_offset[1])
+        first_x, first_y, last_x, last_y = self.chunk_range(
+            offset_x, offset_y, offset_x + view_width - 1, offset_y + view_height - 1)
+
+        visible = [(x, y) for y in range(first_y, last_y + 1) for x in range(first_x, last_x + 1)]
+        budget = BAKES_PER_FRAME
+        for y in range(first_y - PREFETCH_RADIUS, last_y + PREFETCH_RADIUS + 1):
+            for x in range(first_x - PREFETCH_RADIUS, last_x + PREFETCH_RADIUS + 1):
+                key = (x, y)
+                if not (0 <= x < self.chunk_cols and 0 <= y < self.chunk_rows) or key in visible:
+                    continue
+                chunk = self.chunks.get(key)
+                if chunk is None:
+                    self.request(key)
+                elif not chunk.baked and budget > 0:
+                    self.bake(chunk)
+                    budget -= 1
+
+        blits = []
+        for key in visible:
+            chunk = self.get_chunk(key)
+            if not chunk.baked:
+                self.bake(chunk)
+            if chunk.surface is not None:
+                blits.append((chunk.surface, (key[0] * chunk_pixels - offset_x, key[1] * chunk_pixels - offset_y)))
+        surface.blits(blits, doreturn=False)
+
+        self.evict(pinned=set(visible))
+
+    # ---------- 碰撞 ----------
+
+    def collision_window(self, left, top, right, bottom):
+        """tile范围 [left, right) x [top, bottom) 的碰撞矩阵（调用者保证范围在地图内）"""
+        first_byte = left // 8
+        bits = np.unpackbits(self.collision_bits[top:bottom, first_byte:(right + 7) // 8], axis=1)
+        start = left - first_byte * 8
+        return bits[:, start:start + right - left].astype(bool)
+
+    def tile_bounds(self, rect):
+        left = max(rect[0] // self.tile_size, 0)
+        right = min((rect[0] + rect[2] - 1) // self.tile_size + 1, self.cols)
+        top = max(rect[1] // self.tile_size, 0)
+        bottom = min((rect[1] + rect[3] - 1) // self.tile_size + 1, self.rows)
+        return left, top, right, bottom
+
+    def check_collision(self, rect):
+        """检查矩形是否与任何平台碰撞，地图外的部分视为空"""
+        left, top, right, bottom = self.tile_bounds(rect)
+        if left >= right or top >= bottom:
+            return False
+        return bool(self.collision_window(left, top, right, bottom).any())
+
+    def collision_bits_at(self, tile_x, tile_y):
+        """地图内若干 tile 的碰撞位（bool数组）"""
+        packed = self.collision_bits[tile_y, tile_x >> 3]
+        return ((packed >> (7 - (tile_x & 7))) & 1).astype(bool)
+
+    def check_collisions(self, rects):
+        """批量检查 N 个矩形，返回长度为 N 的bool数组，地图外的部分视为空。
+        整张地图的碰撞位图都在 mmap 里，不需要区块常驻；矩形按 tile 范围展开，
+        只对最大宽高做循环（敌人只占一两个 tile），每一轮对所有矩形一起查位图"""
+        rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+        x, y, w, h = rects.T
+        left = np.clip(x // self.tile_size, 0, self.cols)
+        right = np.clip((x + w - 1) // self.tile_size + 1, 0, self.cols)
+        top = np.clip(y // self.tile_size, 0, self.rows)
+        bottom = np.clip((y + h - 1) // self.tile_size + 1, 0, self.rows)
+        width = np.maximum(right - left, 0)
+        height = np.maximum(bottom - top, 0)
+
+        result = np.zeros(len(rects), dtype=bool)
+        if not len(rects):
+            return result
+        for dy in range(int(height.max())):
+            for dx in range(int(width.max())):
+                pending = np.flatnonzero((dx < width) & (dy < height) & ~result)
+                if len(pending):
+                    result[pending] = self.collision_bits_at(left[pending] + dx, top[pending] + dy)
+        return result
+
+    def check_points(self, points):
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        tile_x = points[:, 0] // self.tile_size
+        tile_y = points[:, 1] // self.tile_size
+        inside = (tile_x >= 0) & (tile_x < self.cols) & (tile_y >= 0) & (tile_y < self.rows)
+        result = np.zeros(len(points), dtype=bool)
+        result[inside] = self.collision_bits_at(tile_x[inside], tile_y[inside])
+        return result
+
+
+class StreamingSpawnIndex(SpawnSampler):
+    """流式世界的出生点索引：按空闲tile数加权挑选区块，再用该区块（带边界外一圈）的 SpawnIndex 抽点"""
+
+    def __init__(self, world, chunk_tries=8):
+        self.world = world
+        self.chunk_tries = chunk_tries
+        self.cumulative = np.cumsum(np.asarray(world.free_counts, dtype=np.int64).ravel())
+        self.indexes = OrderedDict()
+
+    def chunk_index(self, flat_index):
+        index = self.indexes.get(flat_index)
+        if index is None:
+            index = self.build_chunk_index(*divmod(flat_index, self.world.chunk_cols))
+            self.indexes[flat_index] = index
+            if len(self.indexes) > SPAWN_INDEX_CACHE:
+                self.indexes.popitem(last=False)
+        self.indexes.move_to_end(flat_index)
+        return index
+
+    def build_chunk_index(self, chunk_y, chunk_x):
+        world, size, margin = self.world, self.world.chunk_size, SPAWN_MARGIN
+        left, top = chunk_x * size - margin, chunk_y * size - margin
+        # 窗口超出地图的部分当作墙，这样边缘区块的净空也是准确的
+        window = np.ones((size + 2 * margin, size + 2 * margin), dtype=bool)
+        l, t, r, b = max(left, 0), max(top, 0), min(left + window.shape[1], world.cols), min(top + window.shape[0], world.rows)
+        window[t - top:b - top, l - left:r - left] = world.collision_window(l, t, r, b)
+        return SpawnIndex(window, world.tile_size, max_clearance=margin, origin=(left, top), margin=margin)
+
+    def draw(self, size, rng):
+        total = int(self.cumulative[-1]) if len(self.cumulative) else 0
+        if total == 0:
+            return None
+        for _ in range(self.chunk_tries):
+            flat_index = int(np.searchsorted(self.cumulative, rng.randrange(total), side="right"))
+            pos = self.chunk_index(flat_index).draw(size, rng)
+            if pos is not None:
+                return pos
+        return None